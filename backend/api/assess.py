@@ -0,0 +1,198 @@
+"""
+Classify-and-price API: one request from photo to hospital comparison
+=====================================================================
+
+The frontend used to POST the photo to the classifier (:5005/predict) and
+then call the pricing service (:5001/api/pricing/compare) with the
+predicted class. This service loads both in one process.
+POST /api/assess classifies the upload with the micro-batched classifier,
+maps the class name to its pricing wound type (`Foot_ulcer` ->
+`Foot-ulcer`), and joins it against the in-memory price index. The
+response holds the prediction, the top-k alternatives and the hospital
+comparison, with per-stage timings in the body and in a Server-Timing
+header.
+
+Usage:
+    python backend/api/assess.py
+    python backend/api/serve.py assess --port 5002
+    ASSESS_CLASSIFIER=yolo_predict python backend/api/assess.py
+"""
+
+from flask import Flask, request, jsonify
+from collections import deque
+import importlib
+import os
+import threading
+import time
+import numpy as np
+from batching import InferenceTimeout, QueueFull
+from model_manager import ModelNotReady
+from serving import DECODE_ERRORS, server_busy
+
+app = Flask(__name__)
+
+# ============== CONFIG ==============
+PORT = 5002
+CLASSIFIER = os.environ.get("ASSESS_CLASSIFIER", "resnet_predict")
+DEFAULT_TOP_K = 3
+LATENCY_WINDOW = 1000  # recent requests kept for /metrics percentiles
+# ====================================
+
+# Ingestion workers re-import the main module under spawn (macOS/Windows)
+# as __mp_main__; only the real process loads prices and weights.
+if __name__ != "__mp_main__":
+    import pricing
+    classifier = importlib.import_module(CLASSIFIER).service
+    for error in (QueueFull, InferenceTimeout, ModelNotReady):
+        app.register_error_handler(error, server_busy)
+
+
+@app.after_request
+def add_cors_headers(response):
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    response.headers["Access-Control-Expose-Headers"] = "Server-Timing"
+    return response
+
+
+# ------------------------------
+# 1. Latency tracking
+# ------------------------------
+class LatencyStats:
+    """Per-stage latencies of the last `window` requests"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, timings):
+        with self.lock:
+            self.samples.append(timings)
+            self.count += 1
+
+    def summary(self):
+        with self.lock:
+            samples = list(self.samples)
+            count = self.count
+        stats = {"requests": count, "window": len(samples)}
+        for stage in (samples[0] if samples else {}):
+            values = np.array([s[stage] for s in samples])
+            stats[stage] = {
+                "mean_ms": round(float(values.mean()), 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+            }
+        return stats
+
+
+latency = LatencyStats()
+
+
+def server_timing(timings):
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+
+
+# ------------------------------
+# 2. Define /api/assess endpoint
+# ------------------------------
+@app.route("/api/assess", methods=["POST"])
+def assess():
+    """Classify an uploaded photo and price the predicted wound type.
+
+    Optional query parameters: `top_k` (alternatives to return) and
+    `hospitals` (comma-separated ids, as for /api/pricing/compare).
+    """
+    started = time.perf_counter()
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    hospital_ids = pricing.parse_hospital_ids(request.args.get("hospitals", ""))
+    if hospital_ids is None:
+        return jsonify({"error": f"Unknown hospital in: {request.args.get('hospitals')}"}), 404
+    top_k = min(max(request.args.get("top_k", DEFAULT_TOP_K, type=int), 1), classifier.max_top_k)
+
+    data = request.files["file"].read()
+    uploaded = time.perf_counter()
+    try:
+        top = classifier.classify(data)
+    except DECODE_ERRORS as e:
+        return jsonify({"error": f"Could not decode image: {e}"}), 400
+    classified = time.perf_counter()
+
+    alternatives = [{
+        "class": name,
+        "wound_type": pricing.canonical_wound_type(name),
+        "confidence": round(confidence, 3)
+    } for name, confidence in top[:top_k]]
+    prediction = alternatives[0]
+    if prediction["wound_type"]:
+        comparison = pricing.build_compare_result(prediction["wound_type"], hospital_ids)
+    else:
+        comparison = None
+    priced = time.perf_counter()
+
+    timings = {
+        "upload": (uploaded - started) * 1000,
+        "classify": (classified - uploaded) * 1000,
+        "pricing": (priced - classified) * 1000,
+        "total": (priced - started) * 1000,
+    }
+    latency.add(timings)
+
+    response = jsonify({
+        "predicted_class": prediction["class"],
+        "wound_type": prediction["wound_type"],
+        "confidence": prediction["confidence"],
+        "top_k": alternatives,
+        "pricing": comparison,
+        "timing_ms": {stage: round(ms, 2) for stage, ms in timings.items()}
+    })
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+
+# ------------------------------
+# 3. Health, readiness and metrics routes
+# ------------------------------
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({
+        "status": "healthy",
+        "ready": classifier.manager.deployment is not None,
+        "classifier": CLASSIFIER,
+        "hospitals": list(pricing.HOSPITALS),
+        "wound_types": len(pricing.WOUND_PROCEDURE_MAPPING)
+    })
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    status = classifier.manager.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    deployment = classifier.manager.deployment
+    return jsonify({
+        "latency": latency.summary(),
+        "model": classifier.manager.status(),
+        "batching": deployment.batcher.stats() if deployment else None,
+        "cache": deployment.cache.stats() if deployment else None
+    })
+
+
+def start_background_tasks():
+    """Called once by whatever runs this app (serve.py, `python assess.py`)"""
+    pricing.start_background_tasks()
+
+
+# ------------------------------
+# 4. Run the app
+# ------------------------------
+if __name__ == "__main__":
+    start_background_tasks()
+    print(f"🚀 Starting Assess API ({CLASSIFIER} + pricing) on http://127.0.0.1:{PORT}")
+    app.run(host="0.0.0.0", port=PORT, debug=False)
@@ -0,0 +1,198 @@
+"""
+Dynamic micro-batching for the prediction services
+===================================================
+
+Request threads `submit()` one preprocessed input each. Worker threads
+drain the queue into batches and run them through `run_batch`. A batch is
+flushed when it reaches `max_batch_size` or when `max_wait_ms` has passed
+since its first item. Each result is then handed back to the request
+thread that submitted it.
+
+`run_batch(items)` takes a list of inputs and returns a list of results
+in the same order. Pass a list of callables (one per model replica) to get
+one worker thread per replica, all pulling from the same queue;
+`worker_init(index)` runs first on each worker thread, e.g. to pin its
+thread count.
+
+With `max_queue` set, a submit that would push the queue past it raises
+QueueFull right away instead of waiting, so callers can shed load. A
+submit waits at most `timeout` seconds (default `default_timeout`) for its
+results, then cancels whatever has not started and raises InferenceTimeout.
+If `run_batch` returns the wrong number of results, the whole batch fails.
+
+`close()` retires a batcher (e.g. when a new model is swapped in): work
+already queued still finishes, later submits raise BatcherClosed.
+"""
+
+import math
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceTimeout(TimeoutError):
+    def __init__(self, seconds, retry_after=1):
+        super().__init__(f"Inference did not finish within {seconds}s")
+        self.retry_after = retry_after
+
+
+class BatcherClosed(RuntimeError):
+    pass
+
+
+_STOP = object()  # queued once per worker by close()
+
+
+class MicroBatcher:
+    def __init__(self, run_batch, max_batch_size=16, max_wait_ms=5, name="batcher",
+                 max_queue=0, worker_init=None, default_timeout=60):
+        runners = run_batch if isinstance(run_batch, (list, tuple)) else [run_batch]
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue  # 0 = unbounded
+        self.worker_init = worker_init
+        self.default_timeout = default_timeout
+        self.closed = False
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_depth = 0
+        self.busy_seconds = 0.0
+        self.threads = [
+            threading.Thread(target=self._loop, args=(index, runner),
+                             name=f"{name}-{index}", daemon=True)
+            for index, runner in enumerate(runners)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, item, timeout=None):
+        """Queue one input and block until its result is ready"""
+        return self.submit_many([item], timeout)[0]
+
+    def submit_many(self, items, timeout=None):
+        """Queue several inputs at once and block until all results are ready"""
+        with self.lock:
+            if self.closed:
+                raise BatcherClosed(f"{self.threads[0].name} is closed")
+            depth = self.queue.qsize()
+            if self.max_queue and depth + len(items) > self.max_queue:
+                self.rejected += len(items)
+                raise QueueFull(self._retry_after(depth))
+            futures = []
+            for item in items:
+                future = Future()
+                self.queue.put((item, future))
+                futures.append(future)
+            self.requests += len(futures)
+            self.max_queue_depth = max(self.max_queue_depth, depth + len(futures))
+
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            return [future.result(max(0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeout:
+            for future in futures:
+                future.cancel()  # skipped by the worker if not started yet
+            with self.lock:
+                self.timed_out += len(items)
+            raise InferenceTimeout(timeout)
+
+    def _retry_after(self, depth):
+        """Whole seconds until the current backlog should have drained
+        (caller holds the lock)"""
+        batches = sum(self.batch_sizes.values())
+        seconds_per_batch = self.busy_seconds / batches if batches else 1.0
+        batches_ahead = depth / self.max_batch_size / len(self.threads)
+        return max(1, math.ceil(batches_ahead * seconds_per_batch))
+
+    def close(self):
+        """Stop accepting work; workers drain the queue and exit"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            for _ in self.threads:
+                self.queue.put((_STOP, None))
+
+    def _collect(self):
+        """Next batch, or None once the batcher is closed and drained"""
+        batch = [self.queue.get()]
+        if batch[0][0] is _STOP:
+            return None
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    entry = self.queue.get(timeout=remaining)
+                else:
+                    entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry[0] is _STOP:
+                # Nothing real is queued after a stop marker; leave it for
+                # this worker's next _collect
+                self.queue.put(entry)
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self, index, run_batch):
+        if self.worker_init:
+            self.worker_init(index)
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Drop inputs whose submitter timed out and cancelled them
+            batch = [(item, future) for item, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                results = run_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"run_batch returned {len(results)} results "
+                                       f"for {len(batch)} inputs")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            with self.lock:
+                self.batch_sizes[len(batch)] += 1
+                self.busy_seconds += time.monotonic() - started
+
+    def stats(self):
+        with self.lock:
+            batches = sum(self.batch_sizes.values())
+            batched = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "queue_depth": self.queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "max_queue": self.max_queue,
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "batches": batches,
+                "mean_batch_size": round(batched / batches, 2) if batches else 0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "busy_seconds": round(self.busy_seconds, 3),
+                "replicas": len(self.threads),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
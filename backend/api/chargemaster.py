@@ -0,0 +1,353 @@
+"""
+Chargemaster loading and binary snapshots
+=========================================
+
+Hospital price-transparency CSVs are parsed once into a `PriceIndex` and
+written to a versioned binary snapshot next to the source file. Later
+starts memory-map the snapshot instead of reparsing the CSV, so every
+gunicorn worker shares the same read-only pages.
+
+Snapshot layout (single file, replaced atomically):
+    MAGIC (8 bytes) | header length (uint32) | header JSON | column data
+
+The header records the snapshot version, the parsing schema and the source
+file's size, mtime and SHA-256. A snapshot is reused while size and mtime
+match; if only the mtime changed, the hash decides.
+
+Each hospital's CSV quirks (metadata lines, which code columns to index,
+duplicate handling) are described by its entry in the hospital registry
+(see `load_registry`), so one generic loader serves every chargemaster.
+
+Build ahead of a deploy with:
+    python backend/api/chargemaster.py backend/api/hospitals.json
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import numpy as np
+from ingest import ingest_csv
+
+SNAPSHOT_MAGIC = b"CMSNAP\x00\x01"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_ALIGN = 64
+
+# Column name -> dtype stored in the snapshot
+INDEX_COLUMNS = {
+    "min": np.float64,
+    "max": np.float64,
+    "estimate": np.float64,
+    "gross": np.float64,
+    "discounted": np.float64,
+    "setting": np.uint8,
+}
+
+
+class PriceIndex:
+    """Columnar, typed view of one hospital's chargemaster.
+
+    Rows are normalized once at load time: codes live in one array, each
+    charge column is a float64 array and `offsets` maps a code to its row.
+    Settings are interned into a small lookup table so every row only
+    stores a uint8.
+    """
+
+    def __init__(self, codes, columns, setting_names, stats=None, source=None):
+        self.codes = codes
+        self.min = columns["min"]
+        self.max = columns["max"]
+        self.estimate = columns["estimate"]
+        self.gross = columns["gross"]
+        self.discounted = columns["discounted"]
+        self.setting = columns["setting"]
+        self.setting_names = tuple(setting_names)
+        self.stats = stats or {}
+        self.source = source  # fingerprint of the CSV a snapshot was built from
+        self.offsets = {code.decode() if isinstance(code, bytes) else str(code): i
+                        for i, code in enumerate(codes.tolist())}
+
+    @classmethod
+    def from_entries(cls, entries, stats=None):
+        """Build an index from (code, min, max, gross, discounted, setting) tuples"""
+        codes, mins, maxs, estimates = [], [], [], []
+        gross, discounted, settings = [], [], []
+        setting_names, setting_ids = [], {}
+        for code, min_p, max_p, gross_p, discounted_p, setting in entries:
+            # Lincoln might have gross/discounted instead of min/max
+            if min_p == 0 and max_p == 0 and (gross_p > 0 or discounted_p > 0):
+                min_p = min(gross_p, discounted_p) if discounted_p > 0 else gross_p
+                max_p = max(gross_p, discounted_p) if discounted_p > 0 else gross_p
+
+            # Rows without any usable price can never be served
+            if min_p <= 0 and max_p <= 0:
+                continue
+
+            setting = setting or 'unknown'
+            if setting not in setting_ids:
+                setting_ids[setting] = len(setting_names)
+                setting_names.append(setting)
+
+            codes.append(code)
+            mins.append(round(min_p, 2))
+            maxs.append(round(max_p, 2))
+            estimates.append(round((min_p + max_p) / 2, 2))
+            gross.append(gross_p)
+            discounted.append(discounted_p)
+            settings.append(setting_ids[setting])
+
+        columns = {
+            "min": mins,
+            "max": maxs,
+            "estimate": estimates,
+            "gross": gross,
+            "discounted": discounted,
+            "setting": settings,
+        }
+        columns = {name: np.array(values, dtype=INDEX_COLUMNS[name])
+                   for name, values in columns.items()}
+        code_array = np.array([c.encode() for c in codes], dtype=bytes)
+        if not len(code_array):
+            code_array = np.array([], dtype="S1")
+        return cls(code_array, columns, setting_names, stats)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, code):
+        return code in self.offsets
+
+    def pricing(self, code):
+        """Return the response-ready pricing dict for `code`, or None"""
+        i = self.offsets.get(code)
+        if i is None:
+            return None
+        return {
+            "min": float(self.min[i]),
+            "max": float(self.max[i]),
+            "estimate": float(self.estimate[i]),
+            "setting": self.setting_names[self.setting[i]]
+        }
+
+
+# ------------------------------
+# Hospital registry and generic CSV loader
+# ------------------------------
+# Schema fields that change how a CSV is parsed (and so invalidate snapshots)
+PARSE_KEYS = ("metadata_lines", "codes", "duplicates", "columns")
+
+
+def load_registry(registry_path):
+    """Read the hospital registry: a JSON list of hospital entries.
+
+    Each entry has display fields (id, name, short_name, location), the
+    `csv` path and a column-mapping schema:
+      metadata_lines  lines to skip before the CSV header (default 2)
+      codes           [{"column": ..., "type_column": ..., "types": [...]}]
+                      code columns to index, optionally filtered by type
+      duplicates      "first" or "last" row wins for a repeated code
+      columns         overrides for ingest.DEFAULT_COLUMNS
+    A relative `csv` path is resolved against the registry's directory.
+    """
+    with open(registry_path) as f:
+        hospitals = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(registry_path))
+    seen = set()
+    for hospital in hospitals:
+        for key in ("id", "name", "csv", "codes"):
+            if key not in hospital:
+                raise ValueError(f"Hospital entry missing '{key}': {hospital}")
+        if hospital["id"] in seen:
+            raise ValueError(f"Duplicate hospital id: {hospital['id']}")
+        seen.add(hospital["id"])
+        hospital.setdefault("short_name", hospital["name"])
+        hospital.setdefault("location", "")
+        hospital["csv"] = os.path.join(base_dir, os.path.expanduser(hospital["csv"]))
+    return hospitals
+
+
+def schema_fingerprint(schema, codes=None):
+    parse_fields = {key: schema.get(key) for key in PARSE_KEYS}
+    parse_fields["only_codes"] = sorted(codes) if codes is not None else None
+    return hashlib.sha256(json.dumps(parse_fields, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def read_entries(csv_path, schema, codes=None, workers=None):
+    """Parse a chargemaster CSV according to a hospital schema.
+
+    Returns (entries, stats); see `ingest.ingest_csv`.
+    """
+    return ingest_csv(csv_path, schema, codes=codes, workers=workers)
+
+
+# ------------------------------
+# Binary snapshots
+# ------------------------------
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path_for(csv_path, snapshot_dir=None):
+    if snapshot_dir is None:
+        return csv_path + SNAPSHOT_SUFFIX
+    return os.path.join(snapshot_dir, os.path.basename(csv_path) + SNAPSHOT_SUFFIX)
+
+
+def source_fingerprint(csv_path, sha256=None):
+    stat = os.stat(csv_path)
+    return {
+        "path": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(csv_path),
+    }
+
+
+def _align(offset):
+    return (offset + SNAPSHOT_ALIGN - 1) // SNAPSHOT_ALIGN * SNAPSHOT_ALIGN
+
+
+def write_snapshot(index, snapshot_path, schema_id, source):
+    """Serialize `index` to `snapshot_path`, replacing any old file atomically"""
+    arrays = {"codes": np.ascontiguousarray(index.codes)}
+    for name in INDEX_COLUMNS:
+        arrays[name] = np.ascontiguousarray(getattr(index, name))
+
+    # Offsets are relative to the start of the data section
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"dtype": array.dtype.str,
+                        "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "schema": schema_id,
+        "source": source,
+        "setting_names": list(index.setting_names),
+        "stats": index.stats,
+        "columns": layout,
+    }).encode()
+    data_start = _align(len(SNAPSHOT_MAGIC) + 4 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_snapshot_header(snapshot_path):
+    with open(snapshot_path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{snapshot_path} is not a chargemaster snapshot")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+    header["data_start"] = _align(len(SNAPSHOT_MAGIC) + 4 + header_len)
+    return header
+
+
+def map_snapshot(snapshot_path, header=None):
+    """Memory-map a snapshot into a read-only PriceIndex"""
+    header = header or read_snapshot_header(snapshot_path)
+    arrays = {}
+    for name, spec in header["columns"].items():
+        shape = tuple(spec["shape"])
+        if not shape[0]:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+            continue
+        arrays[name] = np.memmap(snapshot_path, dtype=spec["dtype"], mode="r",
+                                 offset=header["data_start"] + spec["offset"],
+                                 shape=shape)
+    codes = arrays.pop("codes")
+    return PriceIndex(codes, arrays, header["setting_names"], header.get("stats"),
+                      header.get("source"))
+
+
+def snapshot_is_current(header, csv_path, schema_id):
+    """Check a snapshot header against the CSV and schema it was built from"""
+    if header.get("version") != SNAPSHOT_VERSION or header.get("schema") != schema_id:
+        return False
+    source = header.get("source", {})
+    stat = os.stat(csv_path)
+    if source.get("size") != stat.st_size:
+        return False
+    if source.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    # Touched or copied but possibly unchanged: let the content decide
+    return source.get("sha256") == file_sha256(csv_path)
+
+
+def build_snapshot(csv_path, schema, snapshot_dir=None, codes=None, workers=None):
+    """Parse `csv_path` with `schema` and write its snapshot; returns the path"""
+    snapshot_path = snapshot_path_for(csv_path, snapshot_dir)
+    sha256 = file_sha256(csv_path)
+    index = PriceIndex.from_entries(*read_entries(csv_path, schema, codes, workers))
+    write_snapshot(index, snapshot_path, schema_fingerprint(schema, codes),
+                   source_fingerprint(csv_path, sha256))
+    return snapshot_path
+
+
+def load_chargemaster(csv_path, schema, snapshot_dir=None, codes=None, workers=None):
+    """Return a PriceIndex for `csv_path`, using or refreshing its snapshot.
+
+    `codes` optionally limits the index to those procedure codes and
+    `workers` sets the ingestion process pool size (default: all cores).
+    Falls back to an in-memory index when the snapshot cannot be written
+    (e.g. a read-only data directory).
+    """
+    snapshot_path = snapshot_path_for(csv_path, snapshot_dir)
+    if os.path.exists(snapshot_path):
+        try:
+            header = read_snapshot_header(snapshot_path)
+            if snapshot_is_current(header, csv_path, schema_fingerprint(schema, codes)):
+                print(f"⚡ Using snapshot {snapshot_path}")
+                index = map_snapshot(snapshot_path, header)
+                source = header["source"]
+                if source["mtime_ns"] != os.stat(csv_path).st_mtime_ns:
+                    # Same content, new mtime: record it so later starts skip hashing
+                    write_snapshot(index, snapshot_path, header["schema"],
+                                   source_fingerprint(csv_path, source["sha256"]))
+                    index = map_snapshot(snapshot_path)
+                return index
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable snapshot {snapshot_path}: {e}")
+
+    print(f"🔨 Building snapshot for {csv_path}")
+    try:
+        build_snapshot(csv_path, schema, snapshot_dir, codes, workers)
+    except PermissionError as e:
+        print(f"⚠️ Could not write snapshot ({e}), keeping index in memory")
+        return PriceIndex.from_entries(*read_entries(csv_path, schema, codes, workers))
+    return map_snapshot(snapshot_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python chargemaster.py REGISTRY_JSON [SNAPSHOT_DIR]")
+        sys.exit(1)
+    for hospital in load_registry(sys.argv[1]):
+        path = build_snapshot(hospital["csv"], hospital,
+                              sys.argv[2] if len(sys.argv) == 3 else None)
+        index = map_snapshot(path)
+        print(f"✅ {hospital['name']}: wrote {len(index)} procedures to {path} "
+              f"({index.stats['rows']} rows, {index.stats['malformed_rows']} malformed)")
@@ -0,0 +1,188 @@
+"""
+Parallel chargemaster ingestion
+===============================
+
+Price-transparency CSVs can run to several GB. `ingest_csv` splits the data
+section into byte-range chunks and parses them in a process pool; each
+worker streams its chunk line by line and keeps only the code and charge
+columns the hospital schema needs (optionally only the codes in `codes`),
+so memory is bounded by the number of distinct codes, not the file size.
+
+Chunk boundaries are placed on record boundaries: `plan_chunks` makes one
+sequential pass counting quote characters, and only splits at a newline
+outside a quoted field. A record whose quoted field contains newlines is
+therefore never split between two workers. This assumes RFC 4180 quoting
+(a '"' inside a field is doubled and the field is quoted); a stray quote
+only makes the chunks fewer and larger, not the parse wrong.
+"""
+
+import csv
+import os
+import time
+from multiprocessing import Pool
+
+CHUNK_BYTES = 64 * 1024 * 1024
+SCAN_BYTES = 1024 * 1024  # read size of the boundary scan
+CSV_ENCODING = "utf-8"
+
+# Charge columns used when a hospital schema does not override them
+DEFAULT_COLUMNS = {
+    "min": "standard_charge|min",
+    "max": "standard_charge|max",
+    "gross": "standard_charge|gross",
+    "discounted": "standard_charge|discounted_cash",
+    "setting": "setting",
+}
+
+
+def parse_charge(value):
+    """Parse a chargemaster money cell ('"1,234.50"', '', None) into a float"""
+    value = (value or '').replace('"', '').replace(',', '').strip()
+    return float(value) if value else 0.0
+
+
+def clean_cell(value):
+    return (value or '').strip().replace('"', '')
+
+
+def read_header(csv_path, metadata_lines):
+    """Return (fieldnames, byte offset of the first data line)"""
+    with open(csv_path, "rb") as f:
+        for _ in range(metadata_lines):
+            f.readline()  # Skip metadata
+        header_line = f.readline().decode(CSV_ENCODING, errors="replace")
+        fieldnames = next(csv.reader([header_line]), [])
+        return fieldnames, f.tell()
+
+
+def plan_chunks(csv_path, data_start, file_size, chunk_bytes=CHUNK_BYTES):
+    """Split [data_start, file_size) into byte ranges of about chunk_bytes,
+    each starting right after a newline that is outside quotes"""
+    chunk_bytes = max(1, chunk_bytes)
+    bounds, target, in_quotes = [data_start], data_start + chunk_bytes, False
+    with open(csv_path, "rb") as f:
+        f.seek(data_start)
+        offset = data_start
+        while target < file_size:
+            block = f.read(SCAN_BYTES)
+            if not block:
+                break
+            pos = 0
+            while offset + len(block) > target:
+                # Quote parity up to the target, then walk newlines after it
+                start = max(pos, target - offset)
+                in_quotes ^= block.count(b'"', pos, start) % 2 == 1
+                newline = block.find(b"\n", start)
+                if newline < 0:
+                    pos = start
+                    break
+                in_quotes ^= block.count(b'"', start, newline) % 2 == 1
+                pos = newline + 1
+                if not in_quotes:
+                    bounds.append(offset + pos)
+                    target = offset + pos + chunk_bytes
+            in_quotes ^= block.count(b'"', pos) % 2 == 1
+            offset += len(block)
+    if bounds[-1] < file_size:
+        bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _chunk_lines(f, start, end):
+    """Yield decoded lines of [start, end), which starts on a record boundary"""
+    f.seek(start)
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line.decode(CSV_ENCODING, errors="replace")
+
+
+def parse_chunk(task):
+    """Worker: parse one byte range into {code: entry} plus row counts"""
+    csv_path, start, end, fieldnames, schema, codes = task
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    columns = {**DEFAULT_COLUMNS, **schema.get("columns", {})}
+    charge_idx = [positions.get(columns[key])
+                  for key in ("min", "max", "gross", "discounted")]
+    setting_idx = positions.get(columns["setting"])
+    code_specs = [(positions.get(spec["column"]),
+                   positions.get(spec.get("type_column")),
+                   set(spec.get("types", ())))
+                  for spec in schema["codes"]]
+    keep_last = schema.get("duplicates", "first") == "last"
+
+    def cell(row, i):
+        return row[i] if i is not None and i < len(row) else None
+
+    entries, rows, malformed = {}, 0, 0
+    with open(csv_path, "rb") as f:
+        for row in csv.reader(_chunk_lines(f, start, end)):
+            if not row:
+                continue
+            rows += 1
+            if len(row) != len(fieldnames):
+                malformed += 1  # cells would be misaligned with the header
+                continue
+            bad = False
+            for code_i, type_i, types in code_specs:
+                if type_i is not None and clean_cell(cell(row, type_i)) not in types:
+                    continue
+                code = clean_cell(cell(row, code_i))
+                if not code or (codes is not None and code not in codes):
+                    continue
+                if not keep_last and code in entries:
+                    continue
+                try:
+                    charges = [parse_charge(cell(row, i)) for i in charge_idx]
+                except ValueError:
+                    bad = True
+                    break
+                entries[code] = (code, *charges, clean_cell(cell(row, setting_idx)))
+            malformed += bad
+    return entries, rows, malformed
+
+
+def ingest_csv(csv_path, schema, codes=None, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Parse a chargemaster CSV into (entries, stats).
+
+    `entries` is a list of (code, min, max, gross, discounted, setting)
+    tuples in file order with the schema's duplicate rule applied, `stats`
+    counts rows, malformed rows and chunks. `codes`, if given, restricts
+    the result to those procedure codes.
+    """
+    started = time.time()
+    fieldnames, data_start = read_header(csv_path, schema.get("metadata_lines", 2))
+    chunks = plan_chunks(csv_path, data_start, os.path.getsize(csv_path), chunk_bytes)
+    codes = frozenset(codes) if codes is not None else None
+    tasks = [(csv_path, start, end, fieldnames, schema, codes)
+             for start, end in chunks]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    keep_last = schema.get("duplicates", "first") == "last"
+
+    merged, rows, malformed = {}, 0, 0
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap(parse_chunk, tasks) if pool else map(parse_chunk, tasks)
+        # imap yields in chunk order, so duplicate rules hold across chunks
+        for n, (entries, chunk_rows, chunk_malformed) in enumerate(results, 1):
+            for code, entry in entries.items():
+                if keep_last or code not in merged:
+                    merged[code] = entry
+            rows += chunk_rows
+            malformed += chunk_malformed
+            if len(tasks) > 1:
+                print(f"  📦 {os.path.basename(csv_path)} chunk {n}/{len(tasks)}: "
+                      f"{chunk_rows} rows, {len(entries)} codes, {chunk_malformed} malformed")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    stats = {
+        "rows": rows,
+        "malformed_rows": malformed,
+        "chunks": len(tasks),
+        "seconds": round(time.time() - started, 2),
+    }
+    return list(merged.values()), stats
@@ -0,0 +1,203 @@
+"""
+Model lifecycle for the prediction services
+===========================================
+
+A ModelManager owns the Deployment currently serving traffic: the weights
+path and version, the micro-batcher over its replicas and its prediction
+cache.
+
+  - The first load runs on a background thread. /health (liveness) answers
+    right away, and /ready (readiness) turns 200 once a model is loaded.
+    Until then, requests get ModelNotReady (503 + Retry-After).
+  - Every load warms up each replica on dummy batches before it takes
+    traffic. Allocator, thread-pool and graph setup happen there, not on
+    the first real request.
+  - The weights file is polled every `watch_seconds`. Once a change has
+    stopped changing (same size/mtime on two polls), the new weights are
+    loaded and warmed up next to the old ones. Then they are swapped in
+    with one reference assignment. Requests already queued on the old
+    model finish there before its batcher shuts down.
+  - POST /reload loads on a background thread too, and only with the
+    service's reload token and a weights file inside its weights directory
+    (see reload_authorized() and weights_file()).
+  - A failed load keeps the current model and shows up in status().
+"""
+
+import hmac
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from batching import BatcherClosed
+
+WARMUP_ROUNDS = 2
+
+
+class ModelNotReady(Exception):
+    def __init__(self, retry_after=5):
+        super().__init__(f"Model is still loading, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Deployment:
+    """One loaded model version and everything derived from it"""
+
+    def __init__(self, path, batcher, cache, **extras):
+        self.path = path
+        self.batcher = batcher
+        self.cache = cache
+        self.extras = extras
+        self.loaded_at = datetime.now(timezone.utc)
+        self.load_seconds = 0.0
+
+    def close(self):
+        self.batcher.close()
+
+
+def warm_up(runners, dummy, max_batch_size, rounds=WARMUP_ROUNDS):
+    """Run full and single-image dummy batches through every replica"""
+    for run_batch in runners:
+        for _ in range(rounds):
+            run_batch([dummy] * max_batch_size)
+            run_batch([dummy])
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+def reload_authorized(authorization, token):
+    """True if an Authorization header is "Bearer <token>". Reloads are
+    disabled (always False) while no token is configured."""
+    if not token:
+        return False
+    scheme, _, value = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(value.strip().encode(), token.encode())
+
+
+def weights_file(path, weights_dir):
+    """Real path of `path` (relative to weights_dir, or absolute) if it is an
+    existing file inside weights_dir, else None"""
+    root = os.path.realpath(weights_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or not os.path.isfile(resolved):
+        return None
+    return resolved
+
+
+class ModelManager:
+    def __init__(self, load, path, watch_seconds=10, name="model"):
+        self.load = load  # load(path) -> warmed-up Deployment
+        self.path = path
+        self.watch_seconds = watch_seconds  # 0 = never poll the weights file
+        self.name = name
+        self.deployment = None
+        self.state = "loading"
+        self.last_error = None
+        self.swaps = 0
+        self.attempted_stamp = None
+        self.load_lock = threading.Lock()  # one load at a time
+
+    def start(self, background=True):
+        """Load the first model (on a thread unless `background` is False)
+        and start watching the weights file"""
+        if background:
+            threading.Thread(target=self._run, name=f"{self.name}-manager", daemon=True).start()
+        else:
+            self._load(self.path)
+            threading.Thread(target=self._watch, name=f"{self.name}-watcher", daemon=True).start()
+
+    def current(self):
+        deployment = self.deployment
+        if deployment is None:
+            raise ModelNotReady()
+        return deployment
+
+    def run(self, fn, attempts=3):
+        """fn(deployment); retried on the new deployment if a swap closes
+        the old batcher mid-call"""
+        for _ in range(attempts):
+            try:
+                return fn(self.current())
+            except BatcherClosed:
+                continue
+        raise ModelNotReady(1)
+
+    def reload(self, path=None):
+        """Load `path` (default: the current weights file) and swap it in;
+        returns True on success"""
+        return self._load(path or self.path)
+
+    def reload_in_background(self, path=None):
+        """Start reload(path) on a background thread; returns False if a load
+        is already running. The outcome shows up in status()."""
+        if self.load_lock.locked():
+            return False
+        threading.Thread(target=self._load, args=(path or self.path,),
+                         name=f"{self.name}-reload", daemon=True).start()
+        return True
+
+    def _load(self, path):
+        with self.load_lock:
+            stamp = file_stamp(path)
+            started = time.monotonic()
+            print(f"🔄 Loading {self.name} from {path}")
+            try:
+                deployment = self.load(path)
+            except Exception as e:
+                if path == self.path:
+                    self.attempted_stamp = stamp  # don't retry until the file changes again
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.deployment is None:
+                    self.state = "failed"
+                print(f"❌ Could not load {self.name} from {path}: {self.last_error}")
+                return False
+
+            deployment.load_seconds = time.monotonic() - started
+            old, self.deployment = self.deployment, deployment
+            self.path, self.attempted_stamp = path, stamp
+            self.state, self.last_error = "ready", None
+            if old is not None:
+                self.swaps += 1
+                old.close()
+            print(f"✅ {self.name} ready ({path}, {deployment.load_seconds:.1f}s incl. warm-up)")
+            return True
+
+    def _run(self):
+        self._load(self.path)
+        self._watch()
+
+    def _watch(self):
+        if not self.watch_seconds:
+            return
+        previous = self.attempted_stamp
+        while True:
+            time.sleep(self.watch_seconds)
+            stamp = file_stamp(self.path)
+            # Reload once a new file has stopped changing between two polls
+            if stamp and stamp != self.attempted_stamp and stamp == previous:
+                self._load(self.path)
+            previous = stamp
+
+    def status(self):
+        deployment = self.deployment
+        status = {
+            "state": self.state,
+            "loading": self.load_lock.locked(),
+            "ready": deployment is not None,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+            "watch_seconds": self.watch_seconds,
+        }
+        if deployment is not None:
+            status.update({
+                "path": deployment.path,
+                "version": deployment.cache.model_version,
+                "loaded_at": deployment.loaded_at.isoformat(),
+                "load_seconds": round(deployment.load_seconds, 2),
+            })
+        return status
@@ -0,0 +1,115 @@
+"""
+Content-addressed prediction cache for the classifier services
+==============================================================
+
+Re-uploads of the same photo (retries, page refreshes, the same image sent
+to several endpoints) are answered from a cache keyed by
+sha256(model version + uploaded bytes). A hit skips decoding and inference.
+
+The in-memory tier is an LRU bounded by entry count and by the JSON size
+of the cached values. An optional on-disk tier (one small JSON file per
+key) survives restarts and is shared by every worker on the host.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def file_version(path, chunk_size=1 << 20):
+    """Short content hash of a weights file, used as the model version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    def __init__(self, model_version, max_entries=10000, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key(self, data):
+        return hashlib.sha256(self.model_version.encode() + b"\0" + data).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key)) as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                pass
+            else:
+                with self.lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        encoded = self._remember(key, value)
+        if self.disk_dir:
+            # Best effort: a full or read-only disk only loses the disk tier
+            try:
+                path = self._disk_path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    f.write(encoded)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Could not write prediction cache entry: {e}")
+
+    def _remember(self, key, value):
+        encoded = json.dumps(value)
+        size = len(encoded)
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+        return encoded
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+            }
@@ -0,0 +1,65 @@
+"""
+Fast image decoding and preprocessing shared by the prediction services
+=======================================================================
+
+Phone photos are often 12 MP, but the models only see 224x224. Instead of
+fully decoding and then shrinking them:
+
+  - `open_image` asks the JPEG decoder for a DCT-scaled draft (1/2, 1/4 or
+    1/8 size) that is still at least `min_size` on both sides, so most of
+    the pixels are never decoded.
+  - `decode_image` resizes that draft straight to the model input size and
+    returns uint8 HWC pixels (this runs on the request threads).
+  - `Normalizer` turns a batch of uint8 images into normalized float32 NCHW
+    in one pass per channel via a 256-entry lookup table. It writes into a
+    buffer preallocated for the largest batch, so no per-request tensors
+    are allocated.
+"""
+
+import io
+import numpy as np
+from PIL import Image
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def open_image(data, min_size):
+    """Open uploaded bytes as an RGB PIL image, using JPEG draft mode when
+    the photo is larger than needed"""
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("RGB", (min_size, min_size))
+    return image.convert("RGB")
+
+
+def decode_image(data, size=224):
+    """Uploaded bytes -> (size, size, 3) uint8 array, resized like
+    transforms.Resize((size, size))"""
+    image = open_image(data, size)
+    if image.size != (size, size):
+        image = image.resize((size, size), Image.BILINEAR)
+    return np.asarray(image, dtype=np.uint8)
+
+
+class Normalizer:
+    """Fused uint8 HWC -> normalized float32 NCHW into a reused buffer.
+
+    Not thread-safe: each batch overwrites the same buffer, so use one
+    Normalizer per inference worker.
+    """
+
+    def __init__(self, max_batch_size, size=224, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        levels = np.arange(256, dtype=np.float32) / 255
+        self.lut = np.stack([(levels - m) / s for m, s in zip(mean, std)]).astype(np.float32)
+        self.buffer = np.empty((max_batch_size, 3, size, size), dtype=np.float32)
+
+    def __call__(self, images):
+        """Normalize a list of uint8 HWC arrays; returns a view of the buffer"""
+        if len(images) > len(self.buffer):
+            self.buffer = np.empty((len(images),) + self.buffer.shape[1:], dtype=np.float32)
+        batch = self.buffer[:len(images)]
+        for i, pixels in enumerate(images):
+            for c in range(3):
+                np.take(self.lut[c], pixels[:, :, c], out=batch[i, c])
+        return batch
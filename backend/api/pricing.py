@@ -1,6 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from datetime import datetime, timezone
 import csv
+import hashlib
+import json
 import os
+import re
+import threading
+import time
+import numpy as np
+from chargemaster import PriceIndex, load_chargemaster, load_registry
 
 app = Flask(__name__)
 
@@ -12,64 +20,15 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, Last-Modified'
     return response
 
 
-# Get the CSV file paths (handle both relative and absolute paths)
-barnes_csv = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/barnes_procedures.csv"
-lincoln_csv = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/lincoln_procedures.csv"
-
-# Load procedures from both hospitals
-PROCEDURES_DB = {
-    "barnes_jewish": {},
-    "lincoln": {}
-}
-
-# Load Barnes Jewish data
-print(f"📂 Loading Barnes Jewish procedures from: {barnes_csv}")
-try:
-    with open(barnes_csv) as f:
-        f.readline()  # Skip metadata
-        f.readline()
-        reader = csv.DictReader(f)
-        for row in reader:
-            code = row.get('code|1', '').strip()
-            if code:
-                PROCEDURES_DB["barnes_jewish"][code] = row
-    print(
-        f"✅ Loaded {len(PROCEDURES_DB['barnes_jewish'])} procedures from Barnes Jewish\n")
-except Exception as e:
-    print(f"❌ Error loading Barnes Jewish CSV: {e}")
-
-# Load Lincoln data (different structure: CPT codes in code|2, DRG in code|1)
-print(f"📂 Loading Lincoln procedures from: {lincoln_csv}")
-try:
-    with open(lincoln_csv) as f:
-        f.readline()  # Skip metadata
-        f.readline()
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            # Lincoln has CPT codes in code|2 and DRG codes in code|1
-            code_type_1 = row.get('code|1|type', '').strip().replace('"', '')
-            code_type_2 = row.get('code|2|type', '').strip().replace('"', '')
-
-            # Get DRG codes from code|1
-            if code_type_1 == 'DRG':
-                code = row.get('code|1', '').strip().replace('"', '')
-                if code and code not in PROCEDURES_DB["lincoln"]:
-                    PROCEDURES_DB["lincoln"][code] = row
-
-            # Get CPT codes from code|2
-            if code_type_2 == 'CPT':
-                code = row.get('code|2', '').strip().replace('"', '')
-                if code and code not in PROCEDURES_DB["lincoln"]:
-                    PROCEDURES_DB["lincoln"][code] = row
-
-    print(
-        f"✅ Loaded {len(PROCEDURES_DB['lincoln'])} procedures from Lincoln\n")
-except Exception as e:
-    print(f"❌ Error loading Lincoln CSV: {e}")
+# Hospital registry: one entry (display info + CSV column schema) per hospital
+REGISTRY_PATH = os.environ.get(
+    "HOSPITAL_REGISTRY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospitals.json"))
+HOSPITALS = {h["id"]: h for h in load_registry(REGISTRY_PATH)}
+DEFAULT_HOSPITAL = next(iter(HOSPITALS))
 
 # All 7 wound types from Finn's model with verified procedure codes
 WOUND_PROCEDURE_MAPPING = {
@@ -113,104 +72,193 @@ WOUND_PROCEDURE_MAPPING = {
 }
 
 
-def get_pricing_for_hospital(hospital, wound_type):
+def wound_type_key(name):
+    """Case/separator-insensitive key, so the classifiers' "Foot_ulcer" finds
+    "Foot-ulcer" here"""
+    return re.sub(r"[\s_-]+", "_", name.strip().lower())
+
+
+WOUND_TYPE_ALIASES = {wound_type_key(wt): wt for wt in WOUND_PROCEDURE_MAPPING}
+
+
+def canonical_wound_type(name):
+    """WOUND_PROCEDURE_MAPPING key for a wound-type name, or None if unknown"""
+    return WOUND_TYPE_ALIASES.get(wound_type_key(name))
+
+
+def mapped_codes():
+    return sorted({proc["code"] for procs in WOUND_PROCEDURE_MAPPING.values()
+                   for proc in procs})
+
+
+MAPPED_CODES = mapped_codes()
+
+# Binary snapshots are written next to each CSV unless a directory is given
+SNAPSHOT_DIR = None
+# Ingestion process pool size (None = all cores)
+INGEST_WORKERS = None
+# Index only the codes WOUND_PROCEDURE_MAPPING uses (smaller snapshots for
+# multi-GB chargemasters, but /health then counts only those codes)
+INDEX_MAPPED_CODES_ONLY = False
+
+
+def load_hospital(hospital_id):
+    """Load one registered hospital's chargemaster into a PriceIndex (None on error)"""
+    hospital = HOSPITALS[hospital_id]
+    print(f"📂 Loading {hospital['name']} procedures from: {hospital['csv']}")
+    try:
+        index = load_chargemaster(
+            hospital["csv"], hospital, SNAPSHOT_DIR,
+            codes=MAPPED_CODES if INDEX_MAPPED_CODES_ONLY else None,
+            workers=INGEST_WORKERS)
+        if not len(index):
+            raise ValueError("no procedures found (wrong schema or truncated file?)")
+        print(
+            f"✅ Loaded {len(index)} procedures from {hospital['name']}"
+            f" ({index.stats.get('malformed_rows', 0)} malformed rows skipped)\n")
+        return index
+    except (OSError, csv.Error, ValueError) as e:
+        print(f"❌ Error loading {hospital['name']} CSV: {e}")
+        return None
+
+
+def load_procedures():
+    """Load every registered hospital's chargemaster ({id: index or None})"""
+    return {hospital_id: load_hospital(hospital_id) for hospital_id in HOSPITALS}
+
+
+def build_estimate_matrix(procedures_db, code_columns):
+    """Price matrix for every code the mapping can ask for: one row per
+    hospital, one column per code, NaN where a hospital does not bill that
+    code. Ranking hospitals for a wound type is then a column slice and a
+    row sum."""
+    matrix = np.full((len(HOSPITAL_IDS), len(code_columns)), np.nan)
+    for i, hospital_id in enumerate(HOSPITAL_IDS):
+        index = procedures_db[hospital_id]
+        for code, j in code_columns.items():
+            row = index.offsets.get(code)
+            if row is not None:
+                matrix[i, j] = index.estimate[row]
+    return matrix
+
+
+HOSPITAL_IDS = list(HOSPITALS)
+HOSPITAL_ROWS = {hospital_id: i for i, hospital_id in enumerate(HOSPITAL_IDS)}
+
+
+class PricingData:
+    """Everything the responses are derived from, as one snapshot.
+
+    Never mutated after construction, apart from the memo of serialized
+    `responses`: a reload builds a new PricingData and publishes it with a
+    single assignment to DATA, so a request that reads DATA once sees one
+    consistent set of indexes, matrix and generation. Responses are
+    memoized on the snapshot, so a replaced snapshot (index, mmap and
+    responses) is freed as soon as no request holds it.
+    """
+
+    def __init__(self, procedures_db, source_stamps):
+        self.procedures_db = procedures_db
+        self.source_stamps = source_stamps
+        self.mapped_codes = mapped_codes()
+        self.code_columns = {code: j for j, code in enumerate(self.mapped_codes)}
+        self.estimate_matrix = build_estimate_matrix(procedures_db, self.code_columns)
+        self.generation = data_generation(source_stamps)
+        self.last_modified = last_modified(source_stamps)
+        self.responses = {}  # (kind, wound_type, hospitals) -> (body, etag)
+
+
+def get_pricing_for_hospital(data, hospital, wound_type):
     """Get pricing for a specific hospital and wound type"""
     procedures = []
-    hospital_db = PROCEDURES_DB.get(hospital, {})
+    hospital_db = data.procedures_db.get(hospital)
+    if hospital_db is None:
+        return procedures
 
     for proc in WOUND_PROCEDURE_MAPPING[wound_type]:
-        code = proc["code"]
-        if code in hospital_db:
-            row = hospital_db[code]
-
-            # Extract pricing (handle different formats)
-            min_p = float(row.get('standard_charge|min', 0) or 0)
-            max_p = float(row.get('standard_charge|max', 0) or 0)
-
-            # Lincoln might have gross/discounted instead
-            if min_p == 0 and max_p == 0:
-                gross = float(row.get('standard_charge|gross',
-                              '').replace('"', '') or 0)
-                discounted = float(
-                    row.get('standard_charge|discounted_cash', '').replace('"', '') or 0)
-                if gross > 0 or discounted > 0:
-                    min_p = min(gross, discounted) if discounted > 0 else gross
-                    max_p = max(gross, discounted) if discounted > 0 else gross
-
-            if min_p > 0 or max_p > 0:
-                procedures.append({
-                    "code": code,
-                    "name": proc["name"],
-                    "pricing": {
-                        "min": round(min_p, 2),
-                        "max": round(max_p, 2),
-                        "estimate": round((min_p + max_p) / 2, 2),
-                        "setting": row.get('setting', '').replace('"', '') or 'unknown'
-                    }
-                })
+        pricing = hospital_db.pricing(proc["code"])
+        if pricing is not None:
+            procedures.append({
+                "code": proc["code"],
+                "name": proc["name"],
+                "pricing": pricing
+            })
 
     return procedures
 
 
-@app.route("/api/pricing", methods=["GET"])
-def get_pricing():
-    """Get pricing for a specific wound type from Barnes Jewish (backward compatible)"""
-    wound_type = request.args.get("wound_type", "").strip()
+def rank_hospitals(data, hospital_ids, wound_type):
+    """Total estimates, procedure counts and cheapest-first order for a wound type"""
+    columns = [data.code_columns[proc["code"]]
+               for proc in WOUND_PROCEDURE_MAPPING[wound_type]]
+    prices = data.estimate_matrix[np.ix_([HOSPITAL_ROWS[h] for h in hospital_ids], columns)]
+    counts = np.count_nonzero(~np.isnan(prices), axis=1)
+    totals = np.nansum(prices, axis=1)
+    # Hospitals that bill none of the procedures go last
+    order = np.lexsort((totals, counts == 0))
+    return totals, counts, order
 
-    if not wound_type or wound_type not in WOUND_PROCEDURE_MAPPING:
-        return {"error": f"Unknown wound: {wound_type}"}, 404
 
-    procedures = get_pricing_for_hospital("barnes_jewish", wound_type)
+def parse_hospital_ids(value):
+    """Parse the optional ?hospitals=a,b,c filter; None if an id is unknown"""
+    if not value:
+        return HOSPITAL_IDS
+    hospital_ids = [h.strip() for h in value.split(",") if h.strip()]
+    if not hospital_ids or any(h not in HOSPITALS for h in hospital_ids):
+        return None
+    return list(dict.fromkeys(hospital_ids))
+
+
+def build_pricing_result(wound_type, hospital_id, data=None):
+    data = data or DATA
+    procedures = get_pricing_for_hospital(data, hospital_id, wound_type)
 
     return {
         "wound_type": wound_type,
         "procedures": procedures,
-        "hospital": "Barnes Jewish St. Peters Hospital",
-        "location": "St. Peters, MO",
+        "hospital": HOSPITALS[hospital_id]["name"],
+        "location": HOSPITALS[hospital_id]["location"],
         "count": len(procedures)
     }
 
 
-@app.route("/api/pricing/compare", methods=["GET"])
-def compare_pricing():
-    """Compare pricing between Barnes Jewish and Lincoln hospitals"""
-    wound_type = request.args.get("wound_type", "").strip()
-
-    if not wound_type or wound_type not in WOUND_PROCEDURE_MAPPING:
-        return {"error": f"Unknown wound: {wound_type}"}, 404
-
-    # Get pricing from both hospitals
-    barnes_procedures = get_pricing_for_hospital("barnes_jewish", wound_type)
-    lincoln_procedures = get_pricing_for_hospital("lincoln", wound_type)
-
-    # Calculate total estimates
-    barnes_total = sum(p['pricing']['estimate'] for p in barnes_procedures)
-    lincoln_total = sum(p['pricing']['estimate'] for p in lincoln_procedures)
-
-    # Calculate savings
-    savings_amount = barnes_total - lincoln_total
+def build_compare_result(wound_type, hospital_ids, data=None):
+    data = data or DATA
+    totals, counts, order = rank_hospitals(data, hospital_ids, wound_type)
+    ranks = np.empty(len(order), dtype=int)
+    ranks[order] = np.arange(1, len(order) + 1)
+
+    comparison = []
+    for i, hospital_id in enumerate(hospital_ids):
+        hospital = HOSPITALS[hospital_id]
+        comparison.append({
+            "id": hospital_id,
+            "hospital": hospital["name"],
+            "location": hospital["location"],
+            "procedures": get_pricing_for_hospital(data, hospital_id, wound_type),
+            "total_estimate": round(float(totals[i]), 2),
+            "procedure_count": int(counts[i]),
+            "rank": int(ranks[i])
+        })
+
+    # Calculate savings: first hospital vs. the cheapest other one that
+    # prices anything (falling back to the next hospital)
+    baseline_total = float(totals[0])
+    others = [i for i in order if i != 0 and counts[i] > 0] or list(range(1, len(hospital_ids)))
+    if others:
+        other = others[0]
+        savings_amount = baseline_total - float(totals[other])
+        cheaper = other if savings_amount > 0 else 0
+    else:
+        savings_amount, cheaper = 0.0, 0
     savings_percentage = (abs(savings_amount) /
-                          barnes_total * 100) if barnes_total > 0 else 0
-    cheaper_hospital = "Lincoln" if savings_amount > 0 else "Barnes Jewish"
+                          baseline_total * 100) if baseline_total > 0 else 0
+    cheaper_hospital = HOSPITALS[hospital_ids[cheaper]]["short_name"]
 
     return {
         "wound_type": wound_type,
-        "comparison": [
-            {
-                "hospital": "Barnes Jewish St. Peters Hospital",
-                "location": "St. Peters, MO",
-                "procedures": barnes_procedures,
-                "total_estimate": round(barnes_total, 2),
-                "procedure_count": len(barnes_procedures)
-            },
-            {
-                "hospital": "Mercy Hospital Lincoln",
-                "location": "Troy, MO",
-                "procedures": lincoln_procedures,
-                "total_estimate": round(lincoln_total, 2),
-                "procedure_count": len(lincoln_procedures)
-            }
-        ],
+        "comparison": comparison,
+        "ranking": [hospital_ids[i] for i in order],
         "savings": {
             "amount": round(abs(savings_amount), 2),
             "percentage": round(savings_percentage, 1),
@@ -220,6 +268,195 @@ def compare_pricing():
     }
 
 
+# ------------------------------
+# Materialized results
+# ------------------------------
+# Responses depend only on (wound_type, hospitals) and the loaded data, so
+# they are serialized once per data snapshot and served as bytes with an
+# ETag. A background thread re-checks the CSVs every RELOAD_CHECK_SECONDS
+# and re-ingests a changed one once its size and mtime have stayed the same
+# for a whole check interval (so a file still being copied is not loaded
+# half-written). Requests never wait for ingestion. If a CSV fails to load,
+# the previous prices and stamp stay in place until the file changes again.
+# The watcher (and its multi-process ingest) must run in one process only:
+# `python pricing.py` and serve.py start it via start_background_tasks().
+# Under a pre-forking server (gunicorn -w N), no worker starts it; restart
+# the workers to pick up new chargemasters.
+RELOAD_CHECK_SECONDS = 30
+PRICE_TABLE_SIZE = 4096
+CACHE_CONTROL = "public, no-cache"
+
+_seen_stamps = {}  # hospital id -> stamp at the previous check
+_failed_stamps = {}  # hospital id -> stamp of a CSV that failed to load
+
+
+def index_stamp(index, hospital_id):
+    """(size, mtime_ns) a loaded index was built from, or of the CSV now"""
+    if index is not None and index.source:
+        return index.source["size"], index.source["mtime_ns"]
+    return current_stamp(hospital_id)
+
+
+def current_stamp(hospital_id):
+    try:
+        stat = os.stat(HOSPITALS[hospital_id]["csv"])
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+def data_generation(source_stamps):
+    """Fingerprint of everything the pricing responses are derived from"""
+    digest = hashlib.sha1(json.dumps(WOUND_PROCEDURE_MAPPING, sort_keys=True).encode())
+    for hospital_id in HOSPITAL_IDS:
+        digest.update(repr((hospital_id, source_stamps[hospital_id])).encode())
+    return digest.hexdigest()
+
+
+def last_modified(source_stamps):
+    mtimes = [stamp[1] for stamp in source_stamps.values() if stamp]
+    return datetime.fromtimestamp(max(mtimes) / 1e9 if mtimes else 0, timezone.utc)
+
+
+def materialize(kind, wound_type, hospitals, data):
+    """Serialized response body and ETag, memoized on the data snapshot
+    (up to PRICE_TABLE_SIZE responses; the rest are built per request)"""
+    key = (kind, wound_type, hospitals)
+    cached = data.responses.get(key)
+    if cached is None:
+        if kind == "pricing":
+            result = build_pricing_result(wound_type, hospitals[0], data)
+        else:
+            result = build_compare_result(wound_type, list(hospitals), data)
+        body = app.json.dumps(result).encode()
+        cached = body, hashlib.sha1(body).hexdigest()
+        if len(data.responses) < PRICE_TABLE_SIZE:
+            data.responses[key] = cached
+    return cached
+
+
+def prebuild_price_table(data):
+    """Materialize the default responses for every wound type"""
+    for wound_type in WOUND_PROCEDURE_MAPPING:
+        for hospital_id in HOSPITAL_IDS:
+            materialize("pricing", wound_type, (hospital_id,), data)
+        materialize("compare", wound_type, tuple(HOSPITAL_IDS), data)
+
+
+def initial_data():
+    procedures_db = load_procedures()
+    stamps = {hospital_id: index_stamp(index, hospital_id) if index is not None else None
+              for hospital_id, index in procedures_db.items()}
+    procedures_db = {hospital_id: index if index is not None else PriceIndex.from_entries([])
+                     for hospital_id, index in procedures_db.items()}
+    return PricingData(procedures_db, stamps)
+
+
+def refresh_data():
+    """Reload settled, changed chargemasters and publish a new snapshot"""
+    global DATA
+    data = DATA
+    procedures_db, stamps, changed = dict(data.procedures_db), dict(data.source_stamps), []
+    for hospital_id in HOSPITAL_IDS:
+        stamp = current_stamp(hospital_id)
+        previous, _seen_stamps[hospital_id] = _seen_stamps.get(hospital_id), stamp
+        if stamp is None or stamp == stamps[hospital_id] or stamp == _failed_stamps.get(hospital_id):
+            continue
+        if stamp != previous:
+            continue  # changed since the last check; wait until it settles
+        index = load_hospital(hospital_id)
+        if index is None:
+            _failed_stamps[hospital_id] = stamp
+            print(f"⚠️ Keeping the previous {hospital_id} prices until its CSV changes again")
+            continue
+        procedures_db[hospital_id], stamps[hospital_id] = index, index_stamp(index, hospital_id)
+        changed.append(hospital_id)
+
+    if not changed:
+        return
+    print(f"🔄 Pricing data changed ({', '.join(changed)}), rebuilding price table")
+    fresh = PricingData(procedures_db, stamps)
+    prebuild_price_table(fresh)
+    DATA = fresh  # one assignment publishes the whole snapshot
+
+
+def watch_data():
+    while True:
+        time.sleep(RELOAD_CHECK_SECONDS)
+        try:
+            refresh_data()
+        except Exception as e:  # keep watching; the current snapshot stays live
+            print(f"❌ Pricing data refresh failed: {e}")
+
+
+_watcher_started = threading.Event()
+
+
+def start_data_watcher():
+    """Start the reload thread (once per process)"""
+    if not _watcher_started.is_set():
+        _watcher_started.set()
+        threading.Thread(target=watch_data, name="pricing-reload", daemon=True).start()
+
+
+def start_background_tasks():
+    """Called once by whatever runs this app (serve.py, `python pricing.py`)"""
+    start_data_watcher()
+
+
+def cached_response(kind, wound_type, hospitals):
+    data = DATA
+    body, etag = materialize(kind, wound_type, hospitals, data)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = data.last_modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+# Ingestion workers re-import this module under spawn (macOS/Windows); only
+# the real process loads data.
+if __name__ != "__mp_main__":
+    DATA = initial_data()
+    prebuild_price_table(DATA)
+
+
+@app.route("/api/pricing", methods=["GET"])
+def get_pricing():
+    """Get pricing for a specific wound type from one hospital (Barnes Jewish by default)"""
+    wound_type = request.args.get("wound_type", "").strip()
+    hospital_id = request.args.get("hospital", DEFAULT_HOSPITAL).strip()
+
+    if not canonical_wound_type(wound_type):
+        return {"error": f"Unknown wound: {wound_type}"}, 404
+    wound_type = canonical_wound_type(wound_type)
+    if hospital_id not in HOSPITALS:
+        return {"error": f"Unknown hospital: {hospital_id}"}, 404
+
+    return cached_response("pricing", wound_type, (hospital_id,))
+
+
+@app.route("/api/pricing/compare", methods=["GET"])
+def compare_pricing():
+    """Compare pricing across hospitals (all registered ones by default).
+
+    `comparison` keeps the requested order; `ranking` lists hospital ids
+    cheapest first. Savings compare the first hospital with the cheapest
+    of the others.
+    """
+    wound_type = request.args.get("wound_type", "").strip()
+
+    if not canonical_wound_type(wound_type):
+        return {"error": f"Unknown wound: {wound_type}"}, 404
+    wound_type = canonical_wound_type(wound_type)
+
+    hospital_ids = parse_hospital_ids(request.args.get("hospitals", ""))
+    if hospital_ids is None:
+        return {"error": f"Unknown hospital in: {request.args.get('hospitals')}"}, 404
+
+    return cached_response("compare", wound_type, tuple(hospital_ids))
+
+
 @app.route("/api/wound-types", methods=["GET"])
 def get_wound_types():
     return {
@@ -233,17 +470,14 @@ def health_check():
     return {
         "status": "healthy",
         "hospitals": {
-            "barnes_jewish": {
-                "name": "Barnes Jewish St. Peters Hospital",
-                "procedures_loaded": len(PROCEDURES_DB.get("barnes_jewish", {}))
-            },
-            "lincoln": {
-                "name": "Mercy Hospital Lincoln",
-                "procedures_loaded": len(PROCEDURES_DB.get("lincoln", {}))
+            hospital_id: {
+                "name": hospital["name"],
+                "procedures_loaded": len(DATA.procedures_db.get(hospital_id, {}))
             }
+            for hospital_id, hospital in HOSPITALS.items()
         },
         "wound_types": len(WOUND_PROCEDURE_MAPPING),
-        "comparison_available": True
+        "comparison_available": len(HOSPITALS) > 1
     }
 
 
@@ -251,17 +485,16 @@ if __name__ == "__main__":
     print("="*80)
     print("🏥 HackWashU Backend - Multi-Hospital Pricing Comparison API")
     print("="*80)
-    print(f"\n🏥 Hospitals loaded:")
-    print(
-        f"  • Barnes Jewish St. Peters ({len(PROCEDURES_DB.get('barnes_jewish', {}))} procedures)")
-    print(
-        f"  • Mercy Hospital Lincoln ({len(PROCEDURES_DB.get('lincoln', {}))} procedures)")
+    print(f"\n🏥 Hospitals loaded ({len(HOSPITALS)}):")
+    for hospital_id, hospital in HOSPITALS.items():
+        print(
+            f"  • {hospital['name']} ({len(DATA.procedures_db.get(hospital_id, {}))} procedures)")
     print(f"\n💉 Supported wound types ({len(WOUND_PROCEDURE_MAPPING)}):")
     for wt in WOUND_PROCEDURE_MAPPING.keys():
         print(f"  • {wt}")
     print(f"\n📊 Available endpoints:")
-    print(f"  • GET /api/pricing?wound_type=Bruises")
-    print(f"  • GET /api/pricing/compare?wound_type=Burns  ← NEW! 🎯")
+    print(f"  • GET /api/pricing?wound_type=Bruises[&hospital=lincoln]")
+    print(f"  • GET /api/pricing/compare?wound_type=Burns[&hospitals=barnes_jewish,lincoln]  ← NEW! 🎯")
     print(f"  • GET /api/wound-types")
     print(f"  • GET /health")
     print(f"\n💡 Example comparison:")
@@ -269,4 +502,5 @@ if __name__ == "__main__":
     print(f"\n🚀 Starting server on http://localhost:5001")
     print("="*80 + "\n")
 
+    start_background_tasks()
     app.run(debug=False, port=5001)
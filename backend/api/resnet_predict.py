@@ -1,30 +1,18 @@
-from flask import Flask, request, jsonify
-from PIL import Image
-import io
+import os
+import numpy as np
 import torch
 import torch.nn as nn
-import torchvision.transforms as transforms
 from torchvision import models
-
-app = Flask(__name__)
+from prediction_cache import file_version
+from preprocess import Normalizer, decode_image
+from serving import BATCH_MAX_SIZE, ClassifierService, create_app, make_pin_worker
 
 # ------------------------------
-# 1. Allow CORS for frontend access
+# 1. Load ResNet101 model
 # ------------------------------
-
-
-@app.after_request
-def add_cors_headers(response):
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
-    return response
-
-
-# ------------------------------
-# 2. Load ResNet101 model
-# ------------------------------
-MODEL_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt"
+MODEL_PATH = os.environ.get(
+    "RESNET_MODEL_PATH",
+    "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt")
 NUM_CLASSES = 8
 
 classes = [
@@ -37,73 +25,137 @@ classes = [
     "Stab_wound"
 ]
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-model = models.resnet101(weights=None)
-model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
-model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-model.to(device)
-model.eval()
-
-print(f"✅ ResNet101 model loaded on {device.upper()}")
+# Inference backend: "eager" (state dict above), "torchscript", "onnx" or
+# "int8". The exported graphs are written next to MODEL_PATH by
+# src/classifier/ResNet/export.py and quantize.py; they are CPU-only here.
+BACKEND = os.environ.get("RESNET_BACKEND", "eager")
+TORCHSCRIPT_PATH = os.path.splitext(MODEL_PATH)[0] + ".torchscript.pt"
+ONNX_PATH = os.path.splitext(MODEL_PATH)[0] + ".onnx"
+QUANTIZED_PATH = os.path.splitext(MODEL_PATH)[0] + ".int8.pt"
+QUANTIZED_ENGINE = "x86"  # must match ENGINE in quantize.py
+BACKEND_PATHS = {"eager": MODEL_PATH, "torchscript": TORCHSCRIPT_PATH,
+                 "onnx": ONNX_PATH, "int8": QUANTIZED_PATH}
+INTRA_OP_THREADS = int(os.environ.get("RESNET_THREADS", os.cpu_count() or 1))
+
+# Model replicas, each with its own inference worker thread. torch's
+# intra-op thread count is process-wide, so it is set to RESNET_THREADS /
+# RESNET_REPLICAS for all of them: a cap on each op, not a partition of the
+# cores (ONNX sessions do get their own pool of that size). Only
+# RESNET_PIN_CORES=1 confines each replica's worker thread to its own cores.
+REPLICAS = int(os.environ.get("RESNET_REPLICAS", 1))
+THREADS_PER_REPLICA = max(1, INTRA_OP_THREADS // REPLICAS)
+PIN_CORES = os.environ.get("RESNET_PIN_CORES") == "1"
+
+device = "cuda" if torch.cuda.is_available() and BACKEND == "eager" else "cpu"
+if device == "cpu":
+    torch.set_num_threads(THREADS_PER_REPLICA)
+
+
+def load_model(backend, path):
+    """Return a callable mapping a (N, 3, 224, 224) batch to logits"""
+    if backend == "eager":
+        model = models.resnet101(weights=None)
+        model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
+        model.load_state_dict(torch.load(path, map_location=device))
+        model.to(device)
+        return model.eval()
+
+    if backend == "torchscript":
+        module = torch.jit.load(path, map_location=device).eval()
+        # Fold conv+bn and pick CPU-friendly kernels for the frozen graph
+        return torch.jit.optimize_for_inference(module)
+
+    if backend == "int8":
+        torch.backends.quantized.engine = QUANTIZED_ENGINE
+        return torch.jit.load(path, map_location="cpu").eval()
+
+    if backend == "onnx":
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = THREADS_PER_REPLICA
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"])
+
+        def forward(batch):
+            return torch.from_numpy(session.run(None, {"input": batch.numpy()})[0])
+        return forward
+
+    raise ValueError(f"Unknown RESNET_BACKEND: {backend}")
+
+
+print(f"🧠 ResNet101 on {device.upper()} "
+      f"({BACKEND}, {REPLICAS} replica(s) × {THREADS_PER_REPLICA} threads)")
 
 
 # ------------------------------
-# 3. Image transform (224×224)
+# 2. Image preprocessing (224×224)
 # ------------------------------
-transform = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(
-        mean=[0.485, 0.456, 0.406],
-        std=[0.229, 0.224, 0.225]
-    )
-])
+# Request threads decode uploads to 224×224 uint8 (JPEG draft mode skips
+# most of a large photo); the batch worker normalizes the whole batch into a
+# preallocated buffer. Same result as Resize((224, 224)) + ToTensor +
+# Normalize(ImageNet mean/std), up to JPEG draft-scaling differences.
+IMG_SIZE = 224
 
 
 # ------------------------------
-# 4. Define /predict endpoint
+# 3. Micro-batched inference
 # ------------------------------
-@app.route("/predict", methods=["POST"])
-def predict():
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-
-    file = request.files["file"]
-    image = Image.open(io.BytesIO(file.read())).convert("RGB")
-    input_tensor = transform(image).unsqueeze(0).to(device)
-
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        probs = torch.softmax(outputs, dim=1)
-        conf, pred_class = torch.max(probs, dim=1)
-
-    class_index = pred_class.item()
-    confidence = conf.item()
-    class_name = classes[class_index] if class_index < len(
+# Concurrent requests share one forward pass (see serving.py); once
+# RESNET_MAX_QUEUE images are waiting, new requests get 503 + Retry-After.
+MAX_TOP_K = 5
+
+
+def class_name(class_index):
+    return classes[class_index] if class_index < len(
         classes) else f"Unknown ({class_index})"
 
-    return jsonify({
-        "predicted_class": class_name,
-        "confidence": round(confidence, 3)
-    })
+
+def make_run_batch(model):
+    normalizer = Normalizer(BATCH_MAX_SIZE, IMG_SIZE)  # one buffer per replica
+
+    def run_batch(images):
+        """Forward a list of (224, 224, 3) uint8 arrays; returns, per image,
+        the top MAX_TOP_K (class_name, confidence) pairs, best first"""
+        input_tensor = torch.from_numpy(normalizer(images)).to(device)
+
+        with torch.no_grad():
+            outputs = model(input_tensor)
+            probs = torch.softmax(outputs, dim=1)
+            conf, pred_class = torch.topk(probs, min(MAX_TOP_K, probs.shape[1]), dim=1)
+
+        return [[(class_name(i), c) for i, c in zip(indices, confs)]
+                for indices, confs in zip(pred_class.tolist(), conf.tolist())]
+    return run_batch
 
 
 # ------------------------------
-# 5. Health check route
+# 4. Model lifecycle and routes
 # ------------------------------
-@app.route("/health", methods=["GET"])
-def health():
-    return jsonify({
-        "status": "healthy",
-        "model_path": MODEL_PATH,
-        "device": device
-    })
+# Weights load (and warm up) in the background; /ready turns 200 when done.
+# Rewriting the weights file, or POST /reload (needs RESNET_RELOAD_TOKEN),
+# swaps in a new model without dropping requests. RESNET_MODEL_LOADING=blocking
+# loads before import returns. The cache key includes the backend.
+def load_deployment(path):
+    runners = [make_run_batch(load_model(BACKEND, path)) for _ in range(REPLICAS)]
+    return service.deploy(path, runners, np.zeros((IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8),
+                          f"resnet-{BACKEND}-{file_version(path)}")
+
+
+service = ClassifierService("ResNet101", "RESNET", BACKEND_PATHS[BACKEND], load_deployment,
+                            lambda data: decode_image(data, IMG_SIZE), MAX_TOP_K,
+                            worker_init=make_pin_worker(device, THREADS_PER_REPLICA, PIN_CORES))
+service.start()
+manager = service.manager
+app = create_app(service, __name__, backend=BACKEND, replicas=REPLICAS, device=device)
 
 
 # ------------------------------
-# 6. Run the app
+# 5. Run the app
 # ------------------------------
+# Development server; for production use `python backend/api/serve.py resnet_predict`
 if __name__ == "__main__":
     print("🚀 Starting Flask ResNet101 Classification API on http://127.0.0.1:5005")
     app.run(host="0.0.0.0", port=5005, debug=False)
@@ -0,0 +1,69 @@
+"""
+Production serving for the prediction services
+==============================================
+
+`app.run()` is Flask's single-process development server. This runs the
+same Flask app behind uvicorn (ASGI):
+
+  - the event loop accepts connections and keeps idle keep-alive
+    connections without a thread;
+  - a2wsgi runs each whole Flask request on one of REQUEST_THREADS threads.
+    That includes reading and parsing the upload body, so a slow upload
+    holds its thread until the body is in; MAX_CONNECTIONS bounds how many
+    can be in flight;
+  - inference stays on the service's fixed pool of model replicas (see
+    RESNET_REPLICAS / YOLO_REPLICAS). Their intra-op thread cap is
+    process-wide; *_PIN_CORES=1 gives each replica its own cores;
+  - when the inference queue is full, requests get 503 + Retry-After
+    instead of piling up.
+
+Usage:
+    python backend/api/serve.py resnet_predict
+    RESNET_BACKEND=onnx RESNET_REPLICAS=2 python backend/api/serve.py resnet_predict
+    python backend/api/serve.py yolo_predict --port 5006
+
+Everything runs in one process, so all replicas share one prediction cache.
+To scale past one node, run one server per node behind a load balancer.
+"""
+
+import importlib
+import os
+import sys
+
+# ============== CONFIG ==============
+HOST = "0.0.0.0"
+PORT = 5005
+REQUEST_THREADS = int(os.environ.get("SERVE_REQUEST_THREADS", 32))
+MAX_CONNECTIONS = int(os.environ.get("SERVE_MAX_CONNECTIONS", 1024))  # more get 503
+KEEP_ALIVE_SECONDS = 5
+# ====================================
+
+
+def build_asgi_app(service):
+    """Import a Flask prediction service by module name and wrap it for ASGI"""
+    from a2wsgi import WSGIMiddleware
+    module = importlib.import_module(service)
+    if hasattr(module, "start_background_tasks"):
+        module.start_background_tasks()  # e.g. the pricing data watcher, once per server
+    return WSGIMiddleware(module.app, workers=REQUEST_THREADS)
+
+
+def main(argv):
+    import uvicorn
+
+    if not argv or argv[0].startswith("-"):
+        print("Usage: python serve.py SERVICE_MODULE [--port PORT]")
+        sys.exit(1)
+    service, port = argv[0], PORT
+    if "--port" in argv:
+        port = int(argv[argv.index("--port") + 1])
+
+    app = build_asgi_app(service)
+    print(f"🚀 Serving {service} on http://{HOST}:{port} "
+          f"(uvicorn, {REQUEST_THREADS} request threads)")
+    uvicorn.run(app, host=HOST, port=port, limit_concurrency=MAX_CONNECTIONS,
+                timeout_keep_alive=KEEP_ALIVE_SECONDS, log_level="warning")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
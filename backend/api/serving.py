@@ -0,0 +1,251 @@
+"""
+Serving code shared by the prediction services
+==============================================
+
+resnet_predict.py and yolo_predict.py only differ in how they load a model
+and run one batch. Each wraps its `load_deployment(path)` and
+`decode(bytes)` in a ClassifierService and gets the rest from here:
+
+  - `deploy()` warms up the replicas and puts them behind a MicroBatcher
+    and a PredictionCache (one Deployment per weights version);
+  - `classify()` / `classify_group()` answer from the cache and send the
+    misses through the batcher, retried on the new model if a hot swap
+    closes the old one mid-call;
+  - `create_app()` builds the Flask app: CORS, 503 + Retry-After when the
+    model is busy or loading, /predict, /predict/batch (NDJSON stream),
+    /health, /ready, /reload and /metrics.
+
+A run_batch returns, per image, the top (class_name, confidence) pairs,
+best first. The names come from the model that ran the batch, so results
+keep the labels of the weights that produced them across a hot swap.
+
+Environment, with the service's prefix (RESNET_ / YOLO_):
+    <PREFIX>_MAX_QUEUE             queued images before new requests get 503
+    <PREFIX>_MODEL_WATCH_SECONDS   weights file poll interval (0 = never)
+    <PREFIX>_MODEL_LOADING         "background" (default) or "blocking"
+    <PREFIX>_RELOAD_TOKEN          enables POST /reload ("Authorization: Bearer")
+    <PREFIX>_RELOAD_DIR            the only directory /reload loads from
+                                   (default: the weights file's directory)
+    PREDICTION_CACHE_DIR           optional on-disk cache tier
+"""
+
+import os
+import torch
+from flask import Flask, Response, jsonify, request, stream_with_context
+from PIL import Image
+from batching import BatcherClosed, InferenceTimeout, MicroBatcher, QueueFull
+from model_manager import (Deployment, ModelManager, ModelNotReady, reload_authorized,
+                           warm_up, weights_file)
+from prediction_cache import PredictionCache
+from uploads import InvalidUpload, collect_uploads, ndjson_line
+
+# Concurrent requests are stacked into one forward pass: a batch is flushed
+# when it holds BATCH_MAX_SIZE images or BATCH_MAX_WAIT_MS after the first.
+BATCH_MAX_SIZE = 16
+BATCH_MAX_WAIT_MS = 5
+DEFAULT_TOP_K = 3
+# Identical uploads skip decoding and inference; the version in the key
+# retires entries when the weights change. CACHE_FORMAT changes with the
+# shape of cached results.
+CACHE_MAX_ENTRIES = 10000
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DIR = os.environ.get("PREDICTION_CACHE_DIR")
+CACHE_FORMAT = "names"
+DECODE_ERRORS = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+
+
+def make_pin_worker(device, threads, pin_cores):
+    def pin_worker(index):
+        """Runs on each inference worker thread before its first batch.
+        torch.set_num_threads is process-wide (every replica gets the same
+        cap); the CPU affinity set here is per thread on Linux, so with
+        pin_cores each worker really runs on its own cores."""
+        if device != "cpu":
+            return
+        torch.set_num_threads(threads)
+        if pin_cores and hasattr(os, "sched_setaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+            first = index * threads % len(cores)
+            os.sched_setaffinity(0, cores[first:first + threads])
+    return pin_worker
+
+
+class ClassifierService:
+    def __init__(self, name, prefix, model_path, load_deployment, decode,
+                 max_top_k, worker_init=None):
+        self.name = name
+        self.prefix = prefix
+        self.decode = decode  # upload bytes -> what run_batch takes
+        self.max_top_k = max_top_k
+        self.worker_init = worker_init
+        self.max_queue = int(os.environ.get(f"{prefix}_MAX_QUEUE", 256))
+        self.loading = os.environ.get(f"{prefix}_MODEL_LOADING", "background")
+        self.reload_token = os.environ.get(f"{prefix}_RELOAD_TOKEN")
+        self.reload_dir = os.environ.get(f"{prefix}_RELOAD_DIR",
+                                         os.path.dirname(os.path.abspath(model_path)))
+        watch_seconds = int(os.environ.get(f"{prefix}_MODEL_WATCH_SECONDS", 10))
+        self.manager = ModelManager(load_deployment, model_path, watch_seconds, name=name)
+
+    def start(self):
+        """Load the first model (before returning with <PREFIX>_MODEL_LOADING=blocking)"""
+        self.manager.start(background=self.loading != "blocking")
+
+    def deploy(self, path, runners, dummy, version):
+        """Warm up `runners` on `dummy` inputs and wrap them in a Deployment"""
+        warm_up(runners, dummy, BATCH_MAX_SIZE)
+        batcher = MicroBatcher(runners, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+                               name=f"{self.prefix.lower()}-batcher",
+                               max_queue=self.max_queue, worker_init=self.worker_init)
+        cache = PredictionCache(f"{version}-{CACHE_FORMAT}",
+                                CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_DIR)
+        return Deployment(path, batcher, cache)
+
+    def classify(self, data):
+        """Top (class_name, confidence) pairs for uploaded image bytes"""
+        def run(deployment):
+            key = deployment.cache.key(data)
+            top = deployment.cache.get(key)
+            if top is None:
+                top = deployment.batcher.submit(self.decode(data))
+                deployment.cache.put(key, top)
+            return top
+        return self.manager.run(run)
+
+    def classify_group(self, group):
+        """{index: top pairs, or an error string} for a list of (index, (filename, bytes))"""
+        def run(deployment):
+            results, images, pending = {}, [], []
+            for index, (filename, data) in group:
+                key = deployment.cache.key(data)
+                results[index] = deployment.cache.get(key)
+                if results[index] is not None:
+                    continue
+                try:
+                    images.append(self.decode(data))
+                except DECODE_ERRORS as e:
+                    results[index] = f"Could not decode image: {e}"
+                    continue
+                pending.append((index, key))
+
+            for (index, key), top in zip(pending, deployment.batcher.submit_many(images)):
+                deployment.cache.put(key, top)
+                results[index] = top
+            return results
+        return self.manager.run(run)
+
+
+def server_busy(e):
+    """QueueFull, InferenceTimeout and ModelNotReady -> 503 + Retry-After"""
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def add_cors_headers(response):
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    return response
+
+
+def create_app(service, import_name, **health_fields):
+    """Flask app serving `service`; health_fields are added to /health"""
+    app = Flask(import_name)
+    app.after_request(add_cors_headers)
+    for error in (QueueFull, InferenceTimeout, ModelNotReady):
+        app.register_error_handler(error, server_busy)
+    manager = service.manager
+
+    @app.route("/predict", methods=["POST"])
+    def predict():
+        if "file" not in request.files:
+            return jsonify({"error": "No file uploaded"}), 400
+        try:
+            name, confidence = service.classify(request.files["file"].read())[0]
+        except DECODE_ERRORS as e:
+            return jsonify({"error": f"Could not decode image: {e}"}), 400
+        return jsonify({"predicted_class": name, "confidence": round(confidence, 3)})
+
+    # Accepts many `files` (or a zip) and streams one NDJSON line per image
+    # as each group of BATCH_MAX_SIZE images comes back from the model.
+    @app.route("/predict/batch", methods=["POST"])
+    def predict_batch():
+        try:
+            uploads = collect_uploads(request)
+        except InvalidUpload as e:
+            return jsonify({"error": str(e)}), 400
+        if not uploads:
+            return jsonify({"error": "No file uploaded"}), 400
+        top_k = min(max(request.args.get("top_k", DEFAULT_TOP_K, type=int), 1), service.max_top_k)
+        manager.current()  # 503 before streaming starts if no model is loaded
+
+        def generate():
+            for start in range(0, len(uploads), BATCH_MAX_SIZE):
+                group = list(enumerate(uploads[start:start + BATCH_MAX_SIZE], start))
+                try:
+                    results = service.classify_group(group)
+                except (QueueFull, InferenceTimeout, BatcherClosed, ModelNotReady) as e:
+                    # Headers are already sent: report the failure per image instead
+                    results = {index: str(e) for index, _ in group}
+
+                for index, (filename, _) in group:
+                    top = results[index]
+                    if isinstance(top, str):
+                        yield ndjson_line({"index": index, "filename": filename, "error": top})
+                        continue
+                    yield ndjson_line({
+                        "index": index,
+                        "filename": filename,
+                        "predicted_class": top[0][0],
+                        "confidence": round(top[0][1], 3),
+                        "top_k": [{"class": name, "confidence": round(c, 3)}
+                                  for name, c in top[:top_k]]
+                    })
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    # /health is liveness (the process is up); /ready is readiness (a model
+    # is loaded and warmed up).
+    @app.route("/health", methods=["GET"])
+    def health():
+        return jsonify({
+            "status": "healthy",
+            "ready": manager.deployment is not None,
+            "model_path": manager.path,
+            **health_fields
+        })
+
+    @app.route("/ready", methods=["GET"])
+    def ready():
+        status = manager.status()
+        return jsonify(status), 200 if status["ready"] else 503
+
+    @app.route("/reload", methods=["POST"])
+    def reload():
+        """Load new weights (JSON {"path": ...}, relative to the reload dir;
+        default: the current file) on a background thread and swap them in.
+        Needs "Authorization: Bearer <token>"; disabled while no token is set."""
+        if not service.reload_token:
+            return jsonify({"error": f"Reload is disabled (set {service.prefix}_RELOAD_TOKEN)"}), 403
+        if not reload_authorized(request.headers.get("Authorization"), service.reload_token):
+            return jsonify({"error": "Missing or invalid reload token"}), 401
+        path = (request.get_json(silent=True) or {}).get("path")
+        if path is not None:
+            path = weights_file(str(path), service.reload_dir)
+            if path is None:
+                return jsonify({"error": f"path must be a weights file inside {service.reload_dir}"}), 400
+        if not manager.reload_in_background(path):
+            return jsonify({"error": "A model load is already running"}), 409
+        return jsonify(manager.status()), 202
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        deployment = manager.deployment
+        return jsonify({
+            "model": manager.status(),
+            "batching": deployment.batcher.stats() if deployment else None,
+            "cache": deployment.cache.stats() if deployment else None
+        })
+
+    return app
@@ -0,0 +1,49 @@
+"""
+Helpers for multi-image uploads shared by the prediction services.
+
+`/predict/batch` accepts any number of `files` (or `file`) parts, and any
+part may be a .zip of images. Everything is flattened into a list of
+(filename, bytes) in upload order.
+"""
+
+import io
+import json
+import zipfile
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+MAX_BATCH_FILES = 256
+MAX_IMAGE_BYTES = 32 * 1024 * 1024
+ZIP_MIMETYPES = ("application/zip", "application/x-zip-compressed")
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def collect_uploads(request, max_files=MAX_BATCH_FILES):
+    """Return [(filename, bytes)] for every uploaded image, unpacking zips"""
+    uploads = []
+    for part in request.files.getlist("files") + request.files.getlist("file"):
+        data = part.read()
+        if part.filename.lower().endswith(".zip") or part.mimetype in ZIP_MIMETYPES:
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile as e:
+                raise InvalidUpload(f"{part.filename}: {e}")
+            with archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        if info.file_size > MAX_IMAGE_BYTES:
+                            raise InvalidUpload(f"{info.filename} is larger than {MAX_IMAGE_BYTES} bytes")
+                        uploads.append((info.filename, archive.read(info)))
+                        if len(uploads) > max_files:
+                            raise InvalidUpload(f"More than {max_files} images in one batch")
+        else:
+            uploads.append((part.filename, data))
+        if len(uploads) > max_files:
+            raise InvalidUpload(f"More than {max_files} images in one batch")
+    return uploads
+
+
+def ndjson_line(record):
+    return json.dumps(record) + "\n"
@@ -1,76 +1,77 @@
-from flask import Flask, request, jsonify
 from ultralytics import YOLO
 from PIL import Image
-import io
+import os
 import torch
-
-app = Flask(__name__)
+from prediction_cache import file_version
+from preprocess import open_image
+from serving import ClassifierService, create_app, make_pin_worker
 
 # ------------------------------
-# 1. Allow CORS for frontend access
+# 1. Load YOLO model
 # ------------------------------
+MODEL_PATH = os.environ.get(
+    "YOLO_MODEL_PATH",
+    "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/YOLO/train/weights/best.pt")
+IMG_SIZE = 224  # training imgsz; large JPEGs are draft-decoded to about this size
+# Each replica is a separate YOLO instance (ultralytics predictors are not
+# thread-safe) with its own inference worker thread. torch's intra-op thread
+# count is process-wide, so it is set to YOLO_THREADS / YOLO_REPLICAS for all
+# of them: a cap on each op, not a partition of the cores. Only
+# YOLO_PIN_CORES=1 confines each replica's worker thread to its own cores.
+REPLICAS = int(os.environ.get("YOLO_REPLICAS", 1))
+INTRA_OP_THREADS = int(os.environ.get("YOLO_THREADS", os.cpu_count() or 1))
+THREADS_PER_REPLICA = max(1, INTRA_OP_THREADS // REPLICAS)
+PIN_CORES = os.environ.get("YOLO_PIN_CORES") == "1"
 
-
-@app.after_request
-def add_cors_headers(response):
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
-    return response
-
-
-# ------------------------------
-# 2. Load YOLO model
-# ------------------------------
-MODEL_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/YOLO/train/weights/best.pt"
-model = YOLO(MODEL_PATH)
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model.to(device)
-print(f"✅ Model loaded on {device.upper()}")
+print(f"🧠 YOLO on {device.upper()} ({REPLICAS} replica(s) × {THREADS_PER_REPLICA} threads)")
 
 # ------------------------------
-# 3. Define /predict endpoint
+# 2. Micro-batched inference
 # ------------------------------
+# Concurrent uploads share one model.predict() call (one round of
+# ultralytics preprocessing/logging per batch instead of per image).
+# Once YOLO_MAX_QUEUE images are waiting, new requests get 503 + Retry-After.
+MAX_TOP_K = 5  # ultralytics keeps the top 5 classes per result
 
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-
-    file = request.files["file"]
-    image = Image.open(io.BytesIO(file.read())).convert("RGB")
-
-    # Run YOLO classification inference
-    results = model.predict(image)
-
-    # Extract top prediction
-    top_pred = results[0].probs.top1
-    confidence = float(results[0].probs.top1conf)
-    class_name = model.names[top_pred]
+def make_run_batch(model):
+    def run_batch(images):
+        """Classify a list of PIL images; returns, per image, the top
+        (class_name, confidence) pairs, best first"""
+        results = model.predict(images, verbose=False)
+        return [[(result.names[i], conf)
+                 for i, conf in zip(result.probs.top5, result.probs.top5conf.tolist())]
+                for result in results]
+    return run_batch
 
-    return jsonify({
-        "predicted_class": class_name,
-        "confidence": round(confidence, 3)
-    })
 
 # ------------------------------
-# 4. Health check route
+# 3. Model lifecycle and routes
 # ------------------------------
+# Weights load (and warm up) in the background; /ready turns 200 when done.
+# Rewriting best.pt, or POST /reload (needs YOLO_RELOAD_TOKEN), swaps in a new
+# model without dropping requests. YOLO_MODEL_LOADING=blocking loads before
+# import returns.
+def load_deployment(path):
+    replicas = [YOLO(path).to(device) for _ in range(REPLICAS)]
+    runners = [make_run_batch(model) for model in replicas]
+    return service.deploy(path, runners, Image.new("RGB", (IMG_SIZE, IMG_SIZE)),
+                          f"yolo-{file_version(path)}")
 
 
-@app.route("/health", methods=["GET"])
-def health():
-    return jsonify({
-        "status": "healthy",
-        "model_path": MODEL_PATH,
-        "device": device
-    })
+service = ClassifierService("YOLO", "YOLO", MODEL_PATH, load_deployment,
+                            lambda data: open_image(data, IMG_SIZE), MAX_TOP_K,
+                            worker_init=make_pin_worker(device, THREADS_PER_REPLICA, PIN_CORES))
+service.start()
+manager = service.manager
+app = create_app(service, __name__, replicas=REPLICAS, device=device)
 
 
 # ------------------------------
-# 5. Run the app
+# 4. Run the app
 # ------------------------------
+# Development server; for production use `python backend/api/serve.py yolo_predict`
 if __name__ == "__main__":
     print("🚀 Starting Flask YOLO Classification API on http://127.0.0.1:5005")
     app.run(host="0.0.0.0", port=5005, debug=False)
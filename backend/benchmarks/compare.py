@@ -0,0 +1,92 @@
+"""
+Diff two load-test results from run.py
+======================================
+
+Matches scenarios and levels (c=N / rate=N) between a baseline and a
+candidate run, prints throughput, p95 / p99 latency and error-rate changes
+per level, and flags a level as a regression when throughput drops, or p95
+rises, by more than THRESHOLD, or the error rate rises by more than
+ERROR_RATE_THRESHOLD. Exits with status 1 if anything regressed, so it can
+gate a CI job.
+
+Only compare runs from the same host and config; the header warns when
+they differ.
+
+Usage:
+    python backend/benchmarks/compare.py BASELINE.json CANDIDATE.json
+"""
+
+import json
+import sys
+import loadgen
+
+# ============== CONFIG ==============
+THRESHOLD = 0.10  # relative change counted as a regression
+ERROR_RATE_THRESHOLD = 0.01  # absolute error-rate increase counted as a regression
+# ====================================
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(old, new):
+    return (new - old) / old if old else 0.0
+
+
+def latency(level, key):
+    return level["latency_ms"][key] if level["latency_ms"] else float("inf")
+
+
+def compare_level(old, new):
+    """(printed row, regressed?)"""
+    rps = change(old["throughput_rps"], new["throughput_rps"])
+    p95 = change(latency(old, "p95"), latency(new, "p95"))
+    p99 = change(latency(old, "p99"), latency(new, "p99"))
+    errors = new["error_rate"] - old["error_rate"]
+    regressed = rps < -THRESHOLD or p95 > THRESHOLD or errors > ERROR_RATE_THRESHOLD
+    row = (f"{new['throughput_rps']:9.1f} rps ({100 * rps:+6.1f}%)  "
+           f"p95 {latency(new, 'p95'):8.1f} ms ({100 * p95:+6.1f}%)  "
+           f"p99 {latency(new, 'p99'):8.1f} ms ({100 * p99:+6.1f}%)  "
+           f"err {100 * new['error_rate']:5.1f}% ({100 * errors:+5.1f})")
+    return row, regressed
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("Usage: python compare.py BASELINE.json CANDIDATE.json")
+        sys.exit(1)
+    baseline, candidate = load(argv[0]), load(argv[1])
+    print(f"Baseline:  {baseline['commit'] or '?'} ({baseline['timestamp']})")
+    print(f"Candidate: {candidate['commit'] or '?'} ({candidate['timestamp']})")
+    if baseline["host"] != candidate["host"]:
+        print("⚠️ Runs are from different hosts")
+    if baseline["config"] != candidate["config"]:
+        print("⚠️ Runs used different configs")
+
+    regressions = 0
+    for name, scenario in candidate["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            print(f"\n{name}: not in baseline")
+            continue
+        print(f"\n{name}")
+        old_levels = {loadgen.level_name(level): level
+                      for level in baseline["scenarios"][name]["levels"]}
+        for level in scenario["levels"]:
+            key = loadgen.level_name(level)
+            if key not in old_levels:
+                continue
+            row, regressed = compare_level(old_levels[key], level)
+            regressions += regressed
+            print(f"  {key:>9s} {row}{'  🚨 REGRESSION' if regressed else ''}")
+        old_capacity, new_capacity = baseline["scenarios"][name]["capacity"], scenario["capacity"]
+        print(f"  capacity within SLO: {old_capacity['max_rps_within_slo']:.1f} -> "
+              f"{new_capacity['max_rps_within_slo']:.1f} rps")
+
+    print(f"\n{'🚨' if regressions else '✅'} {regressions} regressed level(s)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
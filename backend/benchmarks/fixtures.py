@@ -0,0 +1,220 @@
+"""
+Offline fixtures for the HTTP service benchmarks
+================================================
+
+Writes everything run.py needs to start the services without the real
+chargemasters or trained weights:
+
+    FIXTURE_DIR/hospitals.json               registry for HOSPITAL_REGISTRY
+    FIXTURE_DIR/hospital_NN.csv              synthetic chargemasters
+    FIXTURE_DIR/images/wound_NNN.jpg         upload corpus for /predict
+    FIXTURE_DIR/dummy_resnet.torchscript.pt  stand-in classifier
+
+The chargemasters follow the two real layouts (2 metadata lines, then
+"description,code|1,...,standard_charge|max"): "barnes" indexes code|1 with
+the last duplicate winning, "lincoln" keeps code|1 DRGs and code|2 CPTs with
+the first duplicate winning. Every code in pricing.py's
+WOUND_PROCEDURE_MAPPING appears in each file, padded out with FILLER_ROWS
+random codes, repeated codes and a few malformed rows, so ingestion and
+lookups do realistic work.
+
+The dummy classifier is a small TorchScript conv net with the ResNet head's
+input and output shapes. resnet_predict.py loads it through the normal
+"torchscript" backend, so the benchmark exercises the real decode,
+micro-batching and cache path (see SERVICE_MODEL_PATH for the file naming).
+DUMMY_WIDTH sets how much compute each image costs.
+
+Usage:
+    python backend/benchmarks/fixtures.py
+"""
+
+import csv
+import json
+import os
+import re
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+
+# ============== CONFIG ==============
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+PRICING_SOURCE = os.path.join(BENCH_DIR, "..", "api", "pricing.py")
+HOSPITALS = 3  # alternating barnes / lincoln layouts
+FILLER_ROWS = 20000  # random extra rows per chargemaster
+DUPLICATE_ROWS = 500  # repeated codes (exercises the first/last rule)
+MALFORMED_ROWS = 20
+IMAGES = 48
+IMAGE_SIZES = [(640, 480), (1280, 960), (2016, 1512), (4032, 3024)]  # phone-like
+JPEG_QUALITY = 90
+NUM_CLASSES = 8  # must match resnet_predict.NUM_CLASSES
+DUMMY_WIDTH = 32  # conv channels of the dummy classifier
+SEED = 0
+# ====================================
+
+# resnet_predict.py is configured with the eager weights path
+# (RESNET_MODEL_PATH) and, with RESNET_BACKEND=torchscript, loads
+# "<that path minus .pt>.torchscript.pt" instead. Only that file is written;
+# SERVICE_MODEL_PATH is what run.py passes as RESNET_MODEL_PATH.
+SERVICE_MODEL_PATH = os.path.join(FIXTURE_DIR, "dummy_resnet.pt")
+SCRIPTED_MODEL_PATH = os.path.splitext(SERVICE_MODEL_PATH)[0] + ".torchscript.pt"
+
+LAYOUTS = {
+    "barnes": {
+        "metadata_lines": 2,
+        "codes": [{"column": "code|1"}],
+        "duplicates": "last",
+    },
+    "lincoln": {
+        "metadata_lines": 2,
+        "codes": [
+            {"column": "code|1", "type_column": "code|1|type", "types": ["DRG"]},
+            {"column": "code|2", "type_column": "code|2|type", "types": ["CPT"]},
+        ],
+        "duplicates": "first",
+    },
+}
+HEADER = ["description", "code|1", "code|1|type", "code|2", "code|2|type", "setting",
+          "standard_charge|gross", "standard_charge|discounted_cash",
+          "standard_charge|min", "standard_charge|max"]
+
+
+# ==== CHARGEMASTERS ====
+def mapped_codes():
+    """Procedure codes pricing.py looks up, read from its source so the
+    fixtures can be built without importing (and so loading) the service"""
+    with open(PRICING_SOURCE) as f:
+        return sorted(set(re.findall(r'"code":\s*"(\d+)"', f.read())))
+
+
+def money(rng, low, high):
+    value = rng.uniform(low, high)
+    # Real files mix plain numbers with comma-grouped ones (quoted in the CSV)
+    return f"{value:,.2f}" if rng.random() < 0.5 else f"{value:.2f}"
+
+
+def charge_row(rng, code, layout):
+    """One CSV row for `code` (DRGs are the codes below 1000)"""
+    code_type = "DRG" if len(code) <= 3 else "CPT"
+    gross = rng.uniform(50, 60000 if code_type == "DRG" else 5000)
+    charges = [money(rng, gross, gross), money(rng, 0.3 * gross, 0.9 * gross),
+               money(rng, 0.1 * gross, 0.5 * gross), money(rng, 0.8 * gross, 1.5 * gross)]
+    if rng.random() < 0.1:
+        charges[rng.integers(1, 4)] = ""  # missing charges parse as 0
+    description = f"Synthetic procedure {code}"
+    setting = rng.choice(["inpatient", "outpatient", "both"])
+    if layout == "barnes":
+        return [description, code, code_type, "", "", setting] + charges
+    if code_type == "DRG":
+        return [description, code, "DRG", "", "", setting] + charges
+    return [description, "", "", code, "CPT", setting] + charges
+
+
+def write_chargemaster(path, layout, codes, rng):
+    filler = [str(c) for c in rng.integers(10000, 99999, FILLER_ROWS)]
+    filler += [str(c) for c in rng.integers(1, 999, FILLER_ROWS // 20)]
+    rows = [charge_row(rng, code, layout) for code in codes + filler]
+    rows += [charge_row(rng, rows[i][1] or rows[i][3], layout)
+             for i in rng.integers(0, len(rows), DUPLICATE_ROWS)]
+    rows += [["Malformed row", "12345"] for _ in range(MALFORMED_ROWS)]
+    order = rng.permutation(len(rows))
+
+    with open(path, "w", newline="") as f:
+        f.write("hospital_name,last_updated_on,version\n")
+        f.write(f"Synthetic {layout} hospital,2025-01-01,2.0.0\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(HEADER)
+        for i in order:
+            writer.writerow(rows[i])
+    return len(rows)
+
+
+def write_registry(rng):
+    codes = mapped_codes()
+    hospitals = []
+    for n in range(HOSPITALS):
+        layout = "barnes" if n % 2 == 0 else "lincoln"
+        file = f"hospital_{n:02d}.csv"
+        rows = write_chargemaster(os.path.join(FIXTURE_DIR, file), layout, codes, rng)
+        hospitals.append({
+            "id": f"hospital_{n:02d}",
+            "name": f"Synthetic Hospital {n:02d}",
+            "short_name": f"Hospital {n:02d}",
+            "location": "Offline, MO",
+            "csv": file,  # relative to the registry
+            **LAYOUTS[layout],
+        })
+        print(f"🏥 {file}: {rows} rows ({layout} layout, {len(codes)} mapped codes)")
+
+    path = os.path.join(FIXTURE_DIR, "hospitals.json")
+    with open(path, "w") as f:
+        json.dump(hospitals, f, indent=2)
+    return path
+
+
+# ==== IMAGES ====
+def synthetic_photo(rng, size):
+    """Smooth color blobs plus sensor-like noise: compresses like a photo,
+    unlike flat colors or pure noise"""
+    width, height = size
+    low = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    image = Image.fromarray(low).resize((width, height), Image.BICUBIC)
+    pixels = np.asarray(image, dtype=np.int16) + rng.integers(-12, 13, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def write_images(rng):
+    image_dir = os.path.join(FIXTURE_DIR, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    total = 0
+    for i in range(IMAGES):
+        width, height = IMAGE_SIZES[i % len(IMAGE_SIZES)]
+        if rng.random() < 0.5:
+            width, height = height, width  # portrait
+        path = os.path.join(image_dir, f"wound_{i:03d}.jpg")
+        synthetic_photo(rng, (width, height)).save(path, quality=JPEG_QUALITY)
+        total += os.path.getsize(path)
+    print(f"🖼️ {IMAGES} images in {image_dir} ({total / IMAGES / 1024:.0f} KB average)")
+    return image_dir
+
+
+# ==== DUMMY MODEL ====
+class DummyClassifier(nn.Module):
+    """(N, 3, 224, 224) -> (N, NUM_CLASSES) logits, like the ResNet101 head"""
+
+    def __init__(self, width=DUMMY_WIDTH, num_classes=NUM_CLASSES):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, width, 3, stride=2, padding=1), nn.BatchNorm2d(width), nn.ReLU(),
+            nn.Conv2d(width, width, 3, stride=2, padding=1), nn.BatchNorm2d(width), nn.ReLU(),
+            nn.AdaptiveAvgPool2d(1),
+        )
+        self.fc = nn.Linear(width, num_classes)
+
+    def forward(self, x):
+        return self.fc(torch.flatten(self.features(x), 1))
+
+
+def write_dummy_model():
+    torch.manual_seed(SEED)
+    model = DummyClassifier().eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.zeros(1, 3, 224, 224))
+    traced.save(SCRIPTED_MODEL_PATH)
+    print(f"🧠 Dummy classifier saved to {SCRIPTED_MODEL_PATH}")
+    return SCRIPTED_MODEL_PATH
+
+
+# ==== MAIN ====
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+    registry = write_registry(rng)
+    image_dir = write_images(rng)
+    model_path = write_dummy_model()
+    return {"registry": registry, "images": image_dir, "model": model_path}  # the written file
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Load generator for the HTTP services
+====================================
+
+Replays a request corpus against one running service and measures how it
+holds up as load grows. Standard library only, so it never competes with
+the services for torch threads.
+
+Scenarios:
+    "predict"  POST /predict, an image from the corpus per request
+    "assess"   POST /api/assess, same uploads (classify + price)
+    "pricing"  GET /api/pricing?wound_type=..&hospital=..
+    "compare"  GET /api/pricing/compare?wound_type=..
+
+The query corpus is every wound type the service lists at /api/wound-types,
+spelled like the classifiers do ("Foot_ulcer") and like the frontend does
+("Foot-ulcer"), crossed with the hospitals from /health. With
+UNIQUE_UPLOADS, each upload gets random bytes appended after the JPEG end
+marker. Decoders ignore them, but the prediction cache key changes, so
+every request pays for decode and inference instead of measuring cache hits.
+
+Two load models, each run for WARMUP_SECONDS (discarded) + DURATION_SECONDS
+per level:
+  - closed loop, at each of CONCURRENCY: N clients sending back to back.
+    Plots the throughput curve and shows where it flattens;
+  - open loop, at each of RATES requests/sec, Poisson arrivals. Latency is
+    measured from the scheduled send time, so a stalled server is charged
+    for the requests queued behind it (no coordinated omission).
+
+Per level: throughput (successful responses/sec), latency mean / p50 /
+p90 / p95 / p99 / max of successful responses, status counts, error rate
+(non-2xx responses and connection failures) and 503 rate. `capacity`
+sums up the levels: peak throughput, and the highest throughput that kept
+p95 <= SLO_P95_MS and the error rate <= MAX_ERROR_RATE.
+
+run.py starts the services on fixtures and stores the results. To load an
+already-running service directly:
+    python backend/benchmarks/loadgen.py pricing http://127.0.0.1:5001
+    python backend/benchmarks/loadgen.py predict http://127.0.0.1:5005 IMAGE_DIR
+"""
+
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+import numpy as np
+
+# ============== CONFIG ==============
+CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]  # closed-loop levels
+RATES = []  # open-loop levels in requests/sec, e.g. [10, 25, 50]
+DURATION_SECONDS = 10
+WARMUP_SECONDS = 2
+TIMEOUT_SECONDS = 30
+OPEN_LOOP_WORKERS = 128  # concurrent requests the open-loop generator can hold
+UNIQUE_UPLOADS = True  # defeat the prediction cache (see above)
+SLO_P95_MS = 500
+MAX_ERROR_RATE = 0.01
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SEED = 0
+# ====================================
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ==== HTTP ====
+class Client:
+    """One keep-alive connection, reopened after a failure"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+
+    def send(self, method, path, body=None, headers=None):
+        """Status code, or None if the connection failed"""
+        for attempt in range(2):
+            reused = self.connection is not None
+            if not reused:
+                self.connection = http.client.HTTPConnection(self.host, self.port,
+                                                             timeout=TIMEOUT_SECONDS)
+            try:
+                self.connection.request(method, path, body=body, headers=headers or {})
+                response = self.connection.getresponse()
+                response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                self.close()
+                # A kept-alive connection the server already closed; retry fresh
+                if not reused or attempt:
+                    return None
+        return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def get_json(base_url, path):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=TIMEOUT_SECONDS)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return json.loads(response.read())
+    finally:
+        connection.close()
+
+
+# ==== REQUEST CORPUS ====
+# A scenario's `next_request(rng)` returns (method, path, body, headers)
+def load_images(image_dir):
+    files = sorted(f for f in os.listdir(image_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if not files:
+        raise ValueError(f"No images in {image_dir}")
+    images = []
+    for file in files:
+        with open(os.path.join(image_dir, file), "rb") as f:
+            images.append((file, f.read()))
+    return images
+
+
+def multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; "
+            f"filename=\"{filename}\"\r\nContent-Type: image/jpeg\r\n\r\n").encode()
+    body += data + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def upload_scenario(path, images):
+    def next_request(rng):
+        filename, data = images[rng.randrange(len(images))]
+        if UNIQUE_UPLOADS:
+            data += rng.randbytes(16)
+        body, headers = multipart("file", filename, data)
+        return "POST", path, body, headers
+    return next_request
+
+
+def wound_queries(base_url):
+    """Wound-type spellings and hospital ids the pricing service knows"""
+    wound_types = get_json(base_url, "/api/wound-types")["supported_wound_types"]
+    hospitals = list(get_json(base_url, "/health")["hospitals"])
+    spellings = sorted({s for wt in wound_types
+                        for s in (wt, wt.replace("-", "_"), wt.lower().replace("_", " "))})
+    return spellings, hospitals
+
+
+def pricing_scenario(spellings, hospitals):
+    def next_request(rng):
+        query = urlencode({"wound_type": rng.choice(spellings), "hospital": rng.choice(hospitals)})
+        return "GET", f"/api/pricing?{query}", None, None
+    return next_request
+
+
+def compare_scenario(spellings, hospitals):
+    def next_request(rng):
+        params = {"wound_type": rng.choice(spellings)}
+        if len(hospitals) > 2 and rng.random() < 0.25:  # some requests pick a subset
+            params["hospitals"] = ",".join(rng.sample(hospitals, 2))
+        return "GET", f"/api/pricing/compare?{urlencode(params)}", None, None
+    return next_request
+
+
+def build_scenario(name, base_url, image_dir=None):
+    """next_request function for a scenario against the service at base_url"""
+    if name in ("predict", "assess"):
+        if image_dir is None:
+            raise ValueError(f"Scenario {name} needs an image directory")
+        return upload_scenario("/predict" if name == "predict" else "/api/assess",
+                               load_images(image_dir))
+    if name in ("pricing", "compare"):
+        spellings, hospitals = wound_queries(base_url)
+        builder = pricing_scenario if name == "pricing" else compare_scenario
+        return builder(spellings, hospitals)
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+# ==== LOAD MODELS ====
+# Each sample is (status or None, latency seconds), recorded after warm-up
+def send(client, next_request, rng):
+    method, path, body, headers = next_request(rng)
+    return client.send(method, path, body, headers)
+
+
+def run_closed(base_url, next_request, concurrency):
+    samples, lock = [], threading.Lock()
+    measure_from = time.perf_counter() + WARMUP_SECONDS
+    stop_at = measure_from + DURATION_SECONDS
+
+    def worker(n):
+        client, rng = Client(base_url), random.Random(SEED * 1000 + n)
+        local = []
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                break
+            status = send(client, next_request, rng)
+            if started >= measure_from:
+                local.append((status, time.perf_counter() - started))
+        client.close()
+        with lock:
+            samples.extend(local)
+
+    run_threads(worker, concurrency)
+    return samples, DURATION_SECONDS
+
+
+def run_open(base_url, next_request, rate):
+    samples, finished, lock = [], [], threading.Lock()
+    schedule = queue.Queue()
+    begin = time.perf_counter()
+    measure_from = begin + WARMUP_SECONDS
+    stop_at = measure_from + DURATION_SECONDS
+    give_up_at = stop_at + TIMEOUT_SECONDS
+
+    # Poisson arrivals, fixed up front so every run sees the same pattern
+    arrivals = np.cumsum(np.random.default_rng(SEED).exponential(
+        1 / rate, int(rate * (WARMUP_SECONDS + DURATION_SECONDS) * 1.5) + 1))
+    for offset in arrivals[arrivals < WARMUP_SECONDS + DURATION_SECONDS]:
+        schedule.put(begin + offset)
+
+    def worker(n):
+        client, rng = Client(base_url), random.Random(SEED * 1000 + n)
+        local = []
+        while True:
+            try:
+                scheduled = schedule.get_nowait()
+            except queue.Empty:
+                break
+            now = time.perf_counter()
+            if now > give_up_at:
+                status = None  # the generator fell this far behind; count as failed
+            else:
+                if scheduled > now:
+                    time.sleep(scheduled - now)
+                status = send(client, next_request, rng)
+            if scheduled >= measure_from:
+                local.append((status, time.perf_counter() - scheduled))
+        client.close()
+        with lock:
+            samples.extend(local)
+            finished.append(time.perf_counter())
+
+    run_threads(worker, OPEN_LOOP_WORKERS)
+    # A server slower than the offered rate is still draining the backlog
+    # after the window; throughput is over the time it actually took
+    return samples, max(DURATION_SECONDS, max(finished) - measure_from)
+
+
+def run_threads(worker, count):
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+# ==== STATS ====
+def summarize(samples, seconds):
+    statuses = {}
+    for status, _ in samples:
+        key = str(status) if status is not None else "connection_error"
+        statuses[key] = statuses.get(key, 0) + 1
+    ok = np.array([latency for status, latency in samples
+                   if status is not None and (200 <= status < 300 or status == 304)]) * 1000
+    failed = len(samples) - len(ok)
+    summary = {
+        "requests": len(samples),
+        "ok": int(len(ok)),
+        "throughput_rps": round(len(ok) / seconds, 2),
+        "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+        "rejected_rate": round(statuses.get("503", 0) / len(samples), 4) if samples else 0.0,
+        "status": dict(sorted(statuses.items())),
+        "latency_ms": None,
+    }
+    if len(ok):
+        summary["latency_ms"] = {
+            "mean": round(float(ok.mean()), 2),
+            **{f"p{p}": round(float(np.percentile(ok, p)), 2) for p in PERCENTILES},
+            "max": round(float(ok.max()), 2),
+        }
+    return summary
+
+
+def capacity(levels):
+    """Peak throughput, and the best throughput that met the SLO"""
+    def within_slo(level):
+        return (level["latency_ms"] is not None and level["latency_ms"]["p95"] <= SLO_P95_MS
+                and level["error_rate"] <= MAX_ERROR_RATE)
+
+    if not levels:
+        return None
+    peak = max(levels, key=lambda level: level["throughput_rps"])
+    good = [level for level in levels if within_slo(level)]
+    best = max(good, key=lambda level: level["throughput_rps"]) if good else None
+    return {
+        "slo_p95_ms": SLO_P95_MS,
+        "max_error_rate": MAX_ERROR_RATE,
+        "peak_rps": peak["throughput_rps"],
+        "peak_at": level_name(peak),
+        "max_rps_within_slo": best["throughput_rps"] if best else 0.0,
+        "max_rps_within_slo_at": level_name(best) if best else None,
+    }
+
+
+def level_name(level):
+    return f"c={level['concurrency']}" if "concurrency" in level else f"rate={level['rate']}"
+
+
+# ==== MAIN ====
+def run_scenario(name, base_url, next_request):
+    """Run every closed- and open-loop level; returns the scenario's results"""
+    levels = []
+    for concurrency in CONCURRENCY:
+        samples, seconds = run_closed(base_url, next_request, concurrency)
+        levels.append({"concurrency": concurrency, **summarize(samples, seconds)})
+        print_level(name, levels[-1])
+    for rate in RATES:
+        samples, seconds = run_open(base_url, next_request, rate)
+        levels.append({"rate": rate, **summarize(samples, seconds)})
+        print_level(name, levels[-1])
+    return {"url": base_url, "levels": levels, "capacity": capacity(levels)}
+
+
+def print_level(name, level):
+    latency = level["latency_ms"] or {}
+    print(f"  {name:8s} {level_name(level):>9s} {level['throughput_rps']:9.1f} rps  "
+          f"p50 {latency.get('p50', float('nan')):8.1f}  p95 {latency.get('p95', float('nan')):8.1f}  "
+          f"p99 {latency.get('p99', float('nan')):8.1f} ms  "
+          f"err {100 * level['error_rate']:5.1f}%  503 {100 * level['rejected_rate']:5.1f}%")
+
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        print("Usage: python loadgen.py SCENARIO BASE_URL [IMAGE_DIR]")
+        sys.exit(1)
+    name, base_url = argv[0], argv[1].rstrip("/")
+    next_request = build_scenario(name, base_url, argv[2] if len(argv) == 3 else None)
+    print(f"🔥 Loading {base_url} ({name})")
+    result = run_scenario(name, base_url, next_request)
+    print(json.dumps(result["capacity"], indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
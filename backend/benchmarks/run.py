@@ -0,0 +1,214 @@
+"""
+Offline load-test suite for the HTTP services
+=============================================
+
+Starts each service on the fixtures from fixtures.py, with the synthetic
+chargemasters and the dummy TorchScript classifier, so nothing needs the
+real data or weights. loadgen.py then drives every scenario through its
+concurrency (and optional rate) levels. Results go to
+
+    RESULTS_DIR/<UTC time>-<commit>.json
+
+which holds the git commit (and whether the tree was dirty), the host, the
+load and fixture config, and per scenario the levels and capacity summary.
+Diff two runs with compare.py to catch regressions between commits.
+
+Services run the production way (serve.py: uvicorn + request threads) by
+default; SERVER = "flask" uses the threaded Flask development server
+instead. Scenario -> service:
+    pricing, compare   pricing.py
+    predict            resnet_predict.py
+    assess             assess.py (classifier + pricing in one process)
+
+The load generator shares the machine with the services, so on small hosts
+read results relative to another run on the same host, not as absolute
+capacity.
+
+Usage:
+    python backend/benchmarks/run.py                   # every scenario
+    python backend/benchmarks/run.py pricing compare
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import fixtures
+import loadgen
+
+# ============== CONFIG ==============
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+LOG_DIR = os.path.join(fixtures.FIXTURE_DIR, "logs")
+SCENARIOS = ["pricing", "compare", "predict", "assess"]
+SERVER = "uvicorn"  # "uvicorn" (serve.py) or "flask" (development server)
+HOST = "127.0.0.1"
+SERVICES = {  # module: port (away from the dev servers' 5001/5002/5005)
+    "pricing": 5101,
+    "resnet_predict": 5105,
+    "assess": 5102,
+}
+SCENARIO_SERVICES = {"pricing": "pricing", "compare": "pricing",
+                     "predict": "resnet_predict", "assess": "assess"}
+READY_TIMEOUT_SECONDS = 300
+REBUILD_FIXTURES = False  # otherwise only built when missing
+# ====================================
+
+
+# ==== FIXTURES ====
+def ensure_fixtures():
+    paths = {
+        "registry": os.path.join(fixtures.FIXTURE_DIR, "hospitals.json"),
+        "images": os.path.join(fixtures.FIXTURE_DIR, "images"),
+        "model": fixtures.SCRIPTED_MODEL_PATH,
+    }
+    if REBUILD_FIXTURES or not all(os.path.exists(p) for p in paths.values()):
+        print(f"🧪 Building fixtures in {fixtures.FIXTURE_DIR}...")
+        paths = fixtures.main()
+    return paths
+
+
+def service_env(paths):
+    env = dict(os.environ)
+    env.update({
+        "HOSPITAL_REGISTRY": paths["registry"],
+        "RESNET_MODEL_PATH": fixtures.SERVICE_MODEL_PATH,  # resolves to paths["model"]
+        "RESNET_BACKEND": "torchscript",
+        "RESNET_MODEL_LOADING": "blocking",
+    })
+    env.pop("PREDICTION_CACHE_DIR", None)  # a warm on-disk cache would skew /predict
+    return env
+
+
+# ==== SERVICES ====
+def start_service(module, port, env):
+    if SERVER == "uvicorn":
+        command = [sys.executable, os.path.join(API_DIR, "serve.py"), module, "--port", str(port)]
+    elif SERVER == "flask":
+        command = [sys.executable, "-m", "flask", "--app", module, "run",
+                   "--host", HOST, "--port", str(port), "--with-threads"]
+    else:
+        raise ValueError(f"Unknown SERVER: {SERVER}")
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log = open(os.path.join(LOG_DIR, f"{module}.log"), "w")
+    process = subprocess.Popen(command, cwd=API_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    process.log = log
+    return process
+
+
+def wait_ready(process, module, base_url):
+    """Poll /ready (model services) or /health (pricing) until it returns 200"""
+    path = "/health" if module == "pricing" else "/ready"
+    client = loadgen.Client(base_url)
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{module} exited with code {process.returncode}, "
+                               f"see {process.log.name}")
+        if client.send("GET", path) == 200:
+            client.close()
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"{module} not ready after {READY_TIMEOUT_SECONDS}s, see {process.log.name}")
+
+
+def stop_service(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    process.log.close()
+
+
+# ==== RESULTS ====
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata():
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "server": SERVER,
+            "concurrency": loadgen.CONCURRENCY,
+            "rates": loadgen.RATES,
+            "duration_seconds": loadgen.DURATION_SECONDS,
+            "warmup_seconds": loadgen.WARMUP_SECONDS,
+            "unique_uploads": loadgen.UNIQUE_UPLOADS,
+            "slo_p95_ms": loadgen.SLO_P95_MS,
+            "hospitals": fixtures.HOSPITALS,
+            "filler_rows": fixtures.FILLER_ROWS,
+            "images": fixtures.IMAGES,
+            "dummy_width": fixtures.DUMMY_WIDTH,
+        },
+    }
+
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    commit = (results["commit"] or "nogit")[:8] + ("-dirty" if results["dirty"] else "")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+# ==== MAIN ====
+def main(argv):
+    scenarios = argv or SCENARIOS
+    unknown = [name for name in scenarios if name not in SCENARIO_SERVICES]
+    if unknown:
+        print(f"Unknown scenario(s): {unknown}. Choose from {list(SCENARIO_SERVICES)}")
+        sys.exit(1)
+
+    paths = ensure_fixtures()
+    env = service_env(paths)
+    results = {**run_metadata(), "scenarios": {}}
+
+    # One service up at a time, so scenarios don't compete for the CPU
+    for module, port in SERVICES.items():
+        names = [name for name in scenarios if SCENARIO_SERVICES[name] == module]
+        if not names:
+            continue
+        base_url = f"http://{HOST}:{port}"
+        print(f"🚀 Starting {module} on {base_url} ({SERVER})...")
+        process = start_service(module, port, env)
+        try:
+            wait_ready(process, module, base_url)
+            for name in names:
+                print(f"🔥 {name}")
+                next_request = loadgen.build_scenario(name, base_url, paths["images"])
+                results["scenarios"][name] = loadgen.run_scenario(name, base_url, next_request)
+        finally:
+            stop_service(process)
+
+    path = save_results(results)
+    print("\n📊 Capacity")
+    for name, scenario in results["scenarios"].items():
+        summary = scenario["capacity"]
+        print(f"  {name:8s} peak {summary['peak_rps']:8.1f} rps at {summary['peak_at']:>8s}  "
+              f"| within SLO (p95 <= {summary['slo_p95_ms']} ms): "
+              f"{summary['max_rps_within_slo']:8.1f} rps at {summary['max_rps_within_slo_at']}")
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -15,8 +15,7 @@ const searchHospitalsBtn = document.getElementById('searchHospitals');
 const injuryInfo = document.getElementById('injuryInfo');
 const detectedInjury = document.getElementById('detectedInjury');
 const mapSection = document.getElementById('mapSection');
-const hospital1Card = document.getElementById('hospital1Card');
-const hospital2Card = document.getElementById('hospital2Card');
+const hospitalComparison = document.getElementById('hospitalComparison');
 const savingsSummary = document.getElementById('savingsSummary');
 const savingsText = document.getElementById('savingsText');
 
@@ -40,8 +39,9 @@ const retakePhotoBtn = document.getElementById('retakePhotoBtn');
 const confirmPhotoBtn = document.getElementById('confirmPhotoBtn');
 const closeWebcamModal = document.getElementById('closeWebcamModal');
 
-// Store wound type globally
+// Store wound type (and its pricing from /api/assess) globally
 let currentWoundType = '';
+let currentComparison = null;
 let map = null;
 let markers = [];
 let mapInitialized = false;
@@ -56,29 +56,25 @@ let insuranceData = {
   hasInsurance: true
 };
 
-// Store hospital pricing data
-let hospitalPricingData = {
-  barnes_jewish: null,
-  lincoln: null
-};
+// Store hospital pricing data: the comparison entries, in the order returned
+let hospitalPricingData = [];
+let currentRanking = [];
 
-// Hospital data
+// Map locations for hospitals in the registry (pricing comes from the API)
 const hospitals = [
   {
     name: "Barnes Jewish St. Peters Hospital",
     location: "St. Peters, MO 63376",
     lat: 38.7881,
     lng: -90.6298,
-    api_id: "barnes_jewish",
-    cardId: "hospital1Card"
+    api_id: "barnes_jewish"
   },
   {
     name: "Mercy Hospital Lincoln",
     location: "Troy, MO 63379",
     lat: 38.9728,
     lng: -90.9768,
-    api_id: "lincoln",
-    cardId: "hospital2Card"
+    api_id: "lincoln"
   }
 ];
 
@@ -135,12 +131,7 @@ function initMapbox() {
       .addTo(map);
 
     // Click marker to highlight hospital card
-    el.addEventListener('click', () => {
-      const card = document.getElementById(hospital.cardId);
-      card.classList.add('active');
-      const otherCard = index === 0 ? hospital2Card : hospital1Card;
-      otherCard.classList.remove('active');
-    });
+    el.addEventListener('click', () => selectHospitalCard(hospital.api_id));
 
     markers.push(marker);
   });
@@ -283,15 +274,16 @@ function handleFile(event) {
   const formData = new FormData();
   formData.append("file", file);
 
-  // Send to Flask backend for classification
-  fetch("http://127.0.0.1:5005/predict", {
+  // Classify and price in one round trip
+  fetch("http://127.0.0.1:5002/api/assess", {
     method: "POST",
     body: formData,
   })
     .then(res => res.json())
     .then(data => {
       loading.style.display = "none";
-      currentWoundType = data.predicted_class || "Unknown injury";
+      currentWoundType = data.wound_type || data.predicted_class || "Unknown injury";
+      currentComparison = data.pricing || null;
 
       // Show wound type and ZIP section
       detectedInjury.textContent = currentWoundType;
@@ -334,7 +326,7 @@ updateInsuranceBtn.addEventListener('click', () => {
   insuranceNotice.style.display = 'block';
 
   // Recalculate and update hospital pricing display
-  if (hospitalPricingData.barnes_jewish || hospitalPricingData.lincoln) {
+  if (hospitalPricingData.length) {
     updateHospitalCardsWithInsurance();
   }
 });
@@ -438,55 +430,93 @@ function displayHospitalPricingWithInsurance(card, hospitalData) {
   body.innerHTML = html;
 }
 
+// Highlight one hospital card (from a card or map marker click)
+function selectHospitalCard(hospitalId) {
+  hospitalComparison.querySelectorAll('.hospital-card').forEach(card => {
+    card.classList.toggle('active', card.dataset.hospital === hospitalId);
+  });
+}
+
+// One card per hospital the pricing API returned, in its order
+function renderHospitalCards() {
+  hospitalComparison.innerHTML = '';
+  hospitalPricingData.forEach(hospitalData => {
+    const card = document.createElement('div');
+    card.className = 'hospital-card';
+    card.dataset.hospital = hospitalData.id;
+    card.innerHTML = `
+      <div class="hospital-header">
+        <h3>${hospitalData.hospital}</h3>
+        <p class="hospital-location">📍 ${hospitalData.location || ''}</p>
+      </div>
+      <div class="hospital-body"></div>
+    `;
+    card.addEventListener('click', () => selectHospitalCard(hospitalData.id));
+    hospitalComparison.appendChild(card);
+    displayHospitalPricingWithInsurance(card, hospitalData);
+  });
+}
+
+// Savings on out-of-pocket cost: first hospital vs. the cheapest other one
+function displaySavings() {
+  const first = hospitalPricingData[0];
+  const otherId = currentRanking.find(id => id !== first.id);
+  const other = hospitalPricingData.find(h => h.id === otherId);
+  if (!other) {
+    savingsSummary.style.display = 'none';
+    return;
+  }
+
+  const firstCost = calculatePatientCost(first.total_estimate || 0);
+  const otherCost = calculatePatientCost(other.total_estimate || 0);
+  const patientSavings = firstCost.patientOwes - otherCost.patientOwes;
+  const baseline = patientSavings > 0 ? firstCost : otherCost;
+  const percentSaved = baseline.patientOwes > 0
+    ? ((Math.abs(patientSavings) / baseline.patientOwes) * 100).toFixed(1)
+    : 0;
+  const cheaper = patientSavings > 0 ? other : first;
+
+  savingsText.innerHTML = `
+    <strong>Save $${Math.abs(patientSavings).toLocaleString(undefined, { minimumFractionDigits: 2, maximumFractionDigits: 2 })} 
+    (${percentSaved}%)</strong><br>
+    on your out-of-pocket costs by choosing ${cheaper.hospital}!
+  `;
+  savingsSummary.style.display = 'block';
+}
+
 // Update hospital cards with insurance calculations
 function updateHospitalCardsWithInsurance() {
-  if (hospitalPricingData.barnes_jewish) {
-    displayHospitalPricingWithInsurance(hospital1Card, hospitalPricingData.barnes_jewish);
-  }
-  if (hospitalPricingData.lincoln) {
-    displayHospitalPricingWithInsurance(hospital2Card, hospitalPricingData.lincoln);
-  }
+  renderHospitalCards();
+  displaySavings();
 }
 
 // Update comparison pricing to include insurance
 function loadComparisonPricingWithInsurance() {
+  // Pricing already came back with the classification
+  if (currentComparison) {
+    displayComparison(currentComparison);
+    return;
+  }
+
   fetch(`http://localhost:5001/api/pricing/compare?wound_type=${encodeURIComponent(currentWoundType)}`)
     .then(res => res.json())
-    .then(data => {
-      console.log('Comparison data:', data);
-
-      if (data.comparison && data.comparison.length >= 2) {
-        hospitalPricingData.barnes_jewish = data.comparison[0];
-        hospitalPricingData.lincoln = data.comparison[1];
-
-        displayHospitalPricingWithInsurance(hospital1Card, data.comparison[0]);
-        displayHospitalPricingWithInsurance(hospital2Card, data.comparison[1]);
-
-        // Show savings if available
-        if (data.savings) {
-          const savings = data.savings;
-          const barnes1Cost = calculatePatientCost(data.comparison[0].total_estimate || 0);
-          const lincolnCost = calculatePatientCost(data.comparison[1].total_estimate || 0);
-          const patientSavings = barnes1Cost.patientOwes - lincolnCost.patientOwes;
-          const percentSaved = barnes1Cost.patientOwes > 0
-            ? ((patientSavings / barnes1Cost.patientOwes) * 100).toFixed(1)
-            : 0;
-
-          savingsText.innerHTML = `
-            <strong>Save $${Math.abs(patientSavings).toLocaleString(undefined, { minimumFractionDigits: 2, maximumFractionDigits: 2 })} 
-            (${percentSaved}%)</strong><br>
-            on your out-of-pocket costs by choosing ${savings.cheaper_hospital === 'Lincoln' ? 'Mercy Hospital Lincoln' : 'Barnes Jewish St. Peters'}!
-          `;
-          savingsSummary.style.display = 'block';
-        }
-      }
-    })
+    .then(displayComparison)
     .catch(err => {
       console.error('Error loading comparison:', err);
       alert('Failed to load hospital pricing. Make sure backend is running on localhost:5001');
     });
 }
 
+function displayComparison(data) {
+  console.log('Comparison data:', data);
+
+  if (data.comparison && data.comparison.length) {
+    hospitalPricingData = data.comparison;
+    currentRanking = data.ranking || data.comparison.map(h => h.id);
+    updateHospitalCardsWithInsurance();
+  }
+}
+
 // Search for hospitals
 searchHospitalsBtn.addEventListener('click', () => {
   const zipCode = zipInput.value.trim();
@@ -517,25 +547,10 @@ searchHospitalsBtn.addEventListener('click', () => {
 
 // Reset hospital cards
 function resetHospitalCards() {
-  [hospital1Card, hospital2Card].forEach(card => {
-    card.classList.remove('active');
-    const body = card.querySelector('.hospital-body');
-    body.innerHTML = '<p class="loading-text">Click hospital card to view pricing details...</p>';
-  });
+  hospitalComparison.innerHTML = '<p class="loading-text">Loading hospital pricing...</p>';
   savingsSummary.style.display = 'none';
 }
 
-// Hospital card click handlers
-hospital1Card.addEventListener('click', () => {
-  hospital1Card.classList.add('active');
-  hospital2Card.classList.remove('active');
-});
-
-hospital2Card.addEventListener('click', () => {
-  hospital2Card.classList.add('active');
-  hospital1Card.classList.remove('active');
-});
-
 // Redo button resets the UI
 redoBtn.addEventListener('click', () => {
   preview.style.display = "none";
@@ -548,6 +563,7 @@ redoBtn.addEventListener('click', () => {
   mapSection.style.display = "none";
   insuranceNotice.style.display = "none";
   currentWoundType = '';
+  currentComparison = null;
   detectedInjury.textContent = "-";
   zipInput.value = "";
   mapInitialized = false;
@@ -563,10 +579,8 @@ redoBtn.addEventListener('click', () => {
     copay: 50,
     hasInsurance: true
   };
-  hospitalPricingData = {
-    barnes_jewish: null,
-    lincoln: null
-  };
+  hospitalPricingData = [];
+  currentRanking = [];
   insurancePlan.value = '';
   coveragePercentage.value = 90;
   deductible.value = 500;
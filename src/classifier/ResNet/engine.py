@@ -0,0 +1,169 @@
+"""
+Training engine for the ResNet classifier
+=========================================
+
+Used by train.py. One epoch is `train_one_epoch` + `evaluate`. Between
+epochs, `save_checkpoint` writes everything a resumed run needs: model,
+optimizer, LR scheduler, epoch, best validation accuracy, the
+Python/NumPy/torch RNG states (the DataLoader's shuffle order is drawn from
+torch's RNG), and the run config it belongs to. A crash only loses the
+current epoch; `load_checkpoint` ignores checkpoints of finished runs or of
+another config.
+
+Inside an epoch:
+  - forward passes run under autocast (bfloat16 on CPU and on GPUs that
+    support it). bfloat16 keeps float32's exponent range, so no GradScaler
+    is needed;
+  - gradients can be accumulated over `accum_steps` batches, for a larger
+    effective batch than fits in memory;
+  - inputs and weights can use channels-last layout, which oneDNN and cuDNN
+    convolutions prefer;
+  - loss and accuracy are summed as tensors on the device and read back
+    once per epoch. Per-step `.item()` would block on the device each step;
+  - each epoch reports throughput in images/sec.
+
+Under DistributedDataParallel, accumulation steps skip the gradient
+all-reduce (`no_sync`) until the optimizer step. The sums from
+`train_one_epoch` and `evaluate` are combined across ranks with
+`all_reduce_sum`.
+"""
+
+import os
+import random
+import time
+from contextlib import nullcontext
+import numpy as np
+import torch
+import torch.distributed as dist
+
+
+def autocast(device, enabled):
+    if not enabled:
+        return nullcontext()
+    return torch.autocast(device_type=device.type, dtype=torch.bfloat16)
+
+
+def to_device(images, labels, device, channels_last):
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+    return (images.to(device, memory_format=memory_format, non_blocking=True),
+            labels.to(device, non_blocking=True))
+
+
+def train_one_epoch(model, loader, criterion, optimizer, device,
+                    accum_steps=1, amp=False, channels_last=False):
+    """Returns (summed loss, images seen) as device tensors and seconds"""
+    model.train()
+    running_loss = torch.zeros((), device=device)
+    seen = torch.zeros((), dtype=torch.long, device=device)
+    started = time.perf_counter()
+    optimizer.zero_grad(set_to_none=True)
+    for step, (images, labels) in enumerate(loader, 1):
+        images, labels = to_device(images, labels, device, channels_last)
+        update = step % accum_steps == 0 or step == len(loader)
+        # DDP: only all-reduce gradients on the step that applies them
+        sync = nullcontext() if update or not hasattr(model, "no_sync") else model.no_sync()
+        with sync:
+            with autocast(device, amp):
+                loss = criterion(model(images), labels)
+            (loss / accum_steps).backward()
+        if update:
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+        running_loss += loss.detach() * labels.size(0)
+        seen += labels.size(0)
+    return running_loss, seen, time.perf_counter() - started
+
+
+@torch.no_grad()
+def evaluate(model, loader, device, amp=False, channels_last=False):
+    """Returns (correct, total) as device tensors and seconds"""
+    model.eval()
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    total = torch.zeros((), dtype=torch.long, device=device)
+    started = time.perf_counter()
+    for images, labels in loader:
+        images, labels = to_device(images, labels, device, channels_last)
+        with autocast(device, amp):
+            outputs = model(images)
+        correct += (outputs.argmax(1) == labels).sum()
+        total += labels.size(0)
+    return correct, total, time.perf_counter() - started
+
+
+def all_reduce_sum(*tensors):
+    """Sum tensors across ranks (no-op outside torch.distributed)"""
+    if dist.is_available() and dist.is_initialized():
+        for tensor in tensors:
+            dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tensors
+
+
+def make_scheduler(optimizer, schedule, epochs, warmup_epochs=0):
+    """Per-epoch LR schedule: None (constant) or "cosine", with optional
+    linear warm-up"""
+    if schedule is None:
+        return None
+    if schedule != "cosine":
+        raise ValueError(f"Unknown LR schedule: {schedule}")
+    cosine = torch.optim.lr_scheduler.CosineAnnealingLR(
+        optimizer, T_max=max(epochs - warmup_epochs, 1))
+    if not warmup_epochs:
+        return cosine
+    warmup = torch.optim.lr_scheduler.LinearLR(
+        optimizer, start_factor=0.1, total_iters=warmup_epochs)
+    return torch.optim.lr_scheduler.SequentialLR(
+        optimizer, [warmup, cosine], milestones=[warmup_epochs])
+
+
+def rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def atomic_save(obj, path):
+    """torch.save through a temp file, so a crash never leaves a torn checkpoint"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(path, model, optimizer, scheduler, epoch, best_acc, run=None):
+    atomic_save({
+        "run": run,  # config dict, with the run's total "epochs"
+        "epoch": epoch,  # last completed epoch
+        "best_acc": best_acc,
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "scheduler": scheduler.state_dict() if scheduler is not None else None,
+        "rng": rng_state(),
+    }, path)
+
+
+def load_checkpoint(path, model, optimizer, scheduler, device, run=None):
+    """Restore a checkpoint; returns (next epoch, best accuracy). With `run`,
+    returns None and restores nothing unless the checkpoint was saved by the
+    same run config and still has epochs left."""
+    checkpoint = torch.load(path, map_location=device, weights_only=False)
+    if run is not None and (checkpoint.get("run") != run or checkpoint["epoch"] + 1 >= run["epochs"]):
+        return None
+    model.load_state_dict(checkpoint["model"])
+    optimizer.load_state_dict(checkpoint["optimizer"])
+    if scheduler is not None and checkpoint["scheduler"] is not None:
+        scheduler.load_state_dict(checkpoint["scheduler"])
+    set_rng_state(checkpoint["rng"])
+    return checkpoint["epoch"] + 1, checkpoint["best_acc"]
@@ -0,0 +1,91 @@
+"""
+Export the trained ResNet101 classifier for CPU serving
+=======================================================
+
+Turns the state dict written by train.py into:
+  - TorchScript (traced and frozen)
+  - ONNX (opset 17)
+
+Both take a fixed 3x224x224 input with a dynamic batch dimension, so the
+micro-batching server can feed them any batch size. After exporting, each
+artifact is run on a random batch and compared with the eager model.
+
+Serve them with:
+    RESNET_BACKEND=torchscript python backend/api/resnet_predict.py
+    RESNET_BACKEND=onnx python backend/api/resnet_predict.py
+"""
+
+import os
+import torch
+import torch.nn as nn
+from torchvision import models
+
+# ============== CONFIG ==============
+MODEL_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt"
+OUTPUT_DIR = os.path.dirname(MODEL_PATH)
+NUM_CLASSES = 8
+IMG_SIZE = 224
+FORMATS = ["torchscript", "onnx"]
+ONNX_OPSET = 17
+# ====================================
+
+
+def load_eager_model(model_path=MODEL_PATH, num_classes=NUM_CLASSES):
+    model = models.resnet101(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, num_classes)
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model.eval()
+
+
+def export_torchscript(model, path):
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        # optimize_for_inference() output does not reload; the server applies it
+        traced = torch.jit.freeze(traced)
+    torch.jit.save(traced, path)
+
+
+def export_onnx(model, path):
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    torch.onnx.export(
+        model, example, path,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=ONNX_OPSET,
+    )
+
+
+def check_export(model, fmt, path, batch_size=4):
+    """Largest absolute logit difference between eager and exported model"""
+    inputs = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+    with torch.no_grad():
+        expected = model(inputs)
+        if fmt == "torchscript":
+            actual = torch.jit.load(path)(inputs)
+        else:
+            import onnxruntime as ort
+            session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+            actual = torch.from_numpy(session.run(None, {"input": inputs.numpy()})[0])
+    return (expected - actual).abs().max().item()
+
+
+def main():
+    model = load_eager_model()
+    base = os.path.splitext(os.path.basename(MODEL_PATH))[0]
+    exporters = {
+        "torchscript": (export_torchscript, f"{base}.torchscript.pt"),
+        "onnx": (export_onnx, f"{base}.onnx"),
+    }
+
+    for fmt in FORMATS:
+        export, filename = exporters[fmt]
+        path = os.path.join(OUTPUT_DIR, filename)
+        print(f"📦 Exporting {fmt} → {path}")
+        export(model, path)
+        print(f"✅ {fmt}: max |logit diff| vs eager = {check_export(model, fmt, path):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Frozen-backbone feature cache for ResNet101 head training
+=========================================================
+
+With the backbone frozen, each image's 2048-d pooled feature never changes,
+so it only has to be computed once. `cached_features` runs the backbone
+(everything but `model.fc`) over a dataset and stores the features in a
+memory-mapped float16 array under
+
+    FEATURE_CACHE/<backbone key>/features.npy   (N, 2048)
+    FEATURE_CACHE/<backbone key>/keys.npy       (N,) image hashes, row order
+
+The backbone key hashes the backbone weights and the preprocessing
+transform, and rows are keyed by a hash of the image content (file bytes,
+or pixels for shard datasets). Renaming, regrouping (group.py) or
+re-splitting images therefore reuses their features, and only new images
+go through the backbone. Changing the weights or the transform starts a
+new cache.
+
+`train_head` then fits the linear classifier on the cached features, which
+takes seconds on CPU. See TRAIN_MODE = "head" in train.py.
+"""
+
+import hashlib
+import os
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Subset
+
+HASH_CHUNK = 1 << 20
+
+
+def backbone_key(model, transform):
+    """Hash of every non-fc weight plus the preprocessing"""
+    digest = hashlib.sha256(repr(transform).encode())
+    for name, tensor in model.state_dict().items():
+        if not name.startswith("fc."):
+            digest.update(name.encode())
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def sample_key(dataset, index):
+    """Content hash of one sample: shard pixels, or the image file's bytes"""
+    digest = hashlib.sha256()
+    if hasattr(dataset, "array"):  # shards.ShardDataset
+        digest.update(np.ascontiguousarray(dataset.array(index)).tobytes())
+    else:
+        with open(dataset.samples[index][0], "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cache(cache_dir):
+    """({image hash: row}, features memmap) or ({}, None) if empty"""
+    keys_path = os.path.join(cache_dir, "keys.npy")
+    if not os.path.exists(keys_path):
+        return {}, None
+    keys = np.load(keys_path)
+    features = np.load(os.path.join(cache_dir, "features.npy"), mmap_mode="r")
+    return {key.decode(): row for row, key in enumerate(keys)}, features
+
+
+def save_cache(cache_dir, rows, features, new_keys, new_features):
+    """Append new rows (rewrites the files, then swaps them in)"""
+    keys = sorted(rows, key=rows.get) + new_keys
+    old = 0 if features is None else len(features)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = os.path.join(cache_dir, "features.tmp.npy")
+    merged = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16,
+                                       shape=(len(keys), new_features.shape[1]))
+    if old:
+        merged[:old] = features  # streamed page by page, not loaded whole
+    merged[old:] = new_features
+    merged.flush()
+    del merged
+    os.replace(tmp_path, os.path.join(cache_dir, "features.npy"))
+    np.save(os.path.join(cache_dir, "keys.tmp.npy"), np.array(keys, dtype="S64"))
+    os.replace(os.path.join(cache_dir, "keys.tmp.npy"), os.path.join(cache_dir, "keys.npy"))
+
+
+@torch.no_grad()
+def extract(model, dataset, device, batch_size=64, num_workers=4):
+    """Pooled backbone features of a dataset, (N, 2048) float16"""
+    fc, model.fc = model.fc, nn.Identity()
+    model.eval()
+    try:
+        loader = DataLoader(dataset, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+        return np.concatenate([model(images.to(device)).float().cpu().numpy().astype(np.float16)
+                               for images, _ in loader])
+    finally:
+        model.fc = fc
+
+
+def cached_features(model, dataset, cache_root, transform, device, batch_size=64, num_workers=4):
+    """(features, labels) tensors for every sample of `dataset`, computing
+    only the ones missing from the cache"""
+    cache_dir = os.path.join(cache_root, backbone_key(model, transform))
+    rows, features = load_cache(cache_dir)
+    keys = [sample_key(dataset, i) for i in range(len(dataset))]
+
+    missing, seen = [], set()
+    for i, key in enumerate(keys):
+        if key not in rows and key not in seen:
+            missing.append(i)
+            seen.add(key)
+    print(f"🧊 Feature cache {cache_dir}: {len(keys) - len(missing)} cached, "
+          f"{len(missing)} to extract")
+    if missing:
+        new_features = extract(model, Subset(dataset, missing), device, batch_size, num_workers)
+        save_cache(cache_dir, rows, features, [keys[i] for i in missing], new_features)
+        rows, features = load_cache(cache_dir)
+
+    x = torch.from_numpy(np.stack([features[rows[key]] for key in keys]).astype(np.float32))
+    y = torch.tensor(dataset.targets, dtype=torch.long)
+    return x, y
+
+
+def train_head(head, train_x, train_y, val_x, val_y, epochs=100, lr=1e-3, batch_size=256):
+    """Fit the linear classifier on cached features; keeps the weights with
+    the best validation accuracy"""
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr)
+    criterion = nn.CrossEntropyLoss()
+    device = next(head.parameters()).device
+    train_x, train_y = train_x.to(device), train_y.to(device)
+    val_x, val_y = val_x.to(device), val_y.to(device)
+    best_acc, best_state = -1.0, None
+
+    for epoch in range(epochs):
+        head.train()
+        running_loss, order = 0.0, torch.randperm(len(train_x), device=device)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            optimizer.zero_grad()
+            loss = criterion(head(train_x[batch]), train_y[batch])
+            loss.backward()
+            optimizer.step()
+            running_loss += loss.item() * len(batch)
+
+        head.eval()
+        with torch.no_grad():
+            val_acc = 100 * (head(val_x).argmax(1) == val_y).float().mean().item()
+        if val_acc > best_acc:
+            best_acc = val_acc
+            best_state = {k: v.detach().clone() for k, v in head.state_dict().items()}
+        if (epoch + 1) % 10 == 0 or epoch == epochs - 1:
+            print(f"Head epoch [{epoch+1}/{epochs}] Loss: {running_loss/len(train_x):.4f} "
+                  f"| Val Acc: {val_acc:.2f}%")
+
+    head.load_state_dict(best_state)
+    print(f"✅ Head trained, best Val Acc: {best_acc:.2f}%")
+    return best_acc
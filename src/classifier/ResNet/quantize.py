@@ -0,0 +1,155 @@
+"""
+INT8 post-training quantization for the ResNet101 wound classifier
+==================================================================
+
+Two modes:
+  - "static":  FX graph mode static quantization. Observers are calibrated
+               on images from the val/ split written by
+               src/data_manipulation/split.py; convs, linears and
+               activations all run in int8.
+  - "dynamic": dynamic quantization of nn.Linear only. No calibration is
+               needed, but for ResNet that only covers the final fc layer,
+               so expect little speedup.
+
+The quantized model is traced to TorchScript and saved next to the fp32
+weights as `<name>.int8.pt`. Then fp32 and int8 are both evaluated on
+test/, and accuracy, file size and batch-1 CPU latency are written to
+`<name>.int8.json`.
+
+Serve it with:
+    RESNET_BACKEND=int8 python backend/api/resnet_predict.py
+"""
+
+import copy
+import json
+import os
+import time
+import torch
+import torch.nn as nn
+from torchvision import datasets, models, transforms
+from torch.utils.data import DataLoader
+
+# ============== CONFIG ==============
+MODEL_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt"
+DATA_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"
+OUTPUT_PATH = os.path.splitext(MODEL_PATH)[0] + ".int8.pt"
+REPORT_PATH = os.path.splitext(MODEL_PATH)[0] + ".int8.json"
+NUM_CLASSES = 8
+MODE = "static"  # "static" or "dynamic"
+ENGINE = "x86"  # quantized kernel backend ("x86", "fbgemm" or "qnnpack" on ARM)
+BATCH_SIZE = 32
+CALIBRATION_BATCHES = 20  # val/ batches used to calibrate observers
+LATENCY_RUNS = 20
+# ====================================
+
+# Same preprocessing as training and serving
+transform = transforms.Compose([
+    transforms.Resize((224, 224)),
+    transforms.ToTensor(),
+    transforms.Normalize([0.485, 0.456, 0.406],
+                         [0.229, 0.224, 0.225])
+])
+
+
+def load_fp32_model():
+    model = models.resnet101(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location="cpu"))
+    return model.eval()
+
+
+def quantize_static(model, calibration_loader):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    example_inputs = (torch.randn(1, 3, 224, 224),)
+    prepared = prepare_fx(copy.deepcopy(model),
+                          get_default_qconfig_mapping(ENGINE), example_inputs)
+    with torch.no_grad():
+        for i, (images, _) in enumerate(calibration_loader):
+            if i >= CALIBRATION_BATCHES:
+                break
+            prepared(images)
+    return convert_fx(prepared)
+
+
+def quantize_dynamic(model):
+    return torch.ao.quantization.quantize_dynamic(
+        copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+
+
+def evaluate(model, loader):
+    correct, total = 0, 0
+    with torch.no_grad():
+        for images, labels in loader:
+            _, preds = torch.max(model(images), 1)
+            correct += (preds == labels).sum().item()
+            total += labels.size(0)
+    return 100 * correct / total if total else 0.0
+
+
+def latency_ms(model, runs=LATENCY_RUNS):
+    """Mean batch-1 CPU latency after a few warm-up passes"""
+    x = torch.randn(1, 3, 224, 224)
+    with torch.no_grad():
+        for _ in range(3):
+            model(x)
+        start = time.perf_counter()
+        for _ in range(runs):
+            model(x)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    torch.backends.quantized.engine = ENGINE
+    val_loader = DataLoader(datasets.ImageFolder(f"{DATA_DIR}/val", transform=transform),
+                            batch_size=BATCH_SIZE, shuffle=True, num_workers=4)
+    test_loader = DataLoader(datasets.ImageFolder(f"{DATA_DIR}/test", transform=transform),
+                             batch_size=BATCH_SIZE, shuffle=False, num_workers=4)
+
+    fp32 = load_fp32_model()
+    print(f"🔧 Quantizing ({MODE}, engine={ENGINE})...")
+    if MODE == "static":
+        int8 = quantize_static(fp32, val_loader)
+    elif MODE == "dynamic":
+        int8 = quantize_dynamic(fp32)
+    else:
+        raise ValueError(f"Unknown MODE: {MODE}")
+
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(int8, torch.randn(1, 3, 224, 224)))
+    torch.jit.save(scripted, OUTPUT_PATH)
+    print(f"💾 Saved quantized model to {OUTPUT_PATH}")
+
+    print("📊 Evaluating on test/ ...")
+    report = {
+        "mode": MODE,
+        "engine": ENGINE,
+        "calibration_images": min(CALIBRATION_BATCHES * BATCH_SIZE, len(val_loader.dataset)) if MODE == "static" else 0,
+        "fp32": {
+            "test_accuracy": evaluate(fp32, test_loader),
+            "size_mb": os.path.getsize(MODEL_PATH) / 2**20,
+            "latency_ms": latency_ms(fp32),
+        },
+        "int8": {
+            "test_accuracy": evaluate(scripted, test_loader),
+            "size_mb": os.path.getsize(OUTPUT_PATH) / 2**20,
+            "latency_ms": latency_ms(scripted),
+        },
+    }
+    report["accuracy_delta"] = report["int8"]["test_accuracy"] - report["fp32"]["test_accuracy"]
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("-" * 60)
+    print(f"{'':10s} {'Test Acc':>10} {'Size (MB)':>10} {'Latency (ms)':>14}")
+    for name in ("fp32", "int8"):
+        r = report[name]
+        print(f"{name:10s} {r['test_accuracy']:9.2f}% {r['size_mb']:10.1f} {r['latency_ms']:14.1f}")
+    print("-" * 60)
+    print(f"Accuracy delta (int8 - fp32): {report['accuracy_delta']:+.2f} points")
+    print(f"Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,78 @@
+import os
+import sys
+from datetime import timedelta
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 from torchvision import datasets, models, transforms
-from torch.utils.data import DataLoader
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, Subset
+from torch.utils.data.distributed import DistributedSampler
+from engine import (all_reduce_sum, evaluate, load_checkpoint, make_scheduler,
+                    save_checkpoint, train_one_epoch, atomic_save)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data_manipulation"))
 
 # ============== CONFIG ==============
 DATA_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"
+MANIFEST = None  # split.py's manifest.csv; if set, read instead of DATA_DIR/train, val
+SHARD_DIR = None  # shards.py output (RESIZE="squash"); if set, read instead of both
 BATCH_SIZE = 32
 EPOCHS = 10
 LR = 1e-4
 NUM_CLASSES = 8
+# "folder": train/ already holds augmented copies (augment.py before split.py).
+# "online": train/ holds only original photos; augment.py's pipeline is applied
+# per sample and each class is oversampled to TARGET_COUNT virtually. Needs a
+# split of the un-augmented folder (an "_augN" tree is refused).
+TRAIN_SOURCE = "folder"
+TARGET_COUNT = 500  # per-class samples per epoch for "online"
+# "full": fine-tune the whole network for EPOCHS.
+# "head": freeze the backbone, cache its pooled features once under
+# FEATURE_CACHE (reused across runs, splits and regroupings) and train only
+# model.fc from them; then fine-tune everything for FINETUNE_EPOCHS (0 = skip).
+TRAIN_MODE = "full"
+FEATURE_CACHE = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/feature_cache"
+HEAD_EPOCHS = 100
+HEAD_LR = 1e-3
+FINETUNE_EPOCHS = 0
+OUTPUT_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt"
+CHECKPOINT_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/checkpoints"
+# Continue from CHECKPOINT_DIR/last.pt if it is an unfinished run with the same
+# EPOCHS, TRAIN_MODE, TRAIN_SOURCE and data (otherwise it is overwritten).
+# Finished runs move it to completed.pt. "head" runs always start over, since
+# their head stage has just been retrained.
+RESUME = True
+CHECKPOINT_EVERY = 1  # epochs between last.pt checkpoints (best.pt on every improvement)
+LR_SCHEDULE = "cosine"  # None for a constant LR
+WARMUP_EPOCHS = 1
+ACCUM_STEPS = 1  # effective batch = BATCH_SIZE * ACCUM_STEPS
+NUM_WORKERS = 4
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+AMP = DEVICE.type == "cpu" or torch.cuda.is_bf16_supported()  # bfloat16 autocast
+CHANNELS_LAST = True
+# Distributed data parallel (CPU, gloo) when launched with torchrun, e.g.
+#   one box:   torchrun --nproc_per_node=4 src/classifier/ResNet/train.py
+#   two boxes: torchrun --nnodes=2 --node_rank=<0|1> --nproc_per_node=4 \
+#                  --master_addr=<node 0 IP> --master_port=29500 src/classifier/ResNet/train.py
+# BATCH_SIZE is per process. Rank 0 writes checkpoints; resuming needs
+# CHECKPOINT_DIR on storage every node can read.
+DIST_BACKEND = "gloo"
+SEED = 0  # DistributedSampler shuffle seed (same on every rank)
+DIST_TIMEOUT_MINUTES = 120  # other ranks wait this long for rank 0's head stage
 # ====================================
 
+DISTRIBUTED = int(os.environ.get("WORLD_SIZE", 1)) > 1
+if DISTRIBUTED:
+    dist.init_process_group(DIST_BACKEND, timeout=timedelta(minutes=DIST_TIMEOUT_MINUTES))
+    DEVICE = torch.device("cpu")
+    # torchrun defaults OMP_NUM_THREADS to 1; split the cores between local ranks instead
+    if os.environ.get("OMP_NUM_THREADS", "1") == "1":
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // int(os.environ["LOCAL_WORLD_SIZE"])))
+RANK = dist.get_rank() if DISTRIBUTED else 0
+WORLD_SIZE = dist.get_world_size() if DISTRIBUTED else 1
+IS_MAIN = RANK == 0
+
 # Data augmentation and normalization
 transform = transforms.Compose([
     transforms.Resize((224, 224)),  # make all images uniform
@@ -20,52 +81,133 @@ transform = transforms.Compose([
                          [0.229, 0.224, 0.225])  # ResNet expects normalized input
 ])
 
+
+
+def split_dataset(split):
+    """Un-augmented dataset of one split from SHARD_DIR, MANIFEST or DATA_DIR"""
+    if SHARD_DIR:
+        from shards import ShardDataset
+        return ShardDataset(SHARD_DIR, split, transform=transform)
+    if MANIFEST:
+        from manifest import ManifestDataset
+        return ManifestDataset(MANIFEST, split, transform=transform)
+    return datasets.ImageFolder(f"{DATA_DIR}/{split}", transform=transform)
+
+
 # Datasets and loaders
-train_ds = datasets.ImageFolder(
-    f"{DATA_DIR}/train", transform=transform)
-val_ds = datasets.ImageFolder(f"{DATA_DIR}/val", transform=transform)
-train_loader = DataLoader(
-    train_ds, batch_size=BATCH_SIZE, shuffle=True, num_workers=4)
-val_loader = DataLoader(val_ds, batch_size=BATCH_SIZE,
-                        shuffle=False, num_workers=4)
+if TRAIN_SOURCE == "online":
+    from online_augment import OnlineAugmentDataset
+    train_ds = OnlineAugmentDataset(
+        SHARD_DIR or MANIFEST or f"{DATA_DIR}/train", target_count=TARGET_COUNT, transform=transform)
+    if IS_MAIN:
+        for cls, (originals, samples) in train_ds.summary().items():
+            print(f"  {cls}: {originals} originals → {samples} samples/epoch")
+else:
+    train_ds = split_dataset("train")
+val_ds = split_dataset("val")
+if DISTRIBUTED:
+    # Each rank trains on its own 1/WORLD_SIZE of every epoch and validates
+    # on a disjoint slice of val (no padding, so summed counts are exact)
+    train_sampler = DistributedSampler(train_ds, shuffle=True, seed=SEED)
+    train_loader = DataLoader(train_ds, batch_size=BATCH_SIZE, sampler=train_sampler,
+                              num_workers=NUM_WORKERS)
+    val_loader = DataLoader(Subset(val_ds, range(RANK, len(val_ds), WORLD_SIZE)),
+                            batch_size=BATCH_SIZE, shuffle=False, num_workers=NUM_WORKERS)
+else:
+    train_loader = DataLoader(
+        train_ds, batch_size=BATCH_SIZE, shuffle=True, num_workers=NUM_WORKERS)
+    val_loader = DataLoader(val_ds, batch_size=BATCH_SIZE,
+                            shuffle=False, num_workers=NUM_WORKERS)
 
 # Model
 model = models.resnet101(weights="IMAGENET1K_V2")
 model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
 model = model.to(DEVICE)
 
-# Loss and optimizer
+# Head-only training on cached backbone features (no augmentation: every
+# original train image once, as the frozen backbone sees it). Under DDP only
+# rank 0 does this; wrapping the model below broadcasts its weights.
+head_acc = -1.0
+if TRAIN_MODE == "head" and IS_MAIN:
+    from feature_cache import cached_features, train_head
+    train_x, train_y = cached_features(model, split_dataset("train"), FEATURE_CACHE, transform, DEVICE)
+    val_x, val_y = cached_features(model, val_ds, FEATURE_CACHE, transform, DEVICE)
+    head_acc = train_head(model.fc, train_x, train_y, val_x, val_y, epochs=HEAD_EPOCHS, lr=HEAD_LR)
+if TRAIN_MODE == "head":
+    EPOCHS = FINETUNE_EPOCHS
+
+# Loss, optimizer and LR schedule
 criterion = nn.CrossEntropyLoss()
 optimizer = torch.optim.Adam(model.parameters(), lr=LR)
+scheduler = make_scheduler(optimizer, LR_SCHEDULE, EPOCHS, min(WARMUP_EPOCHS, max(EPOCHS - 1, 0)))
+if CHANNELS_LAST:
+    model = model.to(memory_format=torch.channels_last)
+
+# Resume
+last_path = os.path.join(CHECKPOINT_DIR, "last.pt")
+best_path = os.path.join(CHECKPOINT_DIR, "best.pt")
+run = {"epochs": EPOCHS, "train_mode": TRAIN_MODE, "train_source": TRAIN_SOURCE,
+       "data": SHARD_DIR or MANIFEST or DATA_DIR}
+start_epoch, best_acc = 0, head_acc
+resumed = None
+# Every rank decides from the same file, so they all start at the same epoch
+if RESUME and TRAIN_MODE != "head" and os.path.exists(last_path):
+    resumed = load_checkpoint(last_path, model, optimizer, scheduler, DEVICE, run)
+    if IS_MAIN and resumed is None:
+        print(f"⏭️ Ignoring {last_path}: finished, or saved with another config")
+if resumed is not None:
+    start_epoch, best_acc = resumed
+    if IS_MAIN:
+        print(f"🔁 Resumed from {last_path} at epoch {start_epoch + 1} (best Val Acc {best_acc:.2f}%)")
+elif head_acc >= 0:  # fine-tuning has to beat the head alone to replace it
+    atomic_save(model.state_dict(), best_path)
+
+net = model  # unwrapped, for state dicts
+if DISTRIBUTED:
+    model = DistributedDataParallel(model)  # broadcasts rank 0's weights
+    if IS_MAIN:
+        print(f"🌐 DDP over {WORLD_SIZE} processes ({DIST_BACKEND}), "
+              f"{torch.get_num_threads()} threads each")
 
 # Training loop
-for epoch in range(EPOCHS):
-    model.train()
-    running_loss = 0.0
-    for images, labels in train_loader:
-        images, labels = images.to(DEVICE), labels.to(DEVICE)
-        optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-        running_loss += loss.item()
-
-    # Validation
-    model.eval()
-    correct, total = 0, 0
-    with torch.no_grad():
-        for images, labels in val_loader:
-            images, labels = images.to(DEVICE), labels.to(DEVICE)
-            outputs = model(images)
-            _, preds = torch.max(outputs, 1)
-            correct += (preds == labels).sum().item()
-            total += labels.size(0)
-
-    val_acc = 100 * correct / total
-    print(
-        f"Epoch [{epoch+1}/{EPOCHS}] Loss: {running_loss/len(train_loader):.4f} | Val Acc: {val_acc:.2f}%")
-
-torch.save(model.state_dict(
-), "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output/ResNet101/resnet101_8cls.pt")
-print("Training complete. Model saved as resnet101_8cls.pt")
+for epoch in range(start_epoch, EPOCHS):
+    if TRAIN_SOURCE == "online":
+        train_ds.set_epoch(epoch)  # fresh augmentations every epoch
+    if DISTRIBUTED:
+        train_sampler.set_epoch(epoch)  # new shuffle, same on every rank
+    lr = optimizer.param_groups[0]["lr"]
+    loss_sum, seen, train_seconds = train_one_epoch(
+        model, train_loader, criterion, optimizer, DEVICE, ACCUM_STEPS, AMP, CHANNELS_LAST)
+    if scheduler is not None:
+        scheduler.step()
+
+    # Validation (counts summed over ranks, so every rank sees the same accuracy)
+    correct, total, val_seconds = evaluate(model, val_loader, DEVICE, AMP, CHANNELS_LAST)
+    all_reduce_sum(loss_sum, seen, correct, total)
+    train_loss = loss_sum.item() / max(seen.item(), 1)
+    val_acc = 100 * correct.item() / max(total.item(), 1)
+    if IS_MAIN:
+        print(
+            f"Epoch [{epoch+1}/{EPOCHS}] Loss: {train_loss:.4f} | Val Acc: {val_acc:.2f}% | "
+            f"{seen.item() / train_seconds:.1f} img/s train, {total.item() / val_seconds:.1f} img/s val | "
+            f"LR {lr:.2e}")
+
+    if val_acc > best_acc:
+        best_acc = val_acc
+        if IS_MAIN:
+            atomic_save(net.state_dict(), best_path)
+            print(f"  ⭐ New best, saved {best_path}")
+    if IS_MAIN and ((epoch + 1) % CHECKPOINT_EVERY == 0 or epoch + 1 == EPOCHS):
+        save_checkpoint(last_path, net, optimizer, scheduler, epoch, best_acc, run)
+
+# The serving path gets the best-on-val weights, written once at the end so
+# the prediction services' weight watcher doesn't hot-swap mid-training
+if IS_MAIN:
+    if best_acc >= 0 and os.path.exists(best_path):
+        net.load_state_dict(torch.load(best_path, map_location=DEVICE))
+    atomic_save(net.state_dict(), OUTPUT_PATH)
+    if os.path.exists(last_path):  # the next run starts fresh instead of resuming
+        os.replace(last_path, os.path.join(CHECKPOINT_DIR, "completed.pt"))
+    print(f"Training complete. Model saved as {OUTPUT_PATH} (best Val Acc: {best_acc:.2f}%)")
+if DISTRIBUTED:
+    dist.destroy_process_group()
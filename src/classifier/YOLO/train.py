@@ -1,20 +1,59 @@
 from datetime import datetime
 from ultralytics import YOLO
 import os
+import shutil
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data_manipulation"))
+from manifest import materialize, read_manifest
+from shards import export_folder
 
 # ==== CONFIGURATION ====
 MODEL_PATH = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/weights/yolov8n-cls.pt"
 # ======================
 DATA_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"
 # ^ dataset root containing train/, val/, test/
-PROJECT_DIR = "output"
+MANIFEST = None  # split.py's manifest.csv; if set, train from it instead of DATA_DIR
+LINK_DIR = "output/manifest_dataset"  # symlinked train/val/test tree built from MANIFEST
+# shards.py output; if set, train from it. Pack with RESIZE="crop" (ultralytics'
+# eval transform), which limits train-time RandomResizedCrop to the center square
+SHARD_DIR = None
+EXPORT_DIR = "output/shard_dataset"  # pre-resized PNG tree exported from SHARD_DIR
+CACHE = False  # ultralytics image cache: False, "ram" or "disk" (decoded .npy next to images)
+# test.py and evaluate.py read {PROJECT_DIR}/train/weights/best.pt
+PROJECT_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output"
 EPOCHS = 10
 IMG_SIZE = 224
 BATCH = 32
+DEVICE = None  # None = auto; GPU ids like "0,1,2,3" make ultralytics run its own DDP
 # ========================
 
 os.environ["WANDB_MODE"] = "disabled"
 
+# ultralytics launches DDP itself, and only across GPUs: it can't join a
+# torchrun job, and has no multi-process CPU mode
+if int(os.environ.get("WORLD_SIZE", 1)) > 1:
+    sys.exit("[ERROR] YOLO training can't run under torchrun. Set DEVICE to GPU ids "
+             "for multi-GPU DDP, or use ResNet/train.py for multi-CPU DDP.")
+
+# ultralytics only reads class folders, so point symlinks at the manifest's images
+if MANIFEST:
+    shutil.rmtree(LINK_DIR, ignore_errors=True)  # drop links from a previous split
+    count = materialize(read_manifest(MANIFEST), LINK_DIR, "symlink")
+    print(f"[INFO] Linked {count} images from {MANIFEST} into {LINK_DIR}")
+    DATA_DIR = LINK_DIR
+
+# ultralytics can't read the shards either: export them as small pre-resized
+# PNGs, and let its own cache keep them decoded after the first epoch. The
+# export (and that cache) is reused until the shards are repacked.
+if SHARD_DIR:
+    if export_folder(SHARD_DIR, EXPORT_DIR):
+        print(f"[INFO] Exported {SHARD_DIR} to {EXPORT_DIR}")
+    else:
+        print(f"[INFO] Reusing {EXPORT_DIR} (exported from the current {SHARD_DIR})")
+    DATA_DIR = EXPORT_DIR
+    CACHE = CACHE or "disk"
+
 # Load YOLO classification model
 model = YOLO(MODEL_PATH)
 
@@ -29,6 +68,8 @@ model.train(
     epochs=EPOCHS,
     imgsz=IMG_SIZE,
     batch=BATCH,
+    device=DEVICE,
+    cache=CACHE,
     resume=False,
 )
 
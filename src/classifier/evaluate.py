@@ -0,0 +1,284 @@
+"""
+Offline evaluation of saved wound classifiers
+=============================================
+
+Runs every model in MODELS over one split (default test/) and writes a JSON
+report for choosing a production model on both accuracy and cost.
+
+Supported kinds:
+    "resnet"       state dict from ResNet/train.py (eager ResNet101)
+    "torchscript"  ResNet/export.py TorchScript
+    "onnx"         ResNet/export.py ONNX (onnxruntime, CPU)
+    "int8"         ResNet/quantize.py quantized TorchScript
+    "yolo"         ultralytics classification weights (YOLO/train.py best.pt)
+
+Per model:
+  - accuracy, macro F1, confusion matrix (rows = true class, columns =
+    predicted), and per-class precision / recall / F1 / support;
+  - calibration: expected calibration error (ECE) of the top-1 confidence
+    over ECE_BINS bins, and negative log-likelihood;
+  - cost: latency at each of BATCH_SIZES, from decoded images to class
+    probabilities. That includes preprocessing, like the prediction
+    services. Reported as mean / p50 / p95 / p99 ms per batch and
+    images/sec.
+
+Class indices are matched to the split by class name. ResNet outputs are
+named by the training classes: CLASSES, or else the sorted train/ folder
+names (like ImageFolder) or every label of the manifest (like
+ManifestDataset), so a split missing a class still lines up. The head size
+comes from the model itself (train.py's NUM_CLASSES may exceed the class
+count; extra outputs are dropped). YOLO models carry their names. Macro F1 averages over the
+classes present in the split. Missing model files are skipped with a
+warning.
+
+Usage:
+    python src/classifier/evaluate.py
+"""
+
+import json
+import os
+import sys
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision import datasets, models, transforms
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_manipulation"))
+
+# ============== CONFIG ==============
+DATA_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"
+MANIFEST = None  # split.py's manifest.csv; used instead of DATA_DIR if set
+SPLIT = "test"
+CLASSES = None  # ResNet training class order; None = train/ folders or manifest labels
+OUTPUT_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/output"
+YOLO_PROJECT_DIR = OUTPUT_DIR  # PROJECT_DIR of YOLO/train.py and YOLO/test.py
+MODELS = [
+    {"name": "resnet101", "kind": "resnet", "path": f"{OUTPUT_DIR}/ResNet101/resnet101_8cls.pt"},
+    {"name": "resnet101-torchscript", "kind": "torchscript", "path": f"{OUTPUT_DIR}/ResNet101/resnet101_8cls.torchscript.pt"},
+    {"name": "resnet101-onnx", "kind": "onnx", "path": f"{OUTPUT_DIR}/ResNet101/resnet101_8cls.onnx"},
+    {"name": "resnet101-int8", "kind": "int8", "path": f"{OUTPUT_DIR}/ResNet101/resnet101_8cls.int8.pt"},
+    {"name": "yolov8n-cls", "kind": "yolo", "path": f"{YOLO_PROJECT_DIR}/train/weights/best.pt"},
+]
+REPORT_PATH = f"{OUTPUT_DIR}/evaluation.json"
+IMG_SIZE = 224
+EVAL_BATCH_SIZE = 32
+BATCH_SIZES = [1, 8, 32]  # latency / throughput measured at each
+LATENCY_RUNS = 30  # timed batches per batch size (after WARMUP_RUNS)
+WARMUP_RUNS = 3
+ECE_BINS = 15
+THREADS = os.cpu_count() or 1
+QUANTIZED_ENGINE = "x86"  # "qnnpack" on ARM
+# ====================================
+
+# Same preprocessing as ResNet training and serving
+resnet_transform = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize([0.485, 0.456, 0.406],
+                         [0.229, 0.224, 0.225])
+])
+
+
+# ==== DATA ====
+def training_classes():
+    """Class names in the order the ResNet trainer indexed them"""
+    if CLASSES:
+        return list(CLASSES)
+    if MANIFEST:
+        from manifest import manifest_classes, read_manifest
+        return manifest_classes(read_manifest(MANIFEST))  # every split's labels
+    train_dir = f"{DATA_DIR}/train"
+    return sorted(d for d in os.listdir(train_dir) if os.path.isdir(os.path.join(train_dir, d)))
+
+
+def load_split():
+    """(training classes, [(path, class index)]) of SPLIT"""
+    classes = training_classes()
+    if MANIFEST:
+        from manifest import read_manifest
+        rows = read_manifest(MANIFEST, SPLIT)
+        unknown = sorted({row["label"] for row in rows} - set(classes))
+        if unknown:
+            raise ValueError(f"{SPLIT} has classes the models were not trained on: {unknown}")
+        return classes, [(row["path"], classes.index(row["label"])) for row in rows]
+    dataset = datasets.ImageFolder(f"{DATA_DIR}/{SPLIT}")
+    unknown = sorted(set(dataset.classes) - set(classes))
+    if unknown:
+        raise ValueError(f"{SPLIT} has classes the models were not trained on: {unknown}")
+    return classes, [(path, classes.index(dataset.classes[label])) for path, label in dataset.samples]
+
+
+def open_rgb(path):
+    with open(path, "rb") as f:
+        return Image.open(f).convert("RGB")
+
+
+# ==== MODELS ====
+# Each loader returns (predict, class names): predict maps a list of PIL
+# images to an (N, classes) array of probabilities
+def load_resnet(kind, path, classes):
+    if kind == "resnet":
+        state = torch.load(path, map_location="cpu")
+        model = models.resnet101(weights=None)
+        model.fc = nn.Linear(model.fc.in_features, state["fc.weight"].shape[0])
+        model.load_state_dict(state)
+        forward = model.eval()
+    elif kind == "torchscript":
+        forward = torch.jit.optimize_for_inference(torch.jit.load(path, map_location="cpu").eval())
+    elif kind == "int8":
+        torch.backends.quantized.engine = QUANTIZED_ENGINE
+        forward = torch.jit.load(path, map_location="cpu").eval()
+    elif kind == "onnx":
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = THREADS
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+        def forward(batch):
+            return torch.from_numpy(session.run(None, {"input": batch.numpy()})[0])
+    else:
+        raise ValueError(f"Unknown model kind: {kind}")
+
+    @torch.inference_mode()
+    def predict(images):
+        batch = torch.stack([resnet_transform(image) for image in images])
+        return torch.softmax(forward(batch).float(), dim=1).numpy()
+
+    # Name the outputs by training class; unused trailing outputs get placeholders
+    outputs = predict([Image.new("RGB", (IMG_SIZE, IMG_SIZE))]).shape[1]
+    if outputs < len(classes):
+        raise ValueError(f"Model has {outputs} outputs for {len(classes)} training classes")
+    return predict, list(classes) + [f"<unused {i}>" for i in range(len(classes), outputs)]
+
+
+def load_yolo(path):
+    from ultralytics import YOLO
+    model = YOLO(path)
+
+    def predict(images):
+        results = model.predict(images, imgsz=IMG_SIZE, verbose=False)
+        return np.stack([result.probs.data.float().cpu().numpy() for result in results])
+    return predict, [model.names[i] for i in range(len(model.names))]
+
+
+def load_model(spec, classes):
+    if spec["kind"] == "yolo":
+        return load_yolo(spec["path"])
+    return load_resnet(spec["kind"], spec["path"], classes)
+
+
+# ==== METRICS ====
+def classification_metrics(probs, labels, classes):
+    preds = probs.argmax(1)
+    n = len(classes)
+    confusion = np.bincount(labels * n + preds, minlength=n * n).reshape(n, n)
+    per_class = {}
+    for i, cls in enumerate(classes):
+        tp = confusion[i, i]
+        precision = tp / confusion[:, i].sum() if confusion[:, i].sum() else 0.0
+        recall = tp / confusion[i].sum() if confusion[i].sum() else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[cls] = {"precision": round(float(precision), 4), "recall": round(float(recall), 4),
+                          "f1": round(float(f1), 4), "support": int(confusion[i].sum())}
+
+    # ECE: |accuracy - mean confidence| per confidence bin, weighted by bin size
+    confidence = probs.max(1)
+    correct = preds == labels
+    bins = np.minimum((confidence * ECE_BINS).astype(int), ECE_BINS - 1)
+    ece = sum(abs(correct[bins == b].mean() - confidence[bins == b].mean()) * (bins == b).mean()
+              for b in range(ECE_BINS) if (bins == b).any())
+    nll = -np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, None)).mean()
+
+    return {
+        "accuracy": round(float(correct.mean()), 4),
+        "macro_f1": round(float(np.mean([m["f1"] for m in per_class.values() if m["support"]])), 4),
+        "ece": round(float(ece), 4),
+        "nll": round(float(nll), 4),
+        "per_class": per_class,
+        "confusion_matrix": confusion.tolist(),
+    }
+
+
+def benchmark(predict, images):
+    """Per-batch latency percentiles and images/sec at each of BATCH_SIZES"""
+    results = {}
+    for batch_size in BATCH_SIZES:
+        batch = [images[i % len(images)] for i in range(batch_size)]
+        for _ in range(WARMUP_RUNS):
+            predict(batch)
+        times = []
+        for _ in range(LATENCY_RUNS):
+            started = time.perf_counter()
+            predict(batch)
+            times.append((time.perf_counter() - started) * 1000)
+        times = np.array(times)
+        results[str(batch_size)] = {
+            "images_per_sec": round(float(batch_size * 1000 / times.mean()), 1),
+            "mean_ms": round(float(times.mean()), 2),
+            "p50_ms": round(float(np.percentile(times, 50)), 2),
+            "p95_ms": round(float(np.percentile(times, 95)), 2),
+            "p99_ms": round(float(np.percentile(times, 99)), 2),
+        }
+    return results
+
+
+# ==== MAIN ====
+def evaluate_model(spec, classes, samples, latency_images):
+    predict, model_classes = load_model(spec, classes)
+    missing = sorted(set(classes) - set(model_classes))
+    if missing:
+        raise ValueError(f"Model has no output for classes {missing}")
+    # Reorder the model's outputs to the split's class order
+    columns = [model_classes.index(cls) for cls in classes]
+
+    probs = []
+    for start in range(0, len(samples), EVAL_BATCH_SIZE):
+        images = [open_rgb(path) for path, _ in samples[start:start + EVAL_BATCH_SIZE]]
+        probs.append(predict(images)[:, columns])
+    probs = np.concatenate(probs)
+    # Renormalize if the model has extra classes (all-zero rows stay zero)
+    probs /= np.clip(probs.sum(1, keepdims=True), 1e-12, None)
+    labels = np.array([label for _, label in samples])
+
+    report = {"kind": spec["kind"], "path": spec["path"],
+              "size_mb": round(os.path.getsize(spec["path"]) / 2**20, 1)}
+    report.update(classification_metrics(probs, labels, classes))
+    report["latency"] = benchmark(predict, latency_images)
+    return report
+
+
+def main():
+    torch.set_num_threads(THREADS)
+    classes, samples = load_split()
+    print(f"📂 {SPLIT}: {len(samples)} images, {len(classes)} classes")
+    latency_images = [open_rgb(path) for path, _ in samples[:max(BATCH_SIZES)]]
+
+    reports = {}
+    for spec in MODELS:
+        if not os.path.exists(spec["path"]):
+            print(f"⚠️ Skipping {spec['name']}: {spec['path']} not found")
+            continue
+        print(f"🔍 Evaluating {spec['name']} ({spec['kind']})...")
+        reports[spec["name"]] = evaluate_model(spec, classes, samples, latency_images)
+
+    os.makedirs(os.path.dirname(os.path.abspath(REPORT_PATH)), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump({"split": SPLIT, "images": len(samples), "classes": classes,
+                   "threads": THREADS, "models": reports}, f, indent=2)
+
+    batch_columns = "".join(f"{f'img/s@{b}':>11}" for b in BATCH_SIZES)
+    print("-" * (56 + len(batch_columns)))
+    print(f"{'Model':24s} {'Acc':>7} {'F1':>7} {'ECE':>7} {'p95@1 ms':>9}{batch_columns}")
+    print("-" * (56 + len(batch_columns)))
+    for name, r in reports.items():
+        rates = "".join(f"{r['latency'][str(b)]['images_per_sec']:11.1f}" for b in BATCH_SIZES)
+        p95 = r["latency"][str(BATCH_SIZES[0])]["p95_ms"]
+        print(f"{name:24s} {r['accuracy']:7.3f} {r['macro_f1']:7.3f} {r['ece']:7.3f} {p95:9.1f}{rates}")
+    print("-" * (56 + len(batch_columns)))
+    print(f"Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,12 @@ For every class folder:
 
 Augmentation includes random flips, rotations, shifts, scaling, Gaussian noise, and motion blur.
 
+Work is split into one task per source image (copy the original, then write its
+share of augmented images) and run on a process pool, so all classes and images
+are processed in parallel. Each task seeds the augmentation RNG from
+(SEED, class, filename), so the output does not depend on NUM_WORKERS or on
+task scheduling: rerunning with the same config reproduces the same images.
+
 Intended Use
 ------------
 Designed for small, imbalanced medical or wound image datasets where each class
@@ -35,7 +41,8 @@ Output:
 
 Usage
 -----
-1. Modify `INPUT_DIR`, `OUTPUT_DIR`, and `TARGET_COUNT` as needed.
+1. Modify `INPUT_DIR`, `OUTPUT_DIR`, and `TARGET_COUNT` as needed (and optionally
+   `NUM_WORKERS`, `SEED`, `JPEG_QUALITY`, `PNG_COMPRESSION`).
 2. Run:
        python augment_all_classes.py
 3. Each subdirectory will end up containing ~TARGET_COUNT images (original + augmented).
@@ -50,16 +57,25 @@ Author: Finn (with ChatGPT)
 Date: October 2025
 """
 
+import hashlib
 import os
+import random
+import shutil
 import cv2
+import numpy as np
 import albumentations as A
+from multiprocessing import Pool
 from tqdm import tqdm
 
 # ==== CONFIG ====
 INPUT_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/light_wounds"
 OUTPUT_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/light_wounds_aug"
 TARGET_COUNT = 500  # desired total images per class (including originals)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+NUM_WORKERS = os.cpu_count() or 1  # augmentation processes
+SEED = 42  # base seed; each image's augmentations are seeded from it
+JPEG_QUALITY = 95  # 0-100, for .jpg/.jpeg outputs
+PNG_COMPRESSION = 3  # 0 (fastest, largest) - 9 (slowest, smallest), for .png outputs
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
 
 # ==== AUGMENTATION PIPELINE ====
 transform = A.Compose([
@@ -76,65 +92,112 @@ transform = A.Compose([
 def augment_image(img):
     return transform(image=img)["image"]
 
-# ==== AUGMENTATION LOOP PER CLASS ====
 
+def task_seed(class_name, file):
+    digest = hashlib.sha256(f"{SEED}/{class_name}/{file}".encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def seed_augmentations(seed, pipeline=transform):
+    # Older Albumentations draws from random/np.random, newer has its own RNG
+    random.seed(seed)
+    np.random.seed(seed)
+    if hasattr(pipeline, "set_random_seed"):
+        pipeline.set_random_seed(seed)
+
+
+def write_params(ext):
+    ext = ext.lower()
+    if ext in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    if ext == ".png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION]
+    return []
 
-def augment_class(class_name, input_path, output_path):
-    os.makedirs(output_path, exist_ok=True)
+# ==== PLANNING ====
 
-    image_files = [f for f in os.listdir(input_path) if f.lower().endswith(
-        (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"))]
+
+def plan_class(class_name, input_path, output_path):
+    """One task per source image: (class, src, dst dir, file, augmentations to write)"""
+    image_files = sorted(f for f in os.listdir(input_path)
+                         if f.lower().endswith(IMAGE_EXTENSIONS))
     current_count = len(image_files)
-    print(f"\n📂 {class_name}: Found {current_count} images")
+    print(f"📂 {class_name}: Found {current_count} images", end="")
+
+    augment_needed = max(0, TARGET_COUNT - current_count)
+    if augment_needed == 0:
+        print(f" — already has {current_count}, copying only")
+    else:
+        print(f" — augmenting {augment_needed} new images")
 
-    # Copy originals first
+    # Same distribution as before: up to aug_per_image per source, in order
+    aug_per_image = max(1, augment_needed // current_count + 1) if current_count else 0
+    tasks = []
     for file in image_files:
-        src = os.path.join(input_path, file)
-        dst = os.path.join(output_path, file)
-        if not os.path.exists(dst):
-            os.system(f'cp "{src}" "{dst}"')
+        count = min(aug_per_image, augment_needed)
+        augment_needed -= count
+        tasks.append((class_name, input_path, output_path, file, count))
+    return tasks
 
-    if current_count >= TARGET_COUNT:
-        print(f"✅ Already has {current_count} images, skipping augmentation.")
-        return
+# ==== WORKER ====
 
-    augment_needed = TARGET_COUNT - current_count
-    print(f"🔄 Augmenting {augment_needed} new images...")
 
-    aug_per_image = max(1, augment_needed // current_count + 1)
-    total_generated = 0
+def init_worker():
+    cv2.setNumThreads(1)  # parallelism comes from the pool
 
-    for file in tqdm(image_files, desc=f"Augmenting {class_name}"):
-        img_path = os.path.join(input_path, file)
-        img = cv2.imread(img_path)
-        if img is None:
-            continue
 
-        base_name, ext = os.path.splitext(file)
-        for i in range(1, aug_per_image + 1):
-            if total_generated >= augment_needed:
-                break
-            aug_img = augment_image(img)
-            new_name = f"{base_name}_aug{i}{ext}"
-            cv2.imwrite(os.path.join(output_path, new_name), aug_img)
-            total_generated += 1
+def process_image(task):
+    """Copy one original and write its augmented versions; returns (class, generated)"""
+    class_name, input_path, output_path, file, count = task
+    src = os.path.join(input_path, file)
+    dst = os.path.join(output_path, file)
+    if not os.path.exists(dst):
+        shutil.copyfile(src, dst)
+    if count == 0:
+        return class_name, 0
 
-        if total_generated >= augment_needed:
-            break
+    img = cv2.imread(src)
+    if img is None:
+        return class_name, 0
 
-    print(f"🎉 {class_name}: Generated {total_generated} augmented images. Total now ≈ {current_count + total_generated}")
+    seed_augmentations(task_seed(class_name, file))
+    base_name, ext = os.path.splitext(file)
+    params = write_params(ext)
+    for i in range(1, count + 1):
+        new_name = f"{base_name}_aug{i}{ext}"
+        cv2.imwrite(os.path.join(output_path, new_name), augment_image(img), params)
+    return class_name, count
 
 # ==== MAIN ====
 
 
 def main():
-    classes = [d for d in os.listdir(
-        INPUT_DIR) if os.path.isdir(os.path.join(INPUT_DIR, d))]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    classes = sorted(d for d in os.listdir(
+        INPUT_DIR) if os.path.isdir(os.path.join(INPUT_DIR, d)))
+
+    tasks, originals = [], {}
     for cls in classes:
         in_dir = os.path.join(INPUT_DIR, cls)
         out_dir = os.path.join(OUTPUT_DIR, cls)
-        augment_class(cls, in_dir, out_dir)
+        os.makedirs(out_dir, exist_ok=True)
+        class_tasks = plan_class(cls, in_dir, out_dir)
+        originals[cls] = len(class_tasks)
+        tasks.extend(class_tasks)
+
+    # Most augmentation work sits on the first images of small classes, so
+    # hand out big tasks first to keep the pool busy until the end
+    tasks.sort(key=lambda task: -task[4])
+    generated = {cls: 0 for cls in classes}
+    print(f"\n🔄 Processing {len(tasks)} images on {NUM_WORKERS} workers...")
+    with Pool(NUM_WORKERS, initializer=init_worker) as pool:
+        for cls, count in tqdm(pool.imap_unordered(process_image, tasks, chunksize=4),
+                               total=len(tasks), desc="Augmenting"):
+            generated[cls] += count
 
+    for cls in classes:
+        print(f"🎉 {cls}: Generated {generated[cls]} augmented images. "
+              f"Total now ≈ {originals[cls] + generated[cls]}")
     print("\n✅ All classes processed! Augmented dataset saved to:")
     print(f"   {OUTPUT_DIR}")
 
@@ -0,0 +1,269 @@
+"""
+Near-duplicate and leakage detection with perceptual hashes
+===========================================================
+
+augment.py writes `<name>_augN` variants next to each original, and the same
+photo often shows up in more than one source folder. A random file-level
+split then puts copies of one photo in both train and test, which inflates
+test accuracy.
+
+This script:
+  1. hashes every image (64-bit dHash or pHash) on a process pool. JPEGs
+     are decoded at reduced size with PIL's draft mode, because the hash
+     only needs a 9x8 / 32x32 thumbnail;
+  2. finds all pairs within MAX_DISTANCE bits by multi-index hashing. The
+     64 bits are cut into MAX_DISTANCE + 1 chunks. Two hashes that differ
+     in at most MAX_DISTANCE bits must agree exactly on at least one chunk
+     (pigeonhole), so only images sharing a chunk value are compared. That
+     keeps the search near-linear instead of all-pairs over the corpus;
+  3. merges pairs into groups (union-find). With GROUP_AUG_NAMES,
+     `<name>_augN` files are also grouped with `<name>` in the same folder.
+     Flips and rotations change a perceptual hash too much to be caught by
+     distance alone;
+  4. writes OUTPUT_MANIFEST (manifest.py format, with a `group` column) and
+     a JSON report. The report lists the groups, the groups spanning
+     several classes (probable label noise) and, if the input manifest is
+     already split, the groups leaking across train/val/test.
+
+Feed OUTPUT_MANIFEST to split.py (SOURCE_MANIFEST). It keeps each group in
+a single split.
+
+Usage:
+    python src/data_manipulation/dedup.py
+"""
+
+import json
+import os
+import re
+from multiprocessing import Pool
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+from manifest import read_manifest, write_manifest
+
+# ==== CONFIG ====
+SOURCE_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/light_wounds_aug"
+SOURCE_MANIFEST = None  # a split.py / group.py manifest; used instead of SOURCE_DIR if set
+OUTPUT_MANIFEST = "output/dedup/manifest.csv"  # input rows + group column
+REPORT_PATH = "output/dedup/report.json"
+HASH = "dhash"  # "dhash" (fastest) or "phash" (DCT, more robust to noise/blur)
+MAX_DISTANCE = 6  # Hamming distance (of 64 bits) counted as a near-duplicate
+GROUP_AUG_NAMES = True  # also group "<name>_augN" files with "<name>"
+NUM_WORKERS = os.cpu_count() or 1
+CHUNKSIZE = 256  # images per pool task
+BLOCK_SIZE = 2048  # rows compared at once inside a bucket (bounds memory)
+REPORT_GROUPS = 200  # largest groups listed in full in the report
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+AUG_NAME = re.compile(r"^(.*)_aug\d+$")
+
+# ==== HASHING ====
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+DCT_32 = _dct_matrix(32)
+
+
+def dhash(image):
+    """Sign of horizontal gradients on a 9x8 grayscale thumbnail"""
+    pixels = np.asarray(image.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image):
+    """Low-frequency 8x8 DCT coefficients of a 32x32 thumbnail vs. their median"""
+    pixels = np.asarray(image.resize((32, 32), Image.BILINEAR), dtype=np.float64)
+    low = (DCT_32 @ pixels @ DCT_32.T)[:8, :8]
+    return _pack(low > np.median(low.ravel()[1:]))  # skip the DC term
+
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+
+def _pack(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def hash_file(path):
+    """(path, 64-bit hash) or (path, None) if the file can't be decoded"""
+    try:
+        with Image.open(path) as image:
+            image.draft("L", (64, 64))  # JPEG: decode at 1/2..1/8 scale
+            return path, HASHES[HASH](image.convert("L"))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return path, None
+
+# ==== NEIGHBOR SEARCH ====
+
+
+def popcount(values):
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(values)
+    as_bytes = np.ascontiguousarray(values).view(np.uint8).reshape(values.shape + (8,))
+    return np.unpackbits(as_bytes, axis=-1).sum(-1)
+
+
+def near_pairs(hashes, max_distance=MAX_DISTANCE):
+    """(i, j, distance) rows for every i < j with Hamming distance <= max_distance"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    bounds = np.linspace(0, 64, max_distance + 2).astype(int)
+    found = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        keys = (hashes >> np.uint64(lo)) & np.uint64((1 << int(hi - lo)) - 1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = order[start:end]
+            for b in range(0, len(members), BLOCK_SIZE):
+                block = members[b:b + BLOCK_SIZE]
+                distance = popcount(hashes[block][:, None] ^ hashes[members][None, :])
+                rows, cols = np.nonzero(distance <= max_distance)
+                keep = block[rows] < members[cols]
+                found.append(np.stack([block[rows][keep], members[cols][keep],
+                                       distance[rows, cols][keep]], axis=1))
+    if not found:
+        return np.empty((0, 3), dtype=np.int64)
+    # A pair can share several chunks; keep it once
+    return np.unique(np.concatenate(found).astype(np.int64), axis=0)
+
+# ==== GROUPING ====
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def aug_lineage(rows):
+    """(i, j) pairs linking each "<name>_augN" file to "<name>" in its folder"""
+    firsts, pairs = {}, []
+    for i, row in enumerate(rows):
+        folder, file = os.path.split(row["path"])
+        stem = os.path.splitext(file)[0]
+        match = AUG_NAME.match(stem)
+        key = (folder, match.group(1) if match else stem)
+        if key in firsts:
+            pairs.append((firsts[key], i))
+        else:
+            firsts[key] = i
+    return pairs
+
+
+def list_rows():
+    """Manifest rows from SOURCE_MANIFEST, or one per image under SOURCE_DIR"""
+    if SOURCE_MANIFEST:
+        return read_manifest(SOURCE_MANIFEST)
+    rows = []
+    for cls in sorted(os.listdir(SOURCE_DIR)):
+        class_path = os.path.join(SOURCE_DIR, cls)
+        if os.path.isdir(class_path):
+            rows.extend({"path": os.path.abspath(os.path.join(class_path, f)), "label": cls}
+                        for f in sorted(os.listdir(class_path))
+                        if f.lower().endswith(IMAGE_EXTENSIONS))
+    return rows
+
+# ==== MAIN ====
+
+
+def main():
+    rows = list_rows()
+    paths = [row["path"] for row in rows]
+    print(f"🔍 Hashing {len(paths)} images ({HASH}) on {NUM_WORKERS} workers...")
+    hashes = {}
+    with Pool(NUM_WORKERS) as pool:
+        for path, value in tqdm(pool.imap_unordered(hash_file, paths, chunksize=CHUNKSIZE),
+                                total=len(paths), desc="Hashing"):
+            hashes[path] = value
+    unreadable = [path for path in paths if hashes[path] is None]
+    hashed = [i for i, path in enumerate(paths) if hashes[path] is not None]
+    if unreadable:
+        print(f"⚠️ {len(unreadable)} images could not be decoded (left ungrouped)")
+
+    print(f"🧮 Searching near-duplicates (distance <= {MAX_DISTANCE})...")
+    pairs = near_pairs([hashes[paths[i]] for i in hashed], MAX_DISTANCE)
+    print(f"   {len(pairs)} near-duplicate pairs")
+
+    groups = UnionFind(len(rows))
+    for i, j, _ in pairs:
+        groups.union(hashed[i], hashed[j])
+    if GROUP_AUG_NAMES:
+        for i, j in aug_lineage(rows):
+            groups.union(i, j)
+
+    members = {}
+    for i in range(len(rows)):
+        members.setdefault(groups.find(i), []).append(i)
+    members = {root: idx for root, idx in members.items() if len(idx) > 1}
+    group_ids = {root: f"g{n:06d}" for n, root in enumerate(sorted(members))}
+    for row in rows:
+        row["group"] = ""
+    for root, idx in members.items():
+        for i in idx:
+            rows[i]["group"] = group_ids[root]
+
+    write_manifest(OUTPUT_MANIFEST, rows)
+    print(f"📝 Wrote manifest with group ids to {OUTPUT_MANIFEST}")
+
+    def describe(root):
+        idx = members[root]
+        return {
+            "group": group_ids[root],
+            "size": len(idx),
+            "labels": sorted({rows[i]["label"] for i in idx}),
+            "splits": sorted({rows[i].get("split", "") for i in idx} - {""}),
+            "paths": [rows[i]["path"] for i in idx],
+        }
+
+    described = {root: describe(root) for root in members}
+    cross_label = [described[root] for root in members if len(described[root]["labels"]) > 1]
+    leaking = [described[root] for root in members if len(described[root]["splits"]) > 1]
+    largest = sorted(members, key=lambda root: -len(members[root]))[:REPORT_GROUPS]
+    report = {
+        "images": len(rows),
+        "unreadable": unreadable,
+        "hash": HASH,
+        "max_distance": MAX_DISTANCE,
+        "group_aug_names": GROUP_AUG_NAMES,
+        "hash_pairs": int(len(pairs)),
+        "groups": len(members),
+        "images_in_groups": sum(len(idx) for idx in members.values()),
+        "redundant_images": sum(len(idx) - 1 for idx in members.values()),
+        "cross_label_groups": cross_label,
+        "leaking_groups": leaking,
+        "largest_groups": [described[root] for root in largest],
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(REPORT_PATH)), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=1)
+
+    print(f"\n📊 {report['groups']} groups cover {report['images_in_groups']} images "
+          f"({report['redundant_images']} redundant copies)")
+    print(f"🏷️ {len(cross_label)} groups span more than one class")
+    if any(row.get("split") for row in rows):
+        print(f"🚨 {len(leaking)} groups leak across train/val/test")
+    print(f"📄 Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
-import shutil
+from manifest import materialize, write_manifest
 
 # ==== CONFIG ====
 SRC_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/general_groups"        # your source directory
 DEST_DIR = "grouped_wounds"       # output directory
-os.makedirs(DEST_DIR, exist_ok=True)
+MANIFEST_PATH = os.path.join(DEST_DIR, "manifest.csv")  # path,label,name per image
+# "manifest": only write MANIFEST_PATH (feed it to split.py's SOURCE_MANIFEST)
+# "symlink" / "hardlink" / "copy": also build DEST_DIR/<group>/ folders
+MODE = "manifest"
 
 # ==== GROUP DEFINITIONS ====
 groups = {
@@ -29,28 +32,38 @@ groups = {
 }
 
 # ==== MAIN SCRIPT ====
-for group_name, folders in groups.items():
-    group_dest = os.path.join(DEST_DIR, group_name)
-    os.makedirs(group_dest, exist_ok=True)
-    count = 1
-
-    print(f"\n📂 Processing {group_name}...")
-
-    for folder in folders:
-        src_folder = os.path.join(SRC_DIR, folder)
-        if not os.path.exists(src_folder):
-            print(f"  ⚠️ Missing folder: {folder}")
-            continue
-
-        for root, _, files in os.walk(src_folder):
-            for file in files:
-                if file.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")):
-                    src_path = os.path.join(root, file)
-                    new_name = f"{group_name[:-1]}_{count:04d}{os.path.splitext(file)[1].lower()}"
-                    dest_path = os.path.join(group_dest, new_name)
-                    shutil.copy2(src_path, dest_path)
-                    count += 1
-
-    print(f"✅ {count-1} images saved to {group_name}/")
-
-print("\n🎉 All grouping complete! Check 'grouped_wounds/' directory.")
+def main():
+    rows = []
+    for group_name, folders in groups.items():
+        count = 1
+
+        print(f"\n📂 Processing {group_name}...")
+
+        for folder in folders:
+            src_folder = os.path.join(SRC_DIR, folder)
+            if not os.path.exists(src_folder):
+                print(f"  ⚠️ Missing folder: {folder}")
+                continue
+
+            for root, dirs, files in os.walk(src_folder):
+                dirs.sort()
+                for file in sorted(files):
+                    if file.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")):
+                        new_name = f"{group_name[:-1]}_{count:04d}{os.path.splitext(file)[1].lower()}"
+                        rows.append({"path": os.path.abspath(os.path.join(root, file)),
+                                     "label": group_name, "name": new_name})
+                        count += 1
+
+        print(f"✅ {count-1} images in {group_name}")
+
+    write_manifest(MANIFEST_PATH, rows)
+    print(f"\n📝 Wrote manifest with {len(rows)} images to {MANIFEST_PATH}")
+    if MODE != "manifest":
+        print(f"📤 Materializing group folders ({MODE})...")
+        materialize(rows, DEST_DIR, MODE)
+
+    print(f"\n🎉 All grouping complete! Check '{DEST_DIR}/'.")
+
+
+if __name__ == "__main__":
+    main()
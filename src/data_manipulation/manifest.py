@@ -0,0 +1,119 @@
+"""
+Dataset manifests: splits and groupings without copying images
+===============================================================
+
+A manifest lists every image once as a row of
+    path   absolute path of the source image (never moved or copied)
+    label  class name
+    split  "train" / "val" / "test" ("" if not split yet)
+    name   optional file name to use when materialized (group.py renames)
+    group  optional near-duplicate group id from dedup.py; split.py keeps
+           each group in a single split
+
+split.py and group.py write manifests (CSV, or JSON when the file name ends
+in .json). Re-splitting with another seed or ratio only rewrites this small
+file. Training scripts read them directly (ManifestDataset, or
+OnlineAugmentDataset with a manifest), and tools that need a folder tree
+(ultralytics YOLO) can `materialize` one with symlinks or hardlinks.
+"""
+
+import csv
+import errno
+import json
+import os
+import shutil
+from PIL import Image
+from torch.utils.data import Dataset
+
+FIELDS = ["path", "label", "split", "name", "group"]
+MATERIALIZE_MODES = ("symlink", "hardlink", "copy")
+
+
+def write_manifest(path, rows):
+    """Write rows (dicts with FIELDS keys) to a CSV or JSON manifest"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rows = [{field: row.get(field, "") for field in FIELDS} for row in rows]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        if path.endswith(".json"):
+            json.dump(rows, f, indent=1)
+        else:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path, split=None):
+    """Rows of a manifest, optionally only those of one split"""
+    with open(path, newline="") as f:
+        rows = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+    for row in rows:
+        for field in FIELDS:
+            row.setdefault(field, "")
+    if split is not None:
+        rows = [row for row in rows if row["split"] == split]
+    return rows
+
+
+def link_or_copy(src, dst, mode):
+    if os.path.lexists(dst):
+        return
+    if mode == "symlink":
+        os.symlink(src, dst)
+    elif mode == "hardlink":
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            shutil.copy2(src, dst)  # different filesystem: fall back to a copy
+    else:
+        shutil.copy2(src, dst)
+
+
+def materialize(rows, dest_dir, mode="symlink"):
+    """Build dest_dir/<split>/<label>/<name> (or dest_dir/<label>/<name> for
+    unsplit rows) pointing at the manifest's images"""
+    if mode not in MATERIALIZE_MODES:
+        raise ValueError(f"Unknown materialize mode: {mode}")
+    made = set()
+    for row in rows:
+        split = row.get("split", "")
+        folder = os.path.join(dest_dir, split, row["label"]) if split \
+            else os.path.join(dest_dir, row["label"])
+        if folder not in made:
+            os.makedirs(folder, exist_ok=True)
+            made.add(folder)
+        name = row.get("name") or os.path.basename(row["path"])
+        link_or_copy(os.path.abspath(row["path"]), os.path.join(folder, name), mode)
+    return len(rows)
+
+
+def manifest_classes(rows):
+    """Sorted class names, so every split of a manifest shares one indexing"""
+    return sorted({row["label"] for row in rows})
+
+
+class ManifestDataset(Dataset):
+    """ImageFolder equivalent for one split of a manifest"""
+
+    def __init__(self, manifest, split, transform=None):
+        rows = read_manifest(manifest)
+        self.classes = manifest_classes(rows)
+        self.class_to_idx = {cls: i for i, cls in enumerate(self.classes)}
+        self.samples = [(row["path"], self.class_to_idx[row["label"]])
+                        for row in rows if row["split"] == split]
+        self.targets = [label for _, label in self.samples]
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        path, label = self.samples[index]
+        with open(path, "rb") as f:
+            image = Image.open(f).convert("RGB")
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, label
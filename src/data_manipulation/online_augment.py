@@ -0,0 +1,129 @@
+"""
+On-the-fly augmentation dataset
+===============================
+
+Drop-in replacement for `torchvision.datasets.ImageFolder` on the train split
+that applies the Albumentations pipeline from augment.py at sample time,
+instead of reading augmented copies written to disk by augment.py.
+
+Each class is oversampled virtually to TARGET_COUNT samples (or keeps its
+size if it already has more), like augment.py does on disk:
+  - the first n indices of a class are its n originals, unaugmented;
+  - the rest cycle through the originals, each drawn with a fresh random
+    augmentation.
+
+Augmentations are seeded per (seed, epoch, index). Call `set_epoch(epoch)`
+before each epoch to get new variants. Runs are reproducible whatever the
+DataLoader worker count (use the default persistent_workers=False so the
+workers see the new epoch).
+
+Disk usage stays at the original image count, and the split no longer
+leaks augmented copies of one photo across train/val/test. Run split.py
+on the un-augmented folder (augment.py's INPUT_DIR); a root holding
+augment.py's `<name>_augN` copies is refused, since they would be augmented
+a second time.
+
+`root` is a class-per-folder directory, a manifest from split.py, or a
+shard directory from shards.py (for the last two, the `split` rows are used).
+
+Usage (see src/classifier/ResNet/train.py):
+    train_ds = OnlineAugmentDataset(f"{DATA_DIR}/train", transform=transform)
+    for epoch in range(EPOCHS):
+        train_ds.set_epoch(epoch)
+        ...
+"""
+
+import hashlib
+import os
+import re
+import numpy as np
+from PIL import Image
+from torch.utils.data import Dataset
+from augment import IMAGE_EXTENSIONS, TARGET_COUNT, seed_augmentations
+from augment import transform as augment_transform
+from manifest import manifest_classes, read_manifest
+from shards import ShardDataset, is_shard_dir
+
+AUG_NAME = re.compile(r"_aug\d+$")  # augment.py's "<name>_augN" copies
+
+
+class OnlineAugmentDataset(Dataset):
+    def __init__(self, root, target_count=TARGET_COUNT, transform=None,
+                 augment=augment_transform, seed=0, split="train"):
+        self.root = root
+        self.target_count = target_count
+        self.transform = transform
+        self.augment = augment
+        self.seed = seed
+        self.epoch = 0
+        self.shards = None
+
+        # Same class indexing as ImageFolder (sorted folder names)
+        if is_shard_dir(root):
+            # Originals are shard indices instead of paths
+            self.shards = ShardDataset(root, split)
+            self.classes = self.shards.classes
+            paths = {cls: [] for cls in self.classes}
+            for i, label in enumerate(self.shards.targets):
+                paths[self.classes[label]].append(i)
+        elif os.path.isdir(root):
+            self.classes = sorted(d for d in os.listdir(root)
+                                  if os.path.isdir(os.path.join(root, d)))
+            paths = {cls: [os.path.join(root, cls, f) for f in os.listdir(os.path.join(root, cls))
+                           if f.lower().endswith(IMAGE_EXTENSIONS)]
+                     for cls in self.classes}
+        else:
+            rows = read_manifest(root)
+            self.classes = manifest_classes(rows)
+            paths = {cls: [] for cls in self.classes}
+            for row in rows:
+                if row["split"] == split:
+                    paths[row["label"]].append(row["path"])
+        if self.shards is None:
+            augmented = [path for cls in self.classes for path in paths[cls]
+                         if AUG_NAME.search(os.path.splitext(os.path.basename(path))[0])]
+            if augmented:
+                raise ValueError(
+                    f"{root} holds {len(augmented)} augment.py copies (e.g. {augmented[0]}); "
+                    f"split the un-augmented folder, or train from it as a folder dataset")
+        self.class_to_idx = {cls: i for i, cls in enumerate(self.classes)}
+        self.originals = [sorted(paths[cls]) for cls in self.classes]  # per class
+
+        # Virtual layout: class c owns indices [starts[c], starts[c] + sizes[c])
+        self.sizes = [max(target_count, len(paths)) if paths else 0
+                      for paths in self.originals]
+        self.starts = np.concatenate([[0], np.cumsum(self.sizes)[:-1]]).astype(int)
+        self.targets = [c for c, size in enumerate(self.sizes) for _ in range(size)]
+
+    def __len__(self):
+        return len(self.targets)
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def sample_seed(self, index):
+        digest = hashlib.sha256(f"{self.seed}/{self.epoch}/{index}".encode()).digest()
+        return int.from_bytes(digest[:4], "little")
+
+    def __getitem__(self, index):
+        label = self.targets[index]
+        offset = index - self.starts[label]
+        paths = self.originals[label]
+        if self.shards is not None:
+            image = self.shards.image(paths[offset % len(paths)])
+        else:
+            with open(paths[offset % len(paths)], "rb") as f:
+                image = Image.open(f).convert("RGB")
+
+        if offset >= len(paths) and self.augment is not None:
+            seed_augmentations(self.sample_seed(index), self.augment)
+            image = Image.fromarray(self.augment(image=np.asarray(image))["image"])
+
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, label
+
+    def summary(self):
+        """{class: (originals, virtual samples)}"""
+        return {cls: (len(paths), size)
+                for cls, paths, size in zip(self.classes, self.originals, self.sizes)}
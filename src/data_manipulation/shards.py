@@ -0,0 +1,270 @@
+"""
+Pre-decoded, resized shards of a training split
+===============================================
+
+Training from ImageFolder decodes every full-resolution JPEG again each
+epoch, and then throws most of the pixels away in Resize((224, 224)). This
+script decodes and resizes every image once (on a process pool). It packs
+the results into a few large uint8 arrays of shape (N, SIZE, SIZE, 3),
+saved as .npy, so training reads them back with np.load(mmap_mode="r"):
+no decode, no per-image file opens, and the OS page cache shares the
+pages between DataLoader workers.
+
+Layout of SHARD_DIR:
+    index.json               image size, resize mode, classes, and per split
+                             its shard files, labels file and source paths
+    train-00000.npy ...      (n, SIZE, SIZE, 3) uint8 RGB, SHARD_SIZE images each
+    train-labels.npy         (N,) int64 class indices
+    val-00000.npy ...
+
+RESIZE decides how images become square:
+    "squash"  resize to SIZE x SIZE, like ResNet's transforms.Resize((224, 224));
+              the shards then hold the exact pixels the ResNet trainer used
+    "crop"    resize the shorter side to SIZE and center-crop, like
+              ultralytics' classification transforms (use this for YOLO).
+              This also changes YOLO's training augmentation: its
+              RandomResizedCrop then only samples from the center square,
+              at SIZE px, instead of from the whole full-resolution photo.
+              Val/test accuracy matches ultralytics' own eval transform.
+
+Readers:
+    ShardDataset(SHARD_DIR, "train")      ImageFolder-like Dataset (ResNet)
+    OnlineAugmentDataset(SHARD_DIR)       on-the-fly augmentation from shards
+    export_folder(SHARD_DIR, dest)        pre-resized class-folder tree for
+                                          ultralytics, which only reads folders;
+                                          skipped while dest is up to date
+
+Usage:
+    python src/data_manipulation/shards.py
+"""
+
+import json
+import os
+import shutil
+from multiprocessing import Pool
+import numpy as np
+from PIL import Image
+from torch.utils.data import Dataset
+from tqdm import tqdm
+from manifest import manifest_classes, read_manifest
+
+# ==== CONFIG ====
+DATA_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"  # train/, val/, test/
+MANIFEST = None  # split.py's manifest.csv; used instead of DATA_DIR if set
+SHARD_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/shards"
+SPLITS = ("train", "val", "test")
+SIZE = 224
+RESIZE = "squash"  # "squash" (ResNet) or "crop" (YOLO); see above
+SHARD_SIZE = 4096  # images per shard file (~600 MB at 224px)
+NUM_WORKERS = os.cpu_count() or 1
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+INDEX_FILE = "index.json"
+EXPORT_FILE = "export.json"  # in export_folder's dest: the index.json it was exported from
+
+# ==== PACKING ====
+
+
+def resize(image, size=SIZE, mode=RESIZE):
+    """PIL image -> (size, size, 3) uint8 array"""
+    image = image.convert("RGB")
+    if mode == "squash":
+        image = image.resize((size, size), Image.BILINEAR)
+    elif mode == "crop":
+        # Same rounding as torchvision's Resize(size) + CenterCrop(size)
+        short, long = sorted(image.size)
+        long = int(size * long / short)
+        width, height = (size, long) if image.width <= image.height else (long, size)
+        image = image.resize((width, height), Image.BILINEAR)
+        left, top = round((width - size) / 2), round((height - size) / 2)
+        image = image.crop((left, top, left + size, top + size))
+    else:
+        raise ValueError(f"Unknown resize mode: {mode}")
+    return np.asarray(image, dtype=np.uint8)
+
+
+def load_resized(path):
+    """(path, array) or (path, None) if the file can't be decoded"""
+    try:
+        with Image.open(path) as image:
+            return path, resize(image, SIZE, RESIZE)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return path, None
+
+
+def list_splits():
+    """(classes, {split: [(path, label index)]}) from MANIFEST or DATA_DIR"""
+    if MANIFEST:
+        rows = read_manifest(MANIFEST)
+        classes = manifest_classes(rows)
+        samples = {split: sorted((row["path"], classes.index(row["label"]))
+                                 for row in rows if row["split"] == split)
+                   for split in SPLITS}
+        return classes, samples
+
+    # ImageFolder indexing: sorted class folders (taken from train/)
+    classes = sorted(d for d in os.listdir(os.path.join(DATA_DIR, SPLITS[0]))
+                     if os.path.isdir(os.path.join(DATA_DIR, SPLITS[0], d)))
+    samples = {}
+    for split in SPLITS:
+        samples[split] = []
+        for label, cls in enumerate(classes):
+            class_dir = os.path.join(DATA_DIR, split, cls)
+            if os.path.isdir(class_dir):
+                samples[split].extend(
+                    (os.path.join(class_dir, f), label) for f in sorted(os.listdir(class_dir))
+                    if f.lower().endswith(IMAGE_EXTENSIONS))
+    return classes, samples
+
+
+def pack_split(pool, split, samples, shard_dir):
+    """Decode, resize and write one split; returns its index entry"""
+    shards, labels, paths = [], [], []
+    results = pool.imap(load_resized, [path for path, _ in samples], chunksize=16)
+    images = zip(samples, results)
+    for start in range(0, len(samples), SHARD_SIZE):
+        count = min(SHARD_SIZE, len(samples) - start)
+        file = f"{split}-{len(shards):05d}.npy"
+        array = np.lib.format.open_memmap(os.path.join(shard_dir, file + ".tmp"), mode="w+",
+                                          dtype=np.uint8, shape=(count, SIZE, SIZE, 3))
+        written = 0
+        for (path, label), (_, image) in tqdm(
+                (next(images) for _ in range(count)), total=count, desc=file):
+            if image is None:
+                print(f"⚠️ Skipping unreadable image: {path}")
+                continue
+            array[written] = image
+            labels.append(label)
+            paths.append(path)
+            written += 1
+        array.flush()
+        del array
+        if written < count:  # drop the rows of skipped images
+            trimmed = np.load(os.path.join(shard_dir, file + ".tmp"), mmap_mode="r")[:written]
+            np.save(os.path.join(shard_dir, file), trimmed)
+            os.remove(os.path.join(shard_dir, file + ".tmp"))
+        else:
+            os.replace(os.path.join(shard_dir, file + ".tmp"), os.path.join(shard_dir, file))
+        shards.append({"file": file, "count": written})
+
+    labels_file = f"{split}-labels.npy"
+    np.save(os.path.join(shard_dir, labels_file), np.array(labels, dtype=np.int64))
+    return {"shards": shards, "labels": labels_file, "count": len(labels), "paths": paths}
+
+# ==== READING ====
+
+
+def read_index(shard_dir):
+    with open(os.path.join(shard_dir, INDEX_FILE)) as f:
+        return json.load(f)
+
+
+def is_shard_dir(path):
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+class ShardDataset(Dataset):
+    """ImageFolder equivalent for one split of SHARD_DIR. Items are PIL
+    images (so the usual torchvision transforms apply) and class indices."""
+
+    def __init__(self, shard_dir, split, transform=None):
+        index = read_index(shard_dir)
+        entry = index["splits"][split]
+        self.shard_dir = shard_dir
+        self.files = [shard["file"] for shard in entry["shards"]]
+        self.offsets = np.cumsum([0] + [shard["count"] for shard in entry["shards"]])
+        self.classes = index["classes"]
+        self.class_to_idx = {cls: i for i, cls in enumerate(self.classes)}
+        self.targets = np.load(os.path.join(shard_dir, entry["labels"])).tolist()
+        self.samples = list(zip(entry["paths"], self.targets))
+        self.size = index["size"]
+        self.transform = transform
+        self.arrays = None  # memmapped on first access, in each worker process
+
+    def __len__(self):
+        return len(self.targets)
+
+    def array(self, index):
+        """(SIZE, SIZE, 3) uint8 view of one image"""
+        if self.arrays is None:
+            self.arrays = [np.load(os.path.join(self.shard_dir, f), mmap_mode="r")
+                           for f in self.files]
+        shard = int(np.searchsorted(self.offsets, index, side="right")) - 1
+        return self.arrays[shard][index - self.offsets[shard]]
+
+    def image(self, index):
+        return Image.fromarray(np.array(self.array(index)))
+
+    def __getitem__(self, index):
+        image = self.image(index)
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, self.targets[index]
+
+    def __getstate__(self):
+        # DataLoader workers open their own memmaps
+        return {**self.__dict__, "arrays": None}
+
+
+def export_folder(shard_dir, dest_dir, splits=SPLITS):
+    """Write SHARD_DIR back out as dest_dir/<split>/<class>/*.png at shard
+    size, for trainers that only read class folders (ultralytics).
+    Decoding a small PNG is far cheaper than the original full-size JPEG.
+    Returns False (and keeps dest_dir, with any ultralytics .npy cache in
+    it) if dest_dir was already exported from the same index."""
+    index = read_index(shard_dir)
+    stamp = {"shard_dir": os.path.abspath(shard_dir), "splits": list(splits), "index": index,
+             "packed_at": os.stat(os.path.join(shard_dir, INDEX_FILE)).st_mtime_ns}  # repacks rewrite it
+    try:
+        with open(os.path.join(dest_dir, EXPORT_FILE)) as f:
+            if json.load(f) == stamp:
+                return False
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(dest_dir, ignore_errors=True)
+    for split in splits:
+        if split not in index["splits"]:
+            continue
+        dataset = ShardDataset(shard_dir, split)
+        for cls in dataset.classes:
+            os.makedirs(os.path.join(dest_dir, split, cls), exist_ok=True)
+        for i in tqdm(range(len(dataset)), desc=f"Exporting {split}"):
+            path, label = dataset.samples[i]
+            name = f"{i:07d}_{os.path.splitext(os.path.basename(path))[0]}.png"
+            dataset.image(i).save(os.path.join(dest_dir, split, dataset.classes[label], name),
+                                  compress_level=1)
+    # Written last, so an interrupted export is redone next time
+    with open(os.path.join(dest_dir, EXPORT_FILE), "w") as f:
+        json.dump(stamp, f)
+    return True
+
+# ==== MAIN ====
+
+
+def main():
+    classes, samples = list_splits()
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    if is_shard_dir(SHARD_DIR):
+        os.remove(os.path.join(SHARD_DIR, INDEX_FILE))  # repacking invalidates it
+    index = {"size": SIZE, "resize": RESIZE, "classes": classes, "splits": {}}
+
+    print(f"📦 Packing {sum(len(s) for s in samples.values())} images into {SHARD_DIR} "
+          f"({SIZE}px, {RESIZE}) on {NUM_WORKERS} workers...")
+    with Pool(NUM_WORKERS) as pool:
+        for split in SPLITS:
+            if samples[split]:
+                index["splits"][split] = pack_split(pool, split, samples[split], SHARD_DIR)
+
+    # Written last, so a half-packed directory is never mistaken for a finished one
+    tmp_path = os.path.join(SHARD_DIR, INDEX_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(SHARD_DIR, INDEX_FILE))
+
+    print("\n✅ Packing complete!")
+    for split, entry in index["splits"].items():
+        size_gb = entry["count"] * SIZE * SIZE * 3 / 1e9
+        print(f"  {split}: {entry['count']} images in {len(entry['shards'])} shards ({size_gb:.2f} GB)")
+
+
+if __name__ == "__main__":
+    main()
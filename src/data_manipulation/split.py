@@ -2,11 +2,17 @@ import os
 import random
 import shutil
 from math import floor
-from tqdm import tqdm
+from manifest import materialize, read_manifest, write_manifest
 
 # ==== CONFIG ====
 SOURCE_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/light_wounds_aug"
+SOURCE_MANIFEST = None  # e.g. group.py's or dedup.py's manifest; used instead of SOURCE_DIR if set
 DEST_DIR = "/mnt/c/Users/Finn/Downloads/Personal/python/hackathon/data/training"
+MANIFEST_PATH = os.path.join(DEST_DIR, "manifest.csv")  # path,label,split per image
+# "symlink" / "hardlink" / "copy": also build DEST_DIR/{train,val,test}/<class>/
+# (rebuilt from scratch on every run), which the trainers read by default
+# "manifest": only write MANIFEST_PATH (set MANIFEST in the trainers to use it)
+MODE = "symlink"
 TRAIN_RATIO, VAL_RATIO, TEST_RATIO = 0.7, 0.15, 0.15
 BALANCE_TEST = True
 SEED = 42
@@ -15,47 +21,82 @@ random.seed(SEED)
 # ==== FUNCTIONS ====
 
 
-def make_dirs(base, classes):
-    for split in ["train", "val", "test"]:
-        for cls in classes:
-            os.makedirs(os.path.join(base, split, cls), exist_ok=True)
-
-
-def copy_files(file_list, dest_dir, class_name):
-    for f in file_list:
-        dest_path = os.path.join(dest_dir, class_name, os.path.basename(f))
-        shutil.copy2(f, dest_path)
-
-
-def split_class(class_path):
-    images = [
-        os.path.join(class_path, f)
-        for f in os.listdir(class_path)
-        if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"))
-    ]
-    random.shuffle(images)
+def list_sources():
+    """{class: sorted image paths} from SOURCE_MANIFEST or SOURCE_DIR,
+    {path: near-duplicate group} from dedup.py's `group` column and
+    {path: materialized file name} from group.py's `name` column"""
+    if SOURCE_MANIFEST:
+        sources, groups, names = {}, {}, {}
+        for row in read_manifest(SOURCE_MANIFEST):
+            sources.setdefault(row["label"], []).append(row["path"])
+            if row["group"]:
+                groups[row["path"]] = row["group"]
+            if row["name"]:
+                names[row["path"]] = row["name"]
+        return {cls: sorted(paths) for cls, paths in sorted(sources.items())}, groups, names
+
+    sources = {}
+    for cls in sorted(os.listdir(SOURCE_DIR)):
+        class_path = os.path.join(SOURCE_DIR, cls)
+        if os.path.isdir(class_path):
+            sources[cls] = sorted(
+                os.path.join(class_path, f)
+                for f in os.listdir(class_path)
+                if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")))
+    return sources, {}, {}
+
+
+def split_class(images, groups=None, assigned=None):
+    """Shuffle one class into train/val/test. Images sharing a group in
+    `groups` ({path: group}) go to the same split, and so do groups already
+    placed by an earlier class (`assigned`, {group: split}, is updated)."""
+    images = list(images)  # sorted, so the shuffle only depends on SEED
     n_total = len(images)
     n_train = floor(n_total * TRAIN_RATIO)
     n_val = floor(n_total * VAL_RATIO)
-    train = images[:n_train]
-    val = images[n_train:n_train + n_val]
-    test = images[n_train + n_val:]
-    return train, val, test
+    if not groups:
+        random.shuffle(images)
+        train = images[:n_train]
+        val = images[n_train:n_train + n_val]
+        test = images[n_train + n_val:]
+        return train, val, test
+
+    units = {}
+    for path in images:
+        units.setdefault(groups.get(path, path), []).append(path)
+    keys = list(units)
+    random.shuffle(keys)
+    splits = {"train": [], "val": [], "test": []}
+    for key in keys:
+        split = assigned.get(key)
+        if split is None:
+            if len(splits["train"]) < n_train:
+                split = "train"
+            elif len(splits["val"]) < n_val:
+                split = "val"
+            else:
+                split = "test"
+            if units[key][0] in groups:
+                assigned[key] = split
+        splits[split].extend(units[key])
+    return splits["train"], splits["val"], splits["test"]
 
 
 # ==== MAIN SCRIPT ====
 def main():
-    classes = [d for d in os.listdir(SOURCE_DIR)
-               if os.path.isdir(os.path.join(SOURCE_DIR, d))]
-    make_dirs(DEST_DIR, classes)
+    sources, groups, names = list_sources()
+    classes = list(sources)
 
     print("📂 Splitting dataset...")
+    if groups:
+        print(f"🔗 Keeping {len(set(groups.values()))} near-duplicate groups "
+              f"({len(groups)} images) within one split each")
     splits = {"train": {}, "val": {}, "test": {}}
     summary = {}
+    assigned = {}  # group -> split, shared across classes
 
     for cls in classes:
-        class_path = os.path.join(SOURCE_DIR, cls)
-        train, val, test = split_class(class_path)
+        train, val, test = split_class(sources[cls], groups, assigned)
         splits["train"][cls] = train
         splits["val"][cls] = val
         splits["test"][cls] = test
@@ -74,11 +115,18 @@ def main():
             splits["test"][cls] = test_files
             summary[cls]["test"] = len(test_files)
 
-    print("\n📤 Copying files...")
-    for split in ["train", "val", "test"]:
-        for cls in tqdm(classes, desc=f"Copying {split}"):
-            dest_dir = os.path.join(DEST_DIR, split)
-            copy_files(splits[split][cls], dest_dir, cls)
+    rows = [{"path": os.path.abspath(path), "label": cls, "split": split,
+             "name": names.get(path, ""), "group": groups.get(path, "")}
+            for split in ["train", "val", "test"]
+            for cls in classes
+            for path in splits[split][cls]]
+    write_manifest(MANIFEST_PATH, rows)
+    print(f"\n📝 Wrote manifest with {len(rows)} images to {MANIFEST_PATH}")
+    if MODE != "manifest":
+        print(f"📤 Materializing train/val/test folders ({MODE})...")
+        for split in ["train", "val", "test"]:
+            shutil.rmtree(os.path.join(DEST_DIR, split), ignore_errors=True)  # drop the previous split
+        materialize(rows, DEST_DIR, MODE)
 
     print("\n✅ Dataset split complete!\n")
     print("📊 Summary of images per class:")